@@ -0,0 +1,67 @@
+"""
+Measures the cost of request logging when DEBUG is disabled: the eager
+f-string logging used before RequestLog against RequestLog itself.
+
+Usage:
+    python -m benchmarks.log_overhead [--calls 2000] [--body-kb 2048]
+"""
+import argparse
+import json
+import logging
+import time
+from typing import Callable
+
+from benchmarks.stand_in import make_lesson
+from moyklass_api.log import RequestLog
+
+
+def measure(call: Callable[[], None], count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        call()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--body-kb", type=int, default=2048)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("moyklass_api").setLevel(logging.WARNING)
+
+    lessons = []
+    size = 0
+    while size < args.body_kb * 1024:
+        lesson = make_lesson(len(lessons) + 1)
+        lessons.append(lesson)
+        size += len(json.dumps(lesson))
+    content = json.dumps({"lessons": lessons}).encode()
+
+    method, url = "GET", "https://api.moyklass.com/v1/company/lessons"
+    headers = {"x-access-token": "token"}
+    params = {"offset": 0, "limit": 500, "include_records": "true"}
+    request_log = RequestLog()
+
+    def eager() -> None:
+        logging.debug(
+            f"Sending {method} request to {url} with headers: {headers}; query params: {params}; data: {None}"
+        )
+        logging.debug(f"Response: {200}, {content}")
+
+    def lazy() -> None:
+        request_log.request(method, url, headers, params, None)
+        request_log.response(method, url, 200, content, 0.0)
+
+    baseline = measure(lambda: None, args.calls)
+    eager_time = measure(eager, args.calls) - baseline
+    lazy_time = measure(lazy, args.calls) - baseline
+
+    print(f"response body: {len(content) / 1024:.0f} KiB, DEBUG disabled")
+    print(f"eager f-strings: {eager_time:10.2f} us/request")
+    print(f"RequestLog:      {lazy_time:10.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
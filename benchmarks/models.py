@@ -0,0 +1,57 @@
+"""
+Compares the memory held by records kept as dictionaries and as the typed
+models of moyklass_api.models.
+
+Usage:
+    python -m benchmarks.models [--records 100000]
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks.stand_in import make_lesson, make_payment, make_user
+from moyklass_api import models
+
+
+def measure(build: Callable[[], List[Any]]) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size, elapsed
+
+
+def run(name: str, factory: Callable[[int], Dict[str, Any]], model: type, count: int):
+    # Every record is decoded from JSON like a response, so strings are not shared
+    payload = json.dumps([factory(i + 1) for i in range(count)])
+
+    dict_size, dict_time = measure(lambda: json.loads(payload))
+    model_size, model_time = measure(
+        lambda: [model.from_dict(item) for item in json.loads(payload)]
+    )
+    print(
+        f"{name:<9} dict: {dict_size / count:7.1f} B/record {dict_time:6.3f} s   "
+        f"model: {model_size / count:7.1f} B/record {model_time:6.3f} s   "
+        f"x{dict_size / model_size:.2f} smaller"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    run("payments", make_payment, models.Payment, args.records)
+    run("users", make_user, models.User, args.records)
+    run("lessons", make_lesson, models.Lesson, args.records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares requests/sec of one-connection-per-request calls with the pooled
+session used by MoyklassApi.
+
+Usage:
+    python -m benchmarks.pooling [--requests 500] [--latency 0]
+"""
+import argparse
+import time
+
+import requests
+
+from benchmarks.stand_in import StandInServer
+from moyklass_api.client import MoyklassApi
+from moyklass_api.payment import Payment
+
+
+def run_unpooled(url: str, count: int) -> float:
+    r = requests.request(
+        "POST", f"{url}/v1/company/auth/getToken", json={"apiKey": "benchmark"}
+    )
+    headers = {"x-access-token": r.json()["accessToken"]}
+
+    start = time.perf_counter()
+    for _ in range(count):
+        r = requests.request(
+            "GET",
+            f"{url}/v1/company/payments",
+            headers=headers,
+            params={"offset": 0, "limit": 10},
+        )
+        r.raise_for_status()
+        r.json()
+    return count / (time.perf_counter() - start)
+
+
+def run_pooled(url: str, count: int) -> float:
+    with MoyklassApi("benchmark", base_url=url) as mc:
+        payment = Payment(mc)
+        start = time.perf_counter()
+        for _ in range(count):
+            payment.get_payments(limit=10)
+        return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with StandInServer(latency=args.latency) as server:
+        unpooled = run_unpooled(server.url, args.requests)
+        pooled = run_pooled(server.url, args.requests)
+
+    print(f"requests.request (new connection each call): {unpooled:8.1f} req/s")
+    print(f"MoyklassApi pooled session:                  {pooled:8.1f} req/s")
+    print(f"speedup: x{pooled / unpooled:.2f}")
+
+
+if __name__ == "__main__":
+    main()
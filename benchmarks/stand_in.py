@@ -0,0 +1,336 @@
+import json
+import random
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+def make_payment(payment_id: int) -> Dict[str, Any]:
+    return {
+        "id": payment_id,
+        "userId": 1000 + payment_id % 500,
+        "date": "2024-01-24",
+        "summa": 1500 + payment_id % 7 * 100,
+        "optype": "income",
+        "paymentTypeId": 1,
+        "filialId": 1,
+        "comment": "",
+        "createdAt": "2024-01-24T10:00:00.000Z",
+    }
+
+
+def make_user(user_id: int) -> Dict[str, Any]:
+    return {
+        "id": user_id,
+        "name": f"User {user_id}",
+        "email": f"user{user_id}@example.com",
+        "phone": f"7900{user_id:07d}",
+        "filials": [1],
+        "attributes": [],
+        "createdAt": "2024-01-24T10:00:00.000Z",
+        "updatedAt": "2024-01-24T10:00:00.000Z",
+    }
+
+
+def make_lesson(lesson_id: int) -> Dict[str, Any]:
+    return {
+        "id": lesson_id,
+        "date": "2024-01-24",
+        "beginTime": "10:00",
+        "endTime": "11:00",
+        "classId": 1 + lesson_id % 10,
+        "filialId": 1,
+        "status": 1,
+        "records": [
+            {
+                "userId": 1000 + lesson_id % 500,
+                "userSubscriptionId": 500 + lesson_id % 500,
+                "visit": True,
+            }
+        ],
+    }
+
+
+def make_user_subscription(user_subscription_id: int) -> Dict[str, Any]:
+    return {
+        "id": user_subscription_id,
+        "userId": 1000 + user_subscription_id % 500,
+        "subscriptionId": 1,
+        "statusId": 2,
+        "sellDate": "2024-01-24",
+        "price": 5000,
+    }
+
+
+# path -> (response list key, record factory)
+LIST_ENDPOINTS = {
+    "/v1/company/payments": ("payments", make_payment),
+    "/v1/company/users": ("users", make_user),
+    "/v1/company/lessons": ("lessons", make_lesson),
+    "/v1/company/userSubscriptions": ("subscriptions", make_user_subscription),
+}
+
+
+# Endpoints filtered by the date query parameter
+DATED_ENDPOINTS = ("/v1/company/payments", "/v1/company/lessons")
+DATED_START = date(2024, 1, 1)
+DATED_DAYS = 366
+# Endpoints filtered by the userId query parameter
+USER_FILTERED_ENDPOINTS = ("/v1/company/payments", "/v1/company/userSubscriptions")
+
+Reply = Tuple[int, Any, Dict[str, str]]
+
+
+# path -> static response of rarely changing catalog endpoints
+CATALOG_ENDPOINTS = {
+    "/v1/company/paymentTypes": [
+        {"id": 1, "name": "Наличные"},
+        {"id": 2, "name": "Карта"},
+    ],
+    "/v1/company/userAttributes": [
+        {"id": 1, "name": "Дата рождения", "type": "date"},
+    ],
+    "/v1/company/courses": [{"id": 1, "name": "Английский язык"}],
+    "/v1/company/classes": [{"id": i, "name": f"Группа {i}"} for i in range(1, 11)],
+    "/v1/company/subscriptionGroupings": [{"id": 1, "name": "Абонементы"}],
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _reply(self, reply: Reply) -> None:
+        status, body, headers = reply
+        payload = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method: str) -> None:
+        stand_in = self.server.stand_in
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        rejected = stand_in.admit()
+        if rejected is not None:
+            self._reply(rejected)
+            return
+
+        try:
+            parsed = urlparse(self.path)
+            reply = stand_in.route(
+                method,
+                parsed.path,
+                parse_qs(parsed.query),
+                body,
+                self.headers.get("x-access-token"),
+            )
+        finally:
+            stand_in.release()
+        self._reply(reply)
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
+
+
+class StandInServer:
+    """
+    Local in-process HTTP server answering like api.moyklass.com.
+
+    Only the endpoints used by the benchmarks are implemented. Every list
+    endpoint pretends to hold ``total_items`` records. When more than
+    ``max_concurrent_requests`` requests are in progress the server answers
+    429 like the real API does when the company limit is exceeded. A share
+    of ``error_rate`` requests fails with 503 to emulate transient errors.
+    Requests with an unknown or expired access token get 401; call
+    expire_tokens() to emulate token expiry. ``payload_size`` adds a text
+    field of that many characters to every returned record to emulate
+    larger responses.
+    """
+
+    def __init__(
+        self,
+        total_items: int = 1000,
+        latency: float = 0.0,
+        port: int = 0,
+        max_concurrent_requests: int | None = None,
+        retry_after: int = 1,
+        error_rate: float = 0.0,
+        payload_size: int = 0,
+    ) -> None:
+        self.total_items = total_items
+        self.latency = latency
+        self.max_concurrent_requests = max_concurrent_requests
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.payload_size = payload_size
+        self.requests_served = 0
+        self.requests_throttled = 0
+        self.tokens_issued = 0
+        self.records_created = 0
+        self._tokens = set()
+        self._active = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), StandInHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stand_in = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def admit(self) -> Reply | None:
+        """
+        Counts the request and decides whether it is throttled or failed.
+
+        Returns None if the request should be routed; release() must then be
+        called once it is answered.
+        """
+        with self._lock:
+            self.requests_served += 1
+            limit = self.max_concurrent_requests
+            if limit is not None and self._active >= limit:
+                self.requests_throttled += 1
+                return (
+                    429,
+                    {"code": "TooManyRequests"},
+                    {"Retry-After": str(self.retry_after)},
+                )
+            self._active += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.error_rate and random.random() < self.error_rate:
+            self.release()
+            return 503, {"code": "ServiceUnavailable"}, {}
+        return None
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def expire_tokens(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+    def issue_token(self) -> Dict[str, Any]:
+        with self._lock:
+            self.tokens_issued += 1
+            token = f"stand-in-token-{self.tokens_issued}"
+            self._tokens.add(token)
+        return {
+            "accessToken": token,
+            "expiresAt": "2099-01-01T00:00:00.000Z",
+            "level": "company",
+        }
+
+    def route(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, List[str]],
+        body: bytes,
+        token: str | None = None,
+    ) -> Reply:
+        if path == "/v1/company/auth/getToken":
+            return 200, self.issue_token(), {}
+        if token not in self._tokens:
+            return 401, {"code": "Unauthorized"}, {}
+        if path == "/v1/company/auth/revokeToken":
+            with self._lock:
+                self._tokens.discard(token)
+            return 204, None, {}
+        user_id = ""
+        if path.startswith("/v1/company/users/"):
+            user_id = path.rsplit("/", 1)[1]
+        if method == "DELETE":
+            return 204, None, {}
+        if method == "POST" and user_id.isdigit():
+            # An update answers with the changed user
+            return 200, {**make_user(int(user_id)), **json.loads(body or b"{}")}, {}
+        if method == "POST":
+            with self._lock:
+                self.records_created += 1
+                record_id = 100000 + self.records_created
+            return 200, {"id": record_id}, {}
+
+        if path in LIST_ENDPOINTS:
+            return 200, self.list_page(path, query), {}
+        if path in CATALOG_ENDPOINTS:
+            return 200, CATALOG_ENDPOINTS[path], {}
+        if user_id.isdigit():
+            return 200, self.pad(make_user(int(user_id))), {}
+        return 404, {"code": "NotFound"}, {}
+
+    def list_page(self, path: str, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        key, factory = LIST_ENDPOINTS[path]
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", ["100"])[0])
+
+        # With a date range filter records are spread evenly over DATED_DAYS
+        first, last = 0, self.total_items
+        dates = query.get("date")
+        dated = bool(dates) and len(dates) == 2 and path in DATED_ENDPOINTS
+        if dated:
+            indexes = range(self.total_items)
+            first = bisect_left(indexes, dates[0], key=self.record_date)
+            last = bisect_right(indexes, dates[1], key=self.record_date)
+
+        indexes = range(first, last)
+        user_id = query.get("userId")
+        if user_id and path in USER_FILTERED_ENDPOINTS:
+            user_id = int(user_id[0])
+            indexes = [i for i in indexes if factory(i + 1)["userId"] == user_id]
+
+        items = []
+        for i in indexes[offset : offset + limit]:
+            item = factory(i + 1)
+            if dated:
+                item["date"] = self.record_date(i)
+            items.append(self.pad(item))
+        return {"stats": {"totalItems": len(indexes)}, key: items}
+
+    def record_date(self, index: int) -> str:
+        day = DATED_START + timedelta(days=index * DATED_DAYS // self.total_items)
+        return day.isoformat()
+
+    def pad(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        if self.payload_size:
+            record["description"] = "x" * self.payload_size
+        return record
@@ -0,0 +1,275 @@
+"""
+Benchmark suite for the client hot paths.
+
+Runs MoyklassApi with Payment, User and Lesson against the local stand-in
+server and measures single-call latency, pagination throughput, concurrency
+scaling, JSON decode cost and memory per record. Results are compared with
+the stored baseline (benchmarks/baseline.json); run with --save after an
+intended performance change and commit the updated baseline so the
+difference is visible in review.
+
+Usage:
+    python -m benchmarks.suite [--latency 0.005] [--payload 0] [--items 5000]
+                               [--only pagination,decode] [--save] [--check]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks.stand_in import StandInServer, make_lesson, make_payment
+from moyklass_api import models
+from moyklass_api.client import MoyklassApi
+from moyklass_api.codec import CODECS, get_codec
+from moyklass_api.lesson import Lesson
+from moyklass_api.payment import Payment
+from moyklass_api.user import User
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+
+# Metric name -> {"value": float, "unit": str, "better": "lower" | "higher"}
+Results = Dict[str, Dict[str, Any]]
+
+
+def record(results: Results, name: str, value: float, unit: str, better: str) -> None:
+    """
+    Stores a metric in the results and prints it.
+
+    Args:
+        results (Results): Results of the run.
+        name (str): Metric name, e.g. "pagination.iter_payments".
+        value (float): Measured value.
+        unit (str): Unit of the value.
+        better (str): "lower" or "higher", direction of an improvement.
+    """
+    results[name] = {"value": round(value, 3), "unit": unit, "better": better}
+    print(f"  {name:<45} {value:12.3f} {unit}")
+
+
+def bench_single_call(url: str, args: argparse.Namespace, results: Results) -> None:
+    with MoyklassApi("benchmark", base_url=url) as mc:
+        calls = {
+            "get_user": lambda: User(mc).get_user(42),
+            "get_payments": lambda: Payment(mc).get_payments(limit=10),
+        }
+        for name, call in calls.items():
+            call()
+            timings = []
+            for _ in range(args.calls):
+                start = time.perf_counter()
+                call()
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            p50 = statistics.median(timings)
+            record(results, f"single_call.{name}.p50", p50, "ms", "lower")
+            record(results, f"single_call.{name}.p95", p95, "ms", "lower")
+
+
+def bench_pagination(url: str, args: argparse.Namespace, results: Results) -> None:
+    with MoyklassApi("benchmark", base_url=url) as mc:
+        payments, lessons = Payment(mc), Lesson(mc)
+        year = ["2024-01-01", "2024-12-31"]
+        variants = {
+            "iter_payments": lambda: payments.iter_payments(),
+            "iter_payments.stream": lambda: payments.iter_payments(stream=True),
+            "iter_payments.as_model": lambda: payments.iter_payments(as_model=True),
+            "iter_lessons.include_records": lambda: lessons.iter_lessons(
+                include_records=True
+            ),
+            "iter_lessons_sharded.include_records": lambda: (
+                lessons.iter_lessons_sharded(date=year, include_records=True)
+            ),
+        }
+        for name, iterate in variants.items():
+            start = time.perf_counter()
+            count = sum(1 for _ in iterate())
+            elapsed = time.perf_counter() - start
+            record(results, f"pagination.{name}", count / elapsed, "items/s", "higher")
+
+
+def bench_concurrency(url: str, args: argparse.Namespace, results: Results) -> None:
+    with MoyklassApi("benchmark", base_url=url, pool_maxsize=16) as mc:
+        for workers in (1, 2, 4, 8):
+            start = time.perf_counter()
+            count = sum(
+                1 for _ in Payment(mc).iter_payments(limit=100, workers=workers)
+            )
+            elapsed = time.perf_counter() - start
+            record(
+                results,
+                f"concurrency.iter_payments.workers_{workers}",
+                count / elapsed,
+                "items/s",
+                "higher",
+            )
+
+
+def bench_decode(url: str, args: argparse.Namespace, results: Results) -> None:
+    page = {
+        "stats": {"totalItems": 500},
+        "lessons": [make_lesson(i + 1) for i in range(500)],
+    }
+    if args.payload:
+        for lesson in page["lessons"]:
+            lesson["description"] = "x" * args.payload
+    content = json.dumps(page).encode()
+    size_mb = len(content) / 1024 / 1024
+
+    for backend in CODECS:
+        try:
+            codec = get_codec(backend)
+        except ValueError:
+            continue
+        rounds = max(1, int(10 / max(size_mb, 0.05)))
+        codec.loads(content)
+        # Best of several repeats without the garbage collector pauses
+        elapsed = float("inf")
+        gc.disable()
+        try:
+            for _ in range(5):
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    codec.loads(content)
+                elapsed = min(elapsed, time.perf_counter() - start)
+        finally:
+            gc.enable()
+        throughput = size_mb * rounds / elapsed
+        record(results, f"decode.{backend}", throughput, "MB/s", "higher")
+
+
+def _traced_size(build: Callable[[], List[Any]]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    records = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def bench_memory(url: str, args: argparse.Namespace, results: Results) -> None:
+    count = args.items
+    for name, factory, model in (
+        ("payment", make_payment, models.Payment),
+        ("lesson", make_lesson, models.Lesson),
+    ):
+        payload = json.dumps([factory(i + 1) for i in range(count)])
+        as_dict = _traced_size(lambda: json.loads(payload))
+        as_model = _traced_size(
+            lambda: [model.from_dict(item) for item in json.loads(payload)]
+        )
+        record(results, f"memory.{name}.dict", as_dict / count, "B/record", "lower")
+        record(results, f"memory.{name}.model", as_model / count, "B/record", "lower")
+
+
+BENCHMARKS = {
+    "single_call": bench_single_call,
+    "pagination": bench_pagination,
+    "concurrency": bench_concurrency,
+    "decode": bench_decode,
+    "memory": bench_memory,
+}
+
+
+def compare(results: Results, baseline: Results, threshold: float) -> List[str]:
+    """
+    Prints the change of every metric against the baseline.
+
+    Returns:
+        List[str]: Names of the metrics that got worse by more than threshold.
+    """
+    regressions = []
+    print(f"\n{'metric':<47} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        change = current["value"] / base["value"] - 1
+        worse = -change if current["better"] == "higher" else change
+        flag = ""
+        if worse > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:<47} {base['value']:12.3f} {current['value']:12.3f} "
+            f"{change:+8.1%}{flag}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--payload", type=int, default=0)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--only", default=",".join(BENCHMARKS))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument(
+        "--save", action="store_true", help="store results as the baseline"
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="exit with 1 on regressions"
+    )
+    args = parser.parse_args()
+
+    config = {
+        "latency": args.latency,
+        "payload": args.payload,
+        "items": args.items,
+        "calls": args.calls,
+    }
+    results: Results = {}
+    with StandInServer(
+        total_items=args.items, latency=args.latency, payload_size=args.payload
+    ) as server:
+        for name in args.only.split(","):
+            print(name)
+            BENCHMARKS[name](server.url, args, results)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    regressions = []
+    if baseline is not None:
+        if baseline["config"] != config:
+            print(f"\nBaseline was recorded with {baseline['config']}, not comparable")
+        else:
+            regressions = compare(results, baseline["results"], args.threshold)
+
+    if args.save:
+        stored = {}
+        if baseline is not None and baseline["config"] == config:
+            stored = baseline["results"]
+        stored.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "config": config,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": stored,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
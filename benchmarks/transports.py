@@ -0,0 +1,63 @@
+"""
+Compares requests/sec of the transports: requests session, urllib3 pool and
+a cassette recorded from the stand-in server and replayed without network.
+
+Usage:
+    python -m benchmarks.transports [--requests 1000] [--latency 0] [--replay-latency 0]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.stand_in import StandInServer
+from moyklass_api.client import MoyklassApi
+from moyklass_api.payment import Payment
+from moyklass_api.transport import (
+    CassetteTransport,
+    RequestsTransport,
+    Transport,
+    Urllib3Transport,
+)
+
+
+def run(url: str, transport: Transport, count: int) -> float:
+    with MoyklassApi("benchmark", base_url=url, transport=transport) as mc:
+        payment = Payment(mc)
+        start = time.perf_counter()
+        for _ in range(count):
+            payment.get_payments(limit=10)
+        return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--replay-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "payments.json")
+        with StandInServer(latency=args.latency) as server:
+            results = {
+                "RequestsTransport": run(
+                    server.url, RequestsTransport(), args.requests
+                ),
+                "Urllib3Transport": run(server.url, Urllib3Transport(), args.requests),
+            }
+            run(server.url, CassetteTransport(path, mode="record"), 1)
+
+        # The server is stopped, every response comes from the cassette
+        cassette = CassetteTransport(path, latency=args.replay_latency)
+        results["CassetteTransport"] = run(
+            "http://offline.invalid", cassette, args.requests
+        )
+
+    baseline = results["RequestsTransport"]
+    for name, rate in results.items():
+        print(f"{name:<18} {rate:10.1f} req/s  x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from moyklass_api.auth import TokenManager
+from moyklass_api.cache import EntityCache, ResponseCache
+from moyklass_api.changes import ChangeTracker
+from moyklass_api.client import (
+    AUTH_PATH_PREFIX,
+    DEFAULT_THROTTLE_DELAY,
+    DEFAULT_THROTTLE_RETRIES,
+    MoyklassApiException,
+)
+from moyklass_api.codec import JsonCodec, get_codec
+from moyklass_api.concurrency import AsyncSingleFlight
+from moyklass_api.log import RequestLog, logger
+from moyklass_api.metrics import RequestEvent, RequestHook, fire_after, fire_before
+from moyklass_api.ratelimit import RateLimiter, parse_retry_after
+from moyklass_api.retry import RetryPolicy
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_CONCURRENCY = 20
+
+
+def encode_params(params: Dict[str, Any] | None) -> List[Tuple[str, str]] | None:
+    """
+    Converts query parameters to the flat form accepted by aiohttp.
+
+    List values are sent as repeated keys, the same way requests does it.
+
+    Args:
+        params (Dict[str, Any], optional): Query parameters.
+
+    Returns:
+        List[Tuple[str, str]]: Flat list of query parameters.
+    """
+    if params is None:
+        return None
+
+    encoded = []
+    for key, value in params.items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for v in values:
+            if v is not None:
+                encoded.append((key, str(v)))
+    return encoded
+
+
+class AsyncMoyklassApi:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.moyklass.com",
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_connections_per_host: int = 0,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        keep_alive: bool = True,
+        timeout: float | None = None,
+        session: "aiohttp.ClientSession | None" = None,
+        rate_limit: float | None = None,
+        burst: int = 1,
+        max_throttle_retries: int = DEFAULT_THROTTLE_RETRIES,
+        retry_policy: RetryPolicy | None = None,
+        token_manager: TokenManager | None = None,
+        response_cache: ResponseCache | None = None,
+        change_tracker: ChangeTracker | None = None,
+        entity_cache: EntityCache | None = None,
+        codec: JsonCodec | None = None,
+        hooks: Iterable[RequestHook] | None = None,
+        request_log: RequestLog | None = None,
+    ) -> None:
+        """
+        Initializes the AsyncMoyklassApi instance.
+
+        The HTTP session is created on first use inside the running event loop
+        and is shared by all async resource classes created with this instance.
+
+        Args:
+            api_key (str): API key for authentication.
+            base_url (str, optional): Base URL for the Moyklass API. Defaults to "https://api.moyklass.com".
+            max_connections (int, optional): Total number of simultaneous connections. Defaults to 100.
+            max_connections_per_host (int, optional): Number of simultaneous connections per host, 0 means no limit. Defaults to 0.
+            max_concurrency (int, optional): Maximum number of requests in flight at the same time. Defaults to 20.
+            keep_alive (bool, optional): Keep connections open between requests. Defaults to True.
+            timeout (float, optional): Total timeout of a request in seconds. Defaults to None.
+            session (aiohttp.ClientSession, optional): Preconfigured session to use instead of creating a new one,
+                left open by close(). Defaults to None.
+            rate_limit (float, optional): Maximum number of requests per second. Defaults to None (no limit).
+            burst (int, optional): Number of requests that may be sent at once when rate_limit is set. Defaults to 1.
+            max_throttle_retries (int, optional): How many times a request answered with 429 is repeated. Defaults to 5.
+            retry_policy (RetryPolicy, optional): Policy for repeating requests after transient errors. Defaults to RetryPolicy().
+            token_manager (TokenManager, optional): Cache of the access token, may be shared between clients. Defaults to TokenManager().
+            response_cache (ResponseCache, optional): Cache of catalog responses. Defaults to None (no caching).
+            change_tracker (ChangeTracker, optional): Known server state of users, lets update_user skip or shrink writes. Defaults to None.
+            entity_cache (EntityCache, optional): Identity map of users and user subscriptions filled by reads and writes. Defaults to None.
+            codec (JsonCodec, optional): JSON codec for responses and request bodies. Defaults to the fastest installed backend.
+            hooks (Iterable[RequestHook], optional): Hooks called before and after every request, e.g. MetricsCollector. Defaults to None.
+            request_log (RequestLog, optional): Debug logging of requests and responses. Defaults to RequestLog().
+        """
+        if aiohttp is None:
+            raise MoyklassApiException(
+                "aiohttp is required for AsyncMoyklassApi, install moyklass-api[async]"
+            )
+
+        self.base_url = base_url
+        self.api_key = api_key
+        self._owns_token_manager = token_manager is None
+        self.token_manager = (
+            token_manager if token_manager is not None else TokenManager()
+        )
+        self.token_manager.bind(api_key)
+
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.session = session
+        # Only a session created by the client is closed by close()
+        self._owns_session = session is None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.rate_limiter = (
+            RateLimiter(rate_limit, burst) if rate_limit is not None else None
+        )
+        self.max_throttle_retries = max_throttle_retries
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+
+        self.response_cache = response_cache
+        if response_cache is not None:
+            response_cache.bind(api_key)
+        self.change_tracker = change_tracker
+        self.entity_cache = entity_cache
+        self.codec = codec if codec is not None else get_codec()
+        self.hooks = list(hooks) if hooks is not None else []
+        self.request_log = request_log if request_log is not None else RequestLog()
+
+        self.single_flight = AsyncSingleFlight()
+
+    def _create_session(self) -> "aiohttp.ClientSession":
+        """
+        Creates an HTTP session with a shared connection pool.
+
+        Returns:
+            aiohttp.ClientSession: Configured session.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            force_close=not self.keep_alive,
+        )
+        return aiohttp.ClientSession(
+            connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+    async def close(self) -> None:
+        """
+        Closes the HTTP session and all pooled connections.
+
+        A session passed to the constructor is left open for its owner to close.
+        """
+        if self.session is not None and self._owns_session:
+            await self.session.close()
+            self.session = None
+
+    @property
+    def token(self) -> str | None:
+        """
+        Current access token.
+        """
+        return self.token_manager.token
+
+    @token.setter
+    def token(self, value: str | None) -> None:
+        self.token_manager.token = value
+        self.token_manager.expires_at = None
+
+    async def set_token(self, force: bool = False) -> None:
+        """
+        Obtains and sets the authentication token.
+
+        A cached token that has not expired yet is reused without calling the API.
+
+        Args:
+            force (bool, optional): Request a new token even if the cached one is valid. Defaults to False.
+        """
+        await self.token_manager.aget(self._fetch_token, force=force)
+
+    async def _fetch_token(self) -> Dict[str, Any]:
+        """
+        Requests a new authentication token.
+
+        Returns:
+            Dict[str, Any]: Response with accessToken and expiresAt.
+        """
+        data = {"apiKey": self.api_key}
+        return await self._make_request(
+            "POST", f"{AUTH_PATH_PREFIX}getToken", data=data, idempotent=True
+        )
+
+    async def revoke_token(self) -> None:
+        """
+        Revokes the authentication token.
+        """
+        await self._make_request(
+            "POST", f"{AUTH_PATH_PREFIX}revokeToken", idempotent=True
+        )
+        self.token_manager.clear()
+
+    async def _make_request(
+        self,
+        method: str,
+        path: str,
+        data: Dict[str, Any] | None = None,
+        params: Dict[str, Any] | None = None,
+        idempotent: bool = False,
+        transform: Callable[[Any], Any] | None = None,
+    ) -> Any:
+        """
+        Makes a request to the Moyklass API.
+
+        Args:
+            method (str): HTTP method (e.g., "GET", "POST").
+            path (str): API endpoint path.
+            data (Dict[str, Any], optional): Request body data. Defaults to None.
+            params (Dict[str, Any], optional): Query parameters. Defaults to None.
+            idempotent (bool, optional): The request may be repeated regardless of its method. Defaults to False.
+            transform (Callable[[Any], Any], optional): Function applied to the decoded JSON, e.g. to build typed models. Defaults to None.
+
+        Returns:
+            Any: Response data, transformed if transform is given, or response text if JSON decoding fails.
+        """
+        if self.session is None:
+            self.session = self._create_session()
+
+        url = f"{self.base_url}/{path}"
+
+        cache_ttl = None
+        if self.response_cache is not None:
+            cache_ttl = self.response_cache.ttl_for(method, path)
+            if cache_ttl is not None:
+                cached = self.response_cache.get(path, params)
+                if cached is not None:
+                    logger.debug("Using cached response for %s %s", method, url)
+                    return self.codec.decode(cached, transform)
+
+        started = time.perf_counter()
+        token = self.token
+        headers = None
+        if token is not None:
+            headers = dict()
+            headers["x-access-token"] = token
+
+        self.request_log.request(method, url, headers, params, data)
+        event = None
+        if self.hooks:
+            event = RequestEvent(method, path)
+            fire_before(self.hooks, event)
+        try:
+            r, content = await self._send_with_retries(
+                method,
+                path,
+                url,
+                headers=headers,
+                data=data,
+                params=params,
+                idempotent=idempotent,
+                event=event,
+            )
+            if r.status == 401 and not path.startswith(AUTH_PATH_PREFIX):
+                if event is not None:
+                    event.retries += 1
+                # Without a token, e.g. after another client revoked a shared one,
+                # a new one is requested instead of failing for good
+                headers = dict(headers or ())
+                headers["x-access-token"] = (
+                    await self.token_manager.aget(self._fetch_token)
+                    if token is None
+                    else await self.token_manager.arefresh(token, self._fetch_token)
+                )
+                r, content = await self._send_with_retries(
+                    method,
+                    path,
+                    url,
+                    headers=headers,
+                    data=data,
+                    params=params,
+                    idempotent=idempotent,
+                    event=event,
+                )
+            r.raise_for_status()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            error = self._wrap_error(err)
+            self._finish_event(event, error.status_code, error=error)
+            raise error
+
+        self.request_log.response(
+            method, url, r.status, content, time.perf_counter() - started
+        )
+        self._finish_event(event, r.status, len(content))
+
+        try:
+            response_data = self.codec.loads(content)
+        except ValueError:
+            return content.decode(r.get_encoding() if content else "utf-8")
+        if cache_ttl is not None:
+            self.response_cache.set(path, params, content, cache_ttl)
+
+        # Errors of transform are not decoding errors and are raised as is
+        return transform(response_data) if transform is not None else response_data
+
+    @staticmethod
+    def _wrap_error(err: Exception) -> MoyklassApiException:
+        """
+        Converts an aiohttp error to MoyklassApiException.
+
+        Args:
+            err (Exception): aiohttp error or timeout.
+
+        Returns:
+            MoyklassApiException: Exception to raise.
+        """
+        if isinstance(err, aiohttp.TooManyRedirects):
+            return MoyklassApiException(f"Too many redirects: {err}")
+        if isinstance(err, aiohttp.ClientResponseError):
+            return MoyklassApiException(
+                f"HTTPError occurred: {err}", status_code=err.status
+            )
+        if isinstance(err, asyncio.TimeoutError):
+            return MoyklassApiException(f"Timeout error: {err}")
+        if isinstance(err, aiohttp.ClientConnectionError):
+            return MoyklassApiException(f"Connection is lost, try again later: {err}")
+        return MoyklassApiException(f"Some error occurred: {err}")
+
+    def _finish_event(
+        self,
+        event: RequestEvent | None,
+        status: int | None,
+        bytes_in: int = 0,
+        error: Exception | None = None,
+    ) -> None:
+        """
+        Completes the event of a request and calls after_request of the hooks.
+
+        Args:
+            event (RequestEvent, optional): Event of the request, None if there are no hooks.
+            status (int, optional): HTTP status of the response.
+            bytes_in (int, optional): Size of the response body. Defaults to 0.
+            error (Exception, optional): Error the request failed with. Defaults to None.
+        """
+        if event is None:
+            return
+        event.status = status
+        event.bytes_in = bytes_in
+        event.error = error
+        fire_after(self.hooks, event)
+
+    def _stream_request(self, method: str, path: str, items_key: str, **kwargs: Any):
+        """
+        Streamed list responses are supported only by MoyklassApi.
+
+        Raises:
+            MoyklassApiException: Always.
+        """
+        raise MoyklassApiException(
+            "stream=True is not supported by AsyncMoyklassApi, use MoyklassApi"
+        )
+
+    async def _send_with_retries(
+        self,
+        method: str,
+        path: str,
+        url: str,
+        headers: Dict[str, str] | None = None,
+        data: Dict[str, Any] | None = None,
+        params: Dict[str, Any] | None = None,
+        idempotent: bool = False,
+        event: RequestEvent | None = None,
+    ) -> Tuple["aiohttp.ClientResponse", bytes]:
+        """
+        Sends the request repeating it after transient errors according to the retry policy.
+
+        Args:
+            method (str): HTTP method (e.g., "GET", "POST").
+            path (str): API endpoint path.
+            url (str): Full request URL.
+            headers (Dict[str, str], optional): Request headers. Defaults to None.
+            data (Dict[str, Any], optional): Request body data. Defaults to None.
+            params (Dict[str, Any], optional): Query parameters. Defaults to None.
+            idempotent (bool, optional): The request may be repeated regardless of its method. Defaults to False.
+            event (RequestEvent, optional): Event of the request updated with retries and waits. Defaults to None.
+
+        Returns:
+            Tuple[aiohttp.ClientResponse, bytes]: Last received response and its body.
+        """
+        policy = self.retry_policy
+        retry_exceptions = policy.retry_exceptions or (
+            aiohttp.ClientConnectionError,
+            asyncio.TimeoutError,
+        )
+
+        body = None
+        if data is not None:
+            body = self.codec.dumps(data)
+            headers = dict(headers or {})
+            headers["Content-Type"] = "application/json"
+            if event is not None:
+                event.bytes_out = len(body)
+
+        attempt = 1
+        while True:
+            try:
+                r, content = await self._send(
+                    method,
+                    url,
+                    headers=headers,
+                    body=body,
+                    params=params,
+                    event=event,
+                )
+            except retry_exceptions as err:
+                safe = idempotent or isinstance(err, aiohttp.ClientConnectorError)
+                if not policy.should_retry(attempt, method, path, data, safe):
+                    raise
+                reason = repr(err)
+            else:
+                if r.status not in policy.retry_statuses:
+                    return r, content
+                if not policy.should_retry(attempt, method, path, data, idempotent):
+                    return r, content
+                reason = f"status {r.status}"
+
+            delay = policy.backoff(attempt)
+            logger.debug(
+                "%s %s failed with %s, retrying in %.2fs (attempt %s)",
+                method,
+                url,
+                reason,
+                delay,
+                attempt,
+            )
+            policy.stats.record_retry(delay)
+            if event is not None:
+                event.retries += 1
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] | None = None,
+        body: bytes | None = None,
+        params: Dict[str, Any] | None = None,
+        event: RequestEvent | None = None,
+    ) -> Tuple["aiohttp.ClientResponse", bytes]:
+        """
+        Sends the request respecting the rate limit and repeats it while the server answers 429.
+
+        Args:
+            method (str): HTTP method (e.g., "GET", "POST").
+            url (str): Full request URL.
+            headers (Dict[str, str], optional): Request headers. Defaults to None.
+            body (bytes, optional): Encoded request body. Defaults to None.
+            params (Dict[str, Any], optional): Query parameters. Defaults to None.
+            event (RequestEvent, optional): Event of the request updated with retries and waits. Defaults to None.
+
+        Returns:
+            Tuple[aiohttp.ClientResponse, bytes]: Last received response and its body.
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve()
+                if event is not None:
+                    event.rate_limit_wait += wait
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            async with self._semaphore:
+                async with self.session.request(
+                    method,
+                    url,
+                    headers=headers,
+                    data=body,
+                    params=encode_params(params),
+                ) as r:
+                    content = await r.read()
+
+            if r.status != 429 or attempt >= self.max_throttle_retries:
+                break
+
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            if retry_after is None:
+                retry_after = DEFAULT_THROTTLE_DELAY * 2**attempt
+            attempt += 1
+
+            logger.debug(
+                "Too many requests, retrying in %ss (attempt %s)", retry_after, attempt
+            )
+            if event is not None:
+                event.retries += 1
+            if self.rate_limiter is not None:
+                self.rate_limiter.throttle(retry_after)
+            else:
+                if event is not None:
+                    event.rate_limit_wait += retry_after
+                await asyncio.sleep(retry_after)
+
+        if self.rate_limiter is not None and r.status != 429:
+            self.rate_limiter.recover()
+
+        return r, content
+
+    async def __aenter__(self) -> "AsyncMoyklassApi":
+        """
+        Sets the authentication token when entering an async context manager block.
+
+        Returns:
+            AsyncMoyklassApi: The current instance.
+        """
+        await self.set_token()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """
+        Revokes the authentication token and closes pooled connections when exiting an async context manager block.
+
+        A token shared through TokenManager.token_file or a TokenManager passed
+        to the constructor is kept for other processes and clients.
+        """
+        try:
+            if self.token_manager.revokes_on_exit(self._owns_token_manager):
+                await self.revoke_token()
+        finally:
+            await self.close()
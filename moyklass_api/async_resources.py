@@ -0,0 +1,268 @@
+"""
+Asynchronous counterparts of the resource classes.
+
+Every method takes the same arguments as the method of the synchronous class
+and returns an awaitable with the same result, e.g.::
+
+    async with AsyncMoyklassApi(api_key) as mc:
+        payments = await AsyncPayment(mc).get_payments(date=["2024-01-24", "2024-01-24"])
+
+The iter_* methods are asynchronous generators::
+
+    async for payment in AsyncPayment(mc).iter_payments(date=["2024-01-24", "2024-01-24"]):
+        ...
+
+Methods of the synchronous classes that run their requests in a thread pool
+(bulk writes, sharded exports) are not available and raise TypeError; use them with
+MoyklassApi.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List
+
+from moyklass_api.async_client import AsyncMoyklassApi
+from moyklass_api.changes import ChangeTracker
+from moyklass_api.client import MoyklassApiException
+from moyklass_api.contacts import ContactIndex
+from moyklass_api.group import Group
+from moyklass_api.lesson import Lesson
+from moyklass_api.pagination import MAX_PAGE_SIZE, aiter_pages
+from moyklass_api.payment import Payment
+from moyklass_api.subscription import Subscription
+from moyklass_api.task import Task
+from moyklass_api.user import (
+    FAN_OUT,
+    SCAN,
+    User,
+    cheaper_strategy,
+    subscription_owner,
+    subscription_probe_filters,
+    subscription_scan_filters,
+)
+
+
+def _sync_only(name: str) -> Callable[..., Any]:
+    """
+    Builds a method that replaces a synchronous method relying on threads and raises TypeError.
+    """
+
+    def method(self: Any, *args: Any, **kwargs: Any) -> Any:
+        raise TypeError(
+            f"{type(self).__name__}.{name} is not supported by AsyncMoyklassApi, "
+            "call it on the synchronous class with MoyklassApi"
+        )
+
+    method.__name__ = name
+    return method
+
+
+class AsyncUser(User):
+    # ContactIndex.claim blocks the calling thread while another row creates the same contact
+    upsert_users = _sync_only("upsert_users")
+
+    def __init__(self, client: "AsyncMoyklassApi") -> None:
+        self.client = client
+
+    async def build_contact_index(self) -> ContactIndex:
+        """
+        Asynchronous version of User.build_contact_index.
+        """
+        index = ContactIndex()
+        async for user in self.iter_users():
+            index.add(user)
+        return index
+
+    async def get_user(self, user_id: int, as_model: bool = False) -> Dict[str, Any]:
+        """
+        Asynchronous version of User.get_user.
+        """
+        user = self._cached_user(user_id, as_model)
+        if user is not None:
+            return user
+        return await self._request_user(user_id, as_model)
+
+    async def get_users_by_ids(
+        self, user_ids: Iterable[int]
+    ) -> Dict[int, Dict[str, Any] | MoyklassApiException]:
+        """
+        Asynchronous version of User.get_users_by_ids.
+
+        Concurrency is bounded by max_concurrency of the client.
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+
+        async def load(user_id: int) -> Dict[str, Any] | MoyklassApiException:
+            try:
+                return await self.client.single_flight.do(
+                    ("users", user_id), lambda: self.get_user(user_id)
+                )
+            except MoyklassApiException as err:
+                return err
+
+        results = await asyncio.gather(*(load(user_id) for user_id in unique_ids))
+        return dict(zip(unique_ids, results))
+
+    async def _update_tracked(
+        self, user_id: int, data: Dict[str, Any], tracker: ChangeTracker
+    ) -> Dict[str, Any] | None:
+        """
+        Asynchronous version of User._update_tracked.
+        """
+        changed = tracker.changes(user_id, data)
+        if changed is None:
+            return None
+        response = await self.client._make_request(
+            "POST",
+            f"v1/company/users/{user_id}",
+            data=changed,
+            transform=self._observe("users", entity_id=user_id),
+        )
+        tracker.record(user_id, changed)
+        return response
+
+    async def delete_user(self, user_id: int) -> Any:
+        """
+        Asynchronous version of User.delete_user.
+        """
+        response = await self.client._make_request(
+            "DELETE", f"v1/company/users/{user_id}"
+        )
+        self._forget_user(user_id)
+        return response
+
+    def iter_users(
+        self, limit: int = MAX_PAGE_SIZE, **filters: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Asynchronous version of User.iter_users.
+        """
+        offset = filters.pop("offset", 0)
+
+        def fetch(offset: int, limit: int):
+            return self.get_users(offset=offset, limit=limit, **filters)
+
+        return aiter_pages(fetch, "users", offset=offset, limit=limit)
+
+    def iter_user_subscriptions(
+        self, limit: int = MAX_PAGE_SIZE, **filters: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Asynchronous version of User.iter_user_subscriptions.
+        """
+        offset = filters.pop("offset", 0)
+
+        def fetch(offset: int, limit: int):
+            return self.get_user_subscriptions(offset=offset, limit=limit, **filters)
+
+        return aiter_pages(fetch, "subscriptions", offset=offset, limit=limit)
+
+    async def plan_user_subscriptions(
+        self, user_ids: Iterable[int], limit: int = MAX_PAGE_SIZE, **filters: Any
+    ) -> str:
+        """
+        Asynchronous version of User.plan_user_subscriptions.
+        """
+        count = len(set(user_ids))
+        if count <= 2:
+            return FAN_OUT
+        page = await self.get_user_subscriptions(**subscription_probe_filters(filters))
+        return cheaper_strategy(page, count, limit)
+
+    async def get_user_subscriptions_for_users(
+        self,
+        user_ids: Iterable[int],
+        limit: int = MAX_PAGE_SIZE,
+        strategy: str | None = None,
+        **filters: Any,
+    ) -> Dict[int, List[Any] | MoyklassApiException]:
+        """
+        Asynchronous version of User.get_user_subscriptions_for_users.
+
+        Concurrency is bounded by max_concurrency of the client.
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+        if not unique_ids:
+            return {}
+        if strategy is None:
+            strategy = await self.plan_user_subscriptions(unique_ids, limit, **filters)
+        if strategy not in (FAN_OUT, SCAN):
+            raise ValueError(f"Unknown strategy {strategy!r}")
+
+        if strategy == SCAN:
+            result = {user_id: [] for user_id in unique_ids}
+            subscriptions = self.iter_user_subscriptions(
+                limit=limit, **subscription_scan_filters(filters)
+            )
+            async for subscription in subscriptions:
+                owner = subscription_owner(subscription)
+                if owner in result:
+                    result[owner].append(subscription)
+            return result
+
+        async def load(user_id: int) -> List[Any] | MoyklassApiException:
+            try:
+                subscriptions = self.iter_user_subscriptions(
+                    user_id=user_id, limit=limit, **filters
+                )
+                return [subscription async for subscription in subscriptions]
+            except MoyklassApiException as err:
+                return err
+
+        results = await asyncio.gather(*(load(user_id) for user_id in unique_ids))
+        return dict(zip(unique_ids, results))
+
+
+class AsyncPayment(Payment):
+    create_payments_bulk = _sync_only("create_payments_bulk")
+    _find_payment = _sync_only("_find_payment")
+    iter_payments_sharded = _sync_only("iter_payments_sharded")
+
+    def __init__(self, client: "AsyncMoyklassApi") -> None:
+        self.client = client
+
+    def iter_payments(
+        self, limit: int = MAX_PAGE_SIZE, **filters: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Asynchronous version of Payment.iter_payments.
+        """
+        offset = filters.pop("offset", 0)
+
+        def fetch(offset: int, limit: int):
+            return self.get_payments(offset=offset, limit=limit, **filters)
+
+        return aiter_pages(fetch, "payments", offset=offset, limit=limit)
+
+
+class AsyncLesson(Lesson):
+    iter_lessons_sharded = _sync_only("iter_lessons_sharded")
+
+    def __init__(self, client: "AsyncMoyklassApi") -> None:
+        self.client = client
+
+    def iter_lessons(
+        self, limit: int = MAX_PAGE_SIZE, **filters: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Asynchronous version of Lesson.iter_lessons.
+        """
+        offset = filters.pop("offset", 0)
+
+        def fetch(offset: int, limit: int):
+            return self.get_lessons(offset=offset, limit=limit, **filters)
+
+        return aiter_pages(fetch, "lessons", offset=offset, limit=limit)
+
+
+class AsyncGroup(Group):
+    def __init__(self, client: "AsyncMoyklassApi") -> None:
+        self.client = client
+
+
+class AsyncSubscription(Subscription):
+    def __init__(self, client: "AsyncMoyklassApi") -> None:
+        self.client = client
+
+
+class AsyncTask(Task):
+    def __init__(self, client: "AsyncMoyklassApi") -> None:
+        self.client = client
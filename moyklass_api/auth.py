@@ -0,0 +1,257 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict
+
+from moyklass_api.log import logger
+
+DEFAULT_REFRESH_MARGIN = 60.0
+
+TokenFetcher = Callable[[], Dict[str, Any]]
+AsyncTokenFetcher = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+def _parse_expires_at(value: str | None) -> float | None:
+    """
+    Converts the expiresAt field of the getToken response to a UNIX timestamp.
+
+    Args:
+        value (str, optional): ISO 8601 date, e.g. "2024-01-24T10:00:00.000Z".
+
+    Returns:
+        float: UNIX timestamp or None if the value is absent or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class TokenManager:
+    def __init__(
+        self,
+        token_file: str | None = None,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        revoke_on_exit: bool | None = None,
+    ) -> None:
+        """
+        Thread-safe cache of the access token.
+
+        The token is requested once and reused until it expires. With
+        token_file the token is also stored on disk, so other processes using
+        the same API key pick it up instead of requesting their own. When
+        several threads get 401 with the same token, only the first one
+        requests a new token and the others reuse it.
+
+        Args:
+            token_file (str, optional): Path of a JSON file to share the token between processes. Defaults to None.
+            refresh_margin (float, optional): Number of seconds before expiry when the token is considered expired. Defaults to 60.
+            revoke_on_exit (bool, optional): Revoke the token when the client context manager exits. Defaults to None:
+                only a client that created the manager itself revokes the token, and only without token_file.
+        """
+        self.token_file = token_file
+        self.refresh_margin = refresh_margin
+        self.revoke_on_exit = revoke_on_exit
+
+        self.token = None
+        self.expires_at = None
+        self.refreshes = 0
+
+        self._key = None
+        self._lock = threading.Lock()
+        self._async_lock = None
+
+    def bind(self, api_key: str) -> None:
+        """
+        Binds the manager to an API key, so tokens of other companies stored in token_file are ignored.
+
+        Args:
+            api_key (str): API key of the client.
+        """
+        self._key = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+    def revokes_on_exit(self, owner: bool) -> bool:
+        """
+        Decides whether a client leaving its context manager revokes the token.
+
+        A manager passed to a client may be shared with other clients, which
+        would keep sending the revoked token, so by default only the client
+        that created the manager revokes it.
+
+        Args:
+            owner (bool): The client created the manager itself.
+
+        Returns:
+            bool: revoke_on_exit if it was given, otherwise True for an owned manager without token_file.
+        """
+        if self.revoke_on_exit is not None:
+            return self.revoke_on_exit
+        return owner and self.token_file is None
+
+    def is_valid(self) -> bool:
+        """
+        Checks whether the cached token may still be used.
+
+        Returns:
+            bool: True if there is a token that does not expire within refresh_margin.
+        """
+        if self.token is None:
+            return False
+        if self.expires_at is None:
+            return True
+        return time.time() < self.expires_at - self.refresh_margin
+
+    def set(self, response: Dict[str, Any]) -> str:
+        """
+        Stores the getToken response.
+
+        Args:
+            response (Dict[str, Any]): Response of v1/company/auth/getToken.
+
+        Returns:
+            str: Access token.
+        """
+        self.token = response["accessToken"]
+        self.expires_at = _parse_expires_at(response.get("expiresAt"))
+        self._save()
+        return self.token
+
+    def clear(self) -> None:
+        """
+        Forgets the cached token and removes it from token_file.
+        """
+        self.token = None
+        self.expires_at = None
+        if self.token_file is not None:
+            try:
+                os.remove(self.token_file)
+            except FileNotFoundError:
+                pass
+
+    def get(self, fetch: TokenFetcher, force: bool = False) -> str:
+        """
+        Returns a valid token, requesting a new one if needed.
+
+        Args:
+            fetch (TokenFetcher): Function calling getToken.
+            force (bool, optional): Request a new token even if the cached one is valid. Defaults to False.
+
+        Returns:
+            str: Access token.
+        """
+        if not force and self.is_valid():
+            return self.token
+
+        with self._lock:
+            if not force and (self.is_valid() or self._load()):
+                return self.token
+            return self.set(fetch())
+
+    def refresh(self, stale_token: str | None, fetch: TokenFetcher) -> str:
+        """
+        Replaces a token rejected by the server.
+
+        If another thread has already replaced stale_token, its new token is
+        returned without calling getToken again.
+
+        Args:
+            stale_token (str, optional): Token the request was sent with.
+            fetch (TokenFetcher): Function calling getToken.
+
+        Returns:
+            str: Access token.
+        """
+        with self._lock:
+            if self.token is not None and self.token != stale_token:
+                return self.token
+            if self._load() and self.token != stale_token:
+                return self.token
+            logger.debug("Access token was rejected, requesting a new one")
+            self.refreshes += 1
+            return self.set(fetch())
+
+    async def aget(self, fetch: AsyncTokenFetcher, force: bool = False) -> str:
+        """
+        Asynchronous version of get.
+        """
+        if not force and self.is_valid():
+            return self.token
+
+        async with self._get_async_lock():
+            if not force and (self.is_valid() or self._load()):
+                return self.token
+            return self.set(await fetch())
+
+    async def arefresh(self, stale_token: str | None, fetch: AsyncTokenFetcher) -> str:
+        """
+        Asynchronous version of refresh.
+        """
+        async with self._get_async_lock():
+            if self.token is not None and self.token != stale_token:
+                return self.token
+            if self._load() and self.token != stale_token:
+                return self.token
+            logger.debug("Access token was rejected, requesting a new one")
+            self.refreshes += 1
+            return self.set(await fetch())
+
+    def _get_async_lock(self) -> asyncio.Lock:
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        return self._async_lock
+
+    def _load(self) -> bool:
+        """
+        Loads the token from token_file.
+
+        Returns:
+            bool: True if a valid token of the bound API key was loaded.
+        """
+        if self.token_file is None:
+            return False
+
+        try:
+            with open(self.token_file, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if stored.get("key") != self._key:
+            return False
+
+        self.token = stored.get("accessToken")
+        self.expires_at = stored.get("expiresAt")
+        return self.is_valid()
+
+    def _save(self) -> None:
+        """
+        Atomically writes the token to token_file.
+        """
+        if self.token_file is None:
+            return
+
+        stored = {
+            "key": self._key,
+            "accessToken": self.token,
+            "expiresAt": self.expires_at,
+        }
+        directory = os.path.dirname(os.path.abspath(self.token_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".moyklass-token-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(stored, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.token_file)
+        except OSError as err:
+            logger.debug("Could not store the access token: %s", err)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Set
+
+
+class BulkStatus(Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    UNCHANGED = "unchanged"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
+@dataclass
+class BulkRowResult:
+    index: int
+    key: str | None
+    status: BulkStatus
+    record_id: int | None = None
+    error: str | None = None
+
+
+@dataclass
+class BulkReport:
+    rows: List[BulkRowResult] = field(default_factory=list)
+
+    def by_status(self, status: BulkStatus) -> List[BulkRowResult]:
+        """
+        Returns the rows with the given status.
+
+        Args:
+            status (BulkStatus): Row status.
+
+        Returns:
+            List[BulkRowResult]: Matching rows ordered by input index.
+        """
+        return [row for row in self.rows if row.status is status]
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Counts the rows by status.
+
+        Returns:
+            Dict[str, int]: Status value -> number of rows.
+        """
+        counts = {status.value: 0 for status in BulkStatus}
+        for row in self.rows:
+            counts[row.status.value] += 1
+        return counts
+
+
+def fingerprint(spec: Dict[str, Any]) -> str:
+    """
+    Builds a stable key of a row from its content.
+
+    Args:
+        spec (Dict[str, Any]): Row of a bulk operation.
+
+    Returns:
+        str: SHA-256 of the row serialized with sorted keys.
+    """
+    normalized = {
+        name: value.value if isinstance(value, Enum) else value
+        for name, value in spec.items()
+    }
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class BulkJournal:
+    def __init__(self, path: str | None = None) -> None:
+        """
+        Journal of rows already written by bulk operations.
+
+        Every written row is appended to the file as a JSON line with its key
+        and the ID of the created record, so a re-run of the same import skips
+        rows written before instead of creating duplicates. Without a path the
+        journal only lives in memory.
+
+        Args:
+            path (str, optional): Path of the JSON lines file. Defaults to None.
+        """
+        self.path = path
+        self._written: Dict[str, int | None] = {}
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._written[entry["key"]] = entry.get("id")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._written
+
+    def get(self, key: str) -> int | None:
+        """
+        Returns the ID of the record written for the key.
+
+        Args:
+            key (str): Row key.
+
+        Returns:
+            int: Record ID or None.
+        """
+        return self._written.get(key)
+
+    def record_ids(self) -> Set[int]:
+        """
+        Returns the IDs of the records written for all keys.
+
+        Returns:
+            Set[int]: Record IDs.
+        """
+        with self._lock:
+            return {
+                record_id
+                for record_id in self._written.values()
+                if record_id is not None
+            }
+
+    def record(self, key: str, record_id: int | None) -> None:
+        """
+        Remembers a written row.
+
+        Args:
+            key (str): Row key.
+            record_id (int, optional): ID of the created record.
+        """
+        with self._lock:
+            self._written[key] = record_id
+            if self.path is not None:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "id": record_id}) + "\n")
@@ -0,0 +1,528 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_MAX_ENTITIES = 10000
+DEFAULT_ENTITY_TTL = 300.0
+
+# Catalog endpoints that change rarely -> time to live in seconds
+DEFAULT_TTLS = {
+    "v1/company/paymentTypes": 3600.0,
+    "v1/company/userAttributes": 3600.0,
+    "v1/company/courses": 600.0,
+    "v1/company/classes": 600.0,
+    "v1/company/subscriptionGroupings": 600.0,
+}
+
+
+class MemoryCache:
+    def __init__(
+        self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        """
+        In-memory LRU storage for ResponseCache.
+
+        Args:
+            max_entries (int, optional): Maximum number of stored responses. Defaults to 1024.
+            max_bytes (int, optional): Maximum total size of stored responses. Defaults to 16 MiB.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, Tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Returns a stored response that has not expired yet.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            bytes: Response body or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Stores a response evicting the least recently used ones if the limits are exceeded.
+
+        Args:
+            key (str): Cache key.
+            value (bytes): Response body.
+            ttl (float): Time to live in seconds.
+        """
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.time() + ttl, value)
+            self.size += len(value)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, prefix: str = "") -> None:
+        """
+        Removes responses whose keys start with the prefix.
+
+        Args:
+            prefix (str, optional): Key prefix, all responses are removed if empty. Defaults to "".
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._remove(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+
+class DiskCache:
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        """
+        SQLite-backed LRU storage for ResponseCache, survives restarts and may be shared between processes.
+
+        Args:
+            path (str): Path of the SQLite database file.
+            max_entries (int, optional): Maximum number of stored responses. Defaults to 1024.
+            max_bytes (int, optional): Maximum total size of stored responses. Defaults to 16 MiB.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+                "ON responses (accessed_at)"
+            )
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT TOTAL(size) FROM responses").fetchone()
+        return int(row[0])
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Returns a stored response that has not expired yet.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            bytes: Response body or None.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return bytes(row[0])
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Stores a response evicting the least recently used ones if the limits are exceeded.
+
+        Args:
+            key (str): Cache key.
+            value (bytes): Response body.
+            ttl (float): Time to live in seconds.
+        """
+        if len(value) > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now + ttl, now),
+            )
+            self._evict()
+
+    def delete(self, prefix: str = "") -> None:
+        """
+        Removes responses whose keys start with the prefix.
+
+        Args:
+            prefix (str, optional): Key prefix, all responses are removed if empty. Defaults to "".
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM responses WHERE substr(key, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _evict(self) -> None:
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        count, size = self._db.execute(
+            "SELECT COUNT(*), TOTAL(size) FROM responses"
+        ).fetchone()
+        rows = self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        for key, entry_size in rows:
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            size -= entry_size
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        backend: MemoryCache | DiskCache | None = None,
+        ttls: Dict[str, float] | None = None,
+    ) -> None:
+        """
+        Cache of GET responses of rarely changing endpoints.
+
+        Only endpoints listed in ttls are cached; other requests always go to
+        the API.
+
+        Args:
+            backend (MemoryCache | DiskCache, optional): Storage of the responses. Defaults to MemoryCache().
+            ttls (Dict[str, float], optional): Endpoint path -> time to live in seconds. Defaults to DEFAULT_TTLS.
+        """
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.hits = 0
+        self.misses = 0
+        self._namespace = ""
+        self._lock = threading.Lock()
+
+    def bind(self, api_key: str) -> None:
+        """
+        Binds the cache to an API key, so responses of different companies sharing a backend do not mix.
+
+        Args:
+            api_key (str): API key of the client.
+        """
+        self._namespace = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+    def ttl_for(self, method: str, path: str) -> float | None:
+        """
+        Returns the time to live of the endpoint response.
+
+        Args:
+            method (str): HTTP method.
+            path (str): API endpoint path.
+
+        Returns:
+            float: Time to live in seconds or None if the response is not cached.
+        """
+        if method.upper() != "GET":
+            return None
+        return self.ttls.get(path)
+
+    def key(self, path: str, params: Dict[str, Any] | None = None) -> str:
+        """
+        Builds the cache key of a request.
+
+        Args:
+            path (str): API endpoint path.
+            params (Dict[str, Any], optional): Query parameters. Defaults to None.
+
+        Returns:
+            str: Cache key.
+        """
+        query = json.dumps(params or {}, sort_keys=True, default=str)
+        return f"{self._namespace}:{path}?{query}"
+
+    def get(self, path: str, params: Dict[str, Any] | None = None) -> bytes | None:
+        """
+        Returns the cached response body and counts a hit or a miss.
+
+        Args:
+            path (str): API endpoint path.
+            params (Dict[str, Any], optional): Query parameters. Defaults to None.
+
+        Returns:
+            bytes: Response body or None.
+        """
+        value = self.backend.get(self.key(path, params))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(
+        self, path: str, params: Dict[str, Any] | None, value: bytes, ttl: float
+    ) -> None:
+        """
+        Stores the response body.
+
+        Args:
+            path (str): API endpoint path.
+            params (Dict[str, Any], optional): Query parameters.
+            value (bytes): Response body.
+            ttl (float): Time to live in seconds.
+        """
+        self.backend.set(self.key(path, params), value, ttl)
+
+    def invalidate(self, path: str | None = None) -> None:
+        """
+        Removes cached responses of the endpoint, or all cached responses of this API key.
+
+        Args:
+            path (str, optional): API endpoint path. Defaults to None.
+        """
+        prefix = f"{self._namespace}:"
+        if path is not None:
+            prefix += f"{path}?"
+        self.backend.delete(prefix)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            Dict[str, Any]: Hits, misses, hit ratio, number of entries and their total size in bytes.
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+            "entries": len(self.backend),
+            "bytes": self.backend.size,
+        }
+
+
+class EntityCache:
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTITIES,
+        ttl: float = DEFAULT_ENTITY_TTL,
+    ) -> None:
+        """
+        Identity map of records by entity type and ID, shared by the resource classes of a client.
+
+        Every read path of the entity fills it (get_user, get_users,
+        iter_users and the user subscription lists) and get_user answers
+        from it without a request. Responses of writes (create_user,
+        update_user, create_user_subscription, set_user_subscription_status)
+        replace the stored record, or remove it if the response does not
+        contain one; delete_user removes the record. The same object is returned to every caller, so records
+        taken from the cache must not be modified.
+
+        Args:
+            max_entries (int, optional): Maximum number of stored records, the least recently used are evicted. Defaults to 10000.
+            ttl (float, optional): Seconds a record is served after it was stored. Defaults to 300.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Tuple[str, int], Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, entity: str, entity_id: int) -> Any:
+        """
+        Returns a stored record that has not expired yet and counts a hit or a miss.
+
+        Args:
+            entity (str): Entity type, e.g. "users" or "userSubscriptions".
+            entity_id (int): Record ID.
+
+        Returns:
+            Any: Record or None.
+        """
+        key = (entity, entity_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, entity: str, entity_id: int, record: Any) -> None:
+        """
+        Stores a record evicting the least recently used ones if max_entries is exceeded.
+
+        Args:
+            entity (str): Entity type.
+            entity_id (int): Record ID.
+            record (Any): Record as returned by the API.
+        """
+        self.set_many(entity, ((entity_id, record),))
+
+    def set_many(self, entity: str, records: Iterable[Tuple[int, Any]]) -> None:
+        """
+        Stores several records of an entity at once.
+
+        Args:
+            entity (str): Entity type.
+            records (Iterable[Tuple[int, Any]]): Record ID and record pairs.
+        """
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for entity_id, record in records:
+                key = (entity, entity_id)
+                self._entries[key] = (expires_at, record)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(
+        self, entity: str | None = None, entity_id: int | None = None
+    ) -> None:
+        """
+        Removes a record, all records of an entity, or everything.
+
+        Args:
+            entity (str, optional): Entity type. Defaults to None (all entities).
+            entity_id (int, optional): Record ID. Defaults to None (all records of the entity).
+        """
+        with self._lock:
+            if entity is not None and entity_id is not None:
+                self._entries.pop((entity, entity_id), None)
+            elif entity is not None:
+                for key in [key for key in self._entries if key[0] == entity]:
+                    del self._entries[key]
+            else:
+                self._entries.clear()
+
+    def record_observer(
+        self,
+        entity: str,
+        transform: Callable[[Any], Any] | None = None,
+        entity_id: int | None = None,
+    ) -> Callable[[Any], Any]:
+        """
+        Wraps the transform of a single-record response so the record is stored first.
+
+        Args:
+            entity (str): Entity type.
+            transform (Callable[[Any], Any], optional): Transform of the response, e.g. record_parser(models.User). Defaults to None.
+            entity_id (int, optional): ID of the written record, removed if the response has no record. Defaults to None.
+
+        Returns:
+            Callable[[Any], Any]: Transform for _make_request.
+        """
+
+        def observe(data: Any) -> Any:
+            record_id = data.get("id") if isinstance(data, dict) else None
+            if record_id is not None and entity_id in (None, record_id):
+                self.set(entity, record_id, data)
+            elif entity_id is not None:
+                self.invalidate(entity, entity_id)
+            return transform(data) if transform is not None else data
+
+        return observe
+
+    def page_observer(
+        self,
+        entity: str,
+        items_key: str,
+        transform: Callable[[Any], Any] | None = None,
+    ) -> Callable[[Any], Any]:
+        """
+        Wraps the transform of a list response so its records are stored before projection or conversion to models.
+
+        Args:
+            entity (str): Entity type.
+            items_key (str): Key of the items list in the response (e.g. "users").
+            transform (Callable[[Any], Any], optional): Transform of the page, e.g. page_parser(...). Defaults to None.
+
+        Returns:
+            Callable[[Any], Any]: Transform for _make_request.
+        """
+
+        def observe(page: Any) -> Any:
+            if isinstance(page, dict):
+                self.set_many(
+                    entity,
+                    (
+                        (item["id"], item)
+                        for item in page.get(items_key) or ()
+                        if item.get("id") is not None
+                    ),
+                )
+            return transform(page) if transform is not None else page
+
+        return observe
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            Dict[str, Any]: Hits, misses, hit ratio, evictions and number of stored records.
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            evictions, entries = self.evictions, len(self._entries)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+            "evictions": evictions,
+            "entries": entries,
+        }
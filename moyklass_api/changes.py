@@ -0,0 +1,222 @@
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable
+
+from moyklass_api.contacts import normalize_email, normalize_phone
+
+# Fields of the update_user request body that are compared with the server state
+USER_FIELDS = (
+    "name",
+    "email",
+    "phone",
+    "advSourceId",
+    "createSourceId",
+    "statusChangeReasonId",
+    "clientStateId",
+    "filials",
+    "responsibles",
+    "attributes",
+)
+
+
+def _normalize(name: str, value: Any) -> Any:
+    """
+    Brings a field of a user to the form used for comparison.
+
+    Args:
+        name (str): Field name as in the API, e.g. "phone".
+        value (Any): Field value.
+
+    Returns:
+        Any: Value that is equal for equivalent inputs.
+    """
+    if name == "phone":
+        return normalize_phone(value)
+    if name == "email":
+        return normalize_email(value)
+    if name in ("filials", "responsibles") and value is not None:
+        return sorted(value)
+    if name == "attributes" and value is not None:
+        # Values of different attributes may be of different types
+        return sorted(
+            (
+                [attribute.get("attributeId"), attribute.get("value")]
+                for attribute in value
+            ),
+            key=lambda pair: (
+                pair[0],
+                json.dumps(pair[1], sort_keys=True, default=str),
+            ),
+        )
+    return value
+
+
+def _digest(name: str, value: Any) -> bytes:
+    payload = json.dumps(_normalize(name, value), sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=8).digest()
+
+
+class ChangeTracker:
+    def __init__(self) -> None:
+        """
+        Last known server state of users, used to skip updates that change nothing.
+
+        Only a short hash of every field is kept per user. The state is
+        learned from the users returned by get_user, get_users and
+        iter_users of a client with the tracker, from users passed to
+        observe() and from successful update_user calls. When a
+        client has a tracker, update_user compares its request body with the
+        state, sends only the changed fields (name is always sent as the API
+        requires it) and skips the request if nothing changed. Users whose
+        state is unknown are sent in full.
+        """
+        self.skipped = 0
+        self.sent = 0
+        self.fields_skipped = 0
+        self._states: Dict[int, Dict[str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def observe(self, user: Dict[str, Any]) -> None:
+        """
+        Remembers the server state of a user returned by the API.
+
+        Fields missing from the user (e.g. left out by a fields projection)
+        keep their known state.
+
+        Args:
+            user (Dict[str, Any]): User with id and the fields of USER_FIELDS.
+        """
+        state = {
+            name: _digest(name, user.get(name)) for name in USER_FIELDS if name in user
+        }
+        with self._lock:
+            self._states.setdefault(user["id"], {}).update(state)
+
+    def observe_many(self, users: Iterable[Dict[str, Any]]) -> None:
+        """
+        Remembers the server state of several users.
+
+        Args:
+            users (Iterable[Dict[str, Any]]): Users returned by the API.
+        """
+        for user in users:
+            self.observe(user)
+
+    def record_observer(
+        self, transform: Callable[[Any], Any] | None = None
+    ) -> Callable[[Any], Any]:
+        """
+        Wraps the transform of a single-user response so the user is observed before conversion.
+
+        Args:
+            transform (Callable[[Any], Any], optional): Transform of the response, e.g. record_parser(models.User). Defaults to None.
+
+        Returns:
+            Callable[[Any], Any]: Transform for _make_request.
+        """
+
+        def observe(user: Any) -> Any:
+            if isinstance(user, dict) and user.get("id") is not None:
+                self.observe(user)
+            return transform(user) if transform is not None else user
+
+        return observe
+
+    def page_observer(
+        self, items_key: str, transform: Callable[[Any], Any] | None = None
+    ) -> Callable[[Any], Any]:
+        """
+        Wraps the transform of a users list response so its users are observed before projection or conversion.
+
+        Args:
+            items_key (str): Key of the users list in the response.
+            transform (Callable[[Any], Any], optional): Transform of the page, e.g. page_parser(...). Defaults to None.
+
+        Returns:
+            Callable[[Any], Any]: Transform for _make_request.
+        """
+
+        def observe(page: Any) -> Any:
+            if isinstance(page, dict):
+                for user in page.get(items_key) or ():
+                    if user.get("id") is not None:
+                        self.observe(user)
+            return transform(page) if transform is not None else page
+
+        return observe
+
+    def forget(self, user_id: int | None = None) -> None:
+        """
+        Drops the known state of a user or of all users.
+
+        Args:
+            user_id (int, optional): User ID. Defaults to None (all users).
+        """
+        with self._lock:
+            if user_id is None:
+                self._states.clear()
+            else:
+                self._states.pop(user_id, None)
+
+    def changes(self, user_id: int, data: Dict[str, Any]) -> Dict[str, Any] | None:
+        """
+        Removes the fields that match the known state from an update_user request body.
+
+        Args:
+            user_id (int): User ID.
+            data (Dict[str, Any]): Request body built by update_user.
+
+        Returns:
+            Dict[str, Any]: Body to send or None if nothing changed.
+        """
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is None:
+                self.sent += 1
+                return data
+            changed = {
+                name: value
+                for name, value in data.items()
+                if state.get(name) != _digest(name, value)
+            }
+            if not changed:
+                self.skipped += 1
+                self.fields_skipped += len(data)
+                return None
+            if "name" in data:
+                changed.setdefault("name", data["name"])
+            self.sent += 1
+            self.fields_skipped += len(data) - len(changed)
+        return changed
+
+    def record(self, user_id: int, data: Dict[str, Any]) -> None:
+        """
+        Merges the fields of a successful update into the known state.
+
+        Args:
+            user_id (int): User ID.
+            data (Dict[str, Any]): Sent request body.
+        """
+        with self._lock:
+            state = self._states.setdefault(user_id, {})
+            for name, value in data.items():
+                state[name] = _digest(name, value)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the tracker counters.
+
+        Returns:
+            Dict[str, Any]: Numbers of skipped and sent updates, of fields left out of sent updates and of tracked users.
+        """
+        with self._lock:
+            return {
+                "skipped": self.skipped,
+                "sent": self.sent,
+                "fields_skipped": self.fields_skipped,
+                "users": len(self._states),
+            }
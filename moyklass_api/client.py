@@ -1,50 +1,233 @@
-import logging
-from typing import Any, Dict
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator
 
 import requests
+from urllib3.exceptions import NewConnectionError
+
+from moyklass_api.auth import TokenManager
+from moyklass_api.cache import EntityCache, ResponseCache
+from moyklass_api.changes import ChangeTracker
+from moyklass_api.codec import JsonCodec, get_codec
+from moyklass_api.concurrency import SingleFlight
+from moyklass_api.log import RequestLog, logger
+from moyklass_api.metrics import RequestEvent, RequestHook, fire_after, fire_before
+from moyklass_api.ratelimit import RateLimiter, parse_retry_after
+from moyklass_api.retry import RetryPolicy
+from moyklass_api.streaming import DEFAULT_CHUNK_SIZE, ArrayItemParser, ItemStream
+from moyklass_api.transport import (
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    RequestsTransport,
+    Transport,
+)
+
+DEFAULT_THROTTLE_RETRIES = 5
+DEFAULT_THROTTLE_DELAY = 1.0
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+AUTH_PATH_PREFIX = "v1/company/auth/"
+# Statuses the server answers with when it is overloaded
+THROTTLE_STATUS_CODES = (429, 503)
 
 
 class MoyklassApiException(Exception):
-    def __init__(self, message: str = None) -> None:
+    def __init__(self, message: str = None, status_code: int | None = None) -> None:
         """
         Exception for Moyklass API errors.
 
         Args:
             message (str, optional): Error message. Defaults to None.
+            status_code (int, optional): HTTP status code of the failed response. Defaults to None.
         """
         self.message = message
+        self.status_code = status_code
         super().__init__(message)
 
 
+def _is_not_sent(err: requests.RequestException) -> bool:
+    """
+    Checks whether the request failed before reaching the server.
+
+    Args:
+        err (requests.RequestException): Raised exception.
+
+    Returns:
+        bool: True if the connection could not be established.
+    """
+    if isinstance(err, requests.ConnectTimeout):
+        return True
+    cause = err.args[0] if err.args else None
+    return isinstance(getattr(cause, "reason", cause), NewConnectionError)
+
+
 class MoyklassApi:
     def __init__(
-        self, api_key: str, base_url: str = "https://api.moyklass.com"
+        self,
+        api_key: str,
+        base_url: str = "https://api.moyklass.com",
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        session: requests.Session | None = None,
+        rate_limit: float | None = None,
+        burst: int = 1,
+        max_throttle_retries: int = DEFAULT_THROTTLE_RETRIES,
+        retry_policy: RetryPolicy | None = None,
+        token_manager: TokenManager | None = None,
+        response_cache: ResponseCache | None = None,
+        change_tracker: ChangeTracker | None = None,
+        entity_cache: EntityCache | None = None,
+        codec: JsonCodec | None = None,
+        stream_chunk_size: int = DEFAULT_CHUNK_SIZE,
+        hooks: Iterable[RequestHook] | None = None,
+        request_log: RequestLog | None = None,
+        transport: Transport | None = None,
     ) -> None:
         """
         Initializes the MoyklassApi instance.
 
+        All resource classes (User, Payment, Lesson, ...) created with this
+        instance share one transport, so connections to the API are reused
+        between calls instead of being opened for every request.
+
         Args:
             api_key (str): API key for authentication.
             base_url (str, optional): Base URL for the Moyklass API. Defaults to "https://api.moyklass.com".
+            pool_connections (int, optional): Number of per-host connection pools to keep. Defaults to 10.
+            pool_maxsize (int, optional): Maximum number of connections kept open per host. Defaults to 10.
+            pool_block (bool, optional): Block when all connections of the pool are busy instead of opening extra ones. Defaults to False.
+            keep_alive (bool, optional): Keep connections open between requests. Defaults to True.
+            session (requests.Session, optional): Preconfigured session to use instead of creating a new one,
+                left open by close(). Defaults to None. The pool and session arguments are ignored if transport is given.
+            rate_limit (float, optional): Maximum number of requests per second shared by all resource classes. Defaults to None (no limit).
+            burst (int, optional): Number of requests that may be sent at once when rate_limit is set. Defaults to 1.
+            max_throttle_retries (int, optional): How many times a request answered with 429 is repeated. Defaults to 5.
+            retry_policy (RetryPolicy, optional): Policy for repeating requests after transient errors. Defaults to RetryPolicy().
+            token_manager (TokenManager, optional): Cache of the access token, may be shared between clients. Defaults to TokenManager().
+            response_cache (ResponseCache, optional): Cache of catalog responses. Defaults to None (no caching).
+            change_tracker (ChangeTracker, optional): Known server state of users, lets update_user skip or shrink writes. Defaults to None.
+            entity_cache (EntityCache, optional): Identity map of users and user subscriptions filled by reads and writes. Defaults to None.
+            codec (JsonCodec, optional): JSON codec for responses and request bodies. Defaults to the fastest installed backend.
+            stream_chunk_size (int, optional): Size of the chunks read from streamed list responses. Defaults to 64 KiB.
+            hooks (Iterable[RequestHook], optional): Hooks called before and after every request, e.g. MetricsCollector. Defaults to None.
+            request_log (RequestLog, optional): Debug logging of requests and responses. Defaults to RequestLog().
+            transport (Transport, optional): Transport sending the requests, e.g. Urllib3Transport or CassetteTransport.
+                Defaults to RequestsTransport with the pool settings above.
         """
         self.base_url = base_url
         self.api_key = api_key
-        self.token = None
+        self._owns_token_manager = token_manager is None
+        self.token_manager = (
+            token_manager if token_manager is not None else TokenManager()
+        )
+        self.token_manager.bind(api_key)
+
+        if transport is None:
+            transport = RequestsTransport(
+                session,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block,
+                keep_alive=keep_alive,
+            )
+        self.transport = transport
+
+        self.rate_limiter = (
+            RateLimiter(rate_limit, burst) if rate_limit is not None else None
+        )
+        self.max_throttle_retries = max_throttle_retries
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+
+        self.response_cache = response_cache
+        if response_cache is not None:
+            response_cache.bind(api_key)
+        self.change_tracker = change_tracker
+        self.entity_cache = entity_cache
+        self.codec = codec if codec is not None else get_codec()
+        self.stream_chunk_size = stream_chunk_size
+        self.hooks = list(hooks) if hooks is not None else []
+        self.request_log = request_log if request_log is not None else RequestLog()
+
+        self.single_flight = SingleFlight()
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session | None:
+        """
+        HTTP session of the transport, None if the transport does not use requests sessions.
+        """
+        return getattr(self.transport, "session", None)
+
+    @contextmanager
+    def report_throttling(self) -> Iterator[None]:
+        """
+        Returns 429 and 503 responses of the current thread to the caller instead of repeating them.
+
+        Used by concurrent pagination, which lowers its own concurrency when
+        the server starts throttling instead of letting every worker wait and
+        repeat its request alone.
+        """
+        previous = getattr(self._local, "report_throttling", False)
+        self._local.report_throttling = True
+        try:
+            yield
+        finally:
+            self._local.report_throttling = previous
+
+    def _reports_throttling(self) -> bool:
+        return getattr(self._local, "report_throttling", False)
+
+    def close(self) -> None:
+        """
+        Closes the transport and all pooled connections.
+
+        A session passed to the constructor is left open for its owner to close.
+        """
+        self.transport.close()
 
-    def set_token(self) -> None:
+    @property
+    def token(self) -> str | None:
+        """
+        Current access token.
+        """
+        return self.token_manager.token
+
+    @token.setter
+    def token(self, value: str | None) -> None:
+        self.token_manager.token = value
+        self.token_manager.expires_at = None
+
+    def set_token(self, force: bool = False) -> None:
         """
         Obtains and sets the authentication token.
+
+        A cached token that has not expired yet is reused without calling the API.
+
+        Args:
+            force (bool, optional): Request a new token even if the cached one is valid. Defaults to False.
+        """
+        self.token_manager.get(self._fetch_token, force=force)
+
+    def _fetch_token(self) -> Dict[str, Any]:
+        """
+        Requests a new authentication token.
+
+        Returns:
+            Dict[str, Any]: Response with accessToken and expiresAt.
         """
         data = {"apiKey": self.api_key}
-        r = self._make_request("POST", "v1/company/auth/getToken", data=data)
-        self.token = r["accessToken"]
+        return self._make_request(
+            "POST", f"{AUTH_PATH_PREFIX}getToken", data=data, idempotent=True
+        )
 
     def revoke_token(self) -> None:
         """
         Revokes the authentication token.
         """
-        self._make_request("POST", "v1/company/auth/revokeToken")
-        self.token = None
+        self._make_request("POST", f"{AUTH_PATH_PREFIX}revokeToken", idempotent=True)
+        self.token_manager.clear()
 
     def _make_request(
         self,
@@ -52,7 +235,9 @@ class MoyklassApi:
         path: str,
         data: Dict[str, Any] | None = None,
         params: Dict[str, Any] | None = None,
-    ) -> Dict[str, Any] | str:
+        idempotent: bool = False,
+        transform: Callable[[Any], Any] | None = None,
+    ) -> Any:
         """
         Makes a request to the Moyklass API.
 
@@ -61,27 +246,174 @@ class MoyklassApi:
             path (str): API endpoint path.
             data (Dict[str, Any], optional): Request body data. Defaults to None.
             params (Dict[str, Any], optional): Query parameters. Defaults to None.
+            idempotent (bool, optional): The request may be repeated regardless of its method. Defaults to False.
+            transform (Callable[[Any], Any], optional): Function applied to the decoded JSON, e.g. to build typed models. Defaults to None.
 
         Returns:
-            Union[Dict[str, Any], str]: Response data or response text if JSON decoding fails.
+            Any: Response data, transformed if transform is given, or response text if JSON decoding fails.
         """
         url = f"{self.base_url}/{path}"
 
+        cache_ttl = None
+        if self.response_cache is not None:
+            cache_ttl = self.response_cache.ttl_for(method, path)
+            if cache_ttl is not None:
+                cached = self.response_cache.get(path, params)
+                if cached is not None:
+                    logger.debug("Using cached response for %s %s", method, url)
+                    return self.codec.decode(cached, transform)
+
+        started = time.perf_counter()
+        event = self._start_event(method, path)
+        try:
+            r = self._request(
+                method,
+                path,
+                url,
+                data=data,
+                params=params,
+                idempotent=idempotent,
+                event=event,
+            )
+        except MoyklassApiException as err:
+            self._finish_event(event, err.status_code, error=err)
+            raise
+
+        self.request_log.response(
+            method, url, r.status_code, r.content, time.perf_counter() - started
+        )
+        self._finish_event(event, r.status_code, len(r.content))
+
+        try:
+            response_data = self.codec.loads(r.content)
+        except ValueError:
+            return r.text
+        if cache_ttl is not None:
+            self.response_cache.set(path, params, r.content, cache_ttl)
+
+        # Errors of transform are not decoding errors and are raised as is
+        return transform(response_data) if transform is not None else response_data
+
+    def _start_event(self, method: str, path: str) -> RequestEvent | None:
+        """
+        Creates the event of a request and calls before_request of the hooks.
+
+        Args:
+            method (str): HTTP method.
+            path (str): API endpoint path.
+
+        Returns:
+            RequestEvent: Event or None if there are no hooks.
+        """
+        if not self.hooks:
+            return None
+        event = RequestEvent(method, path)
+        fire_before(self.hooks, event)
+        return event
+
+    def _finish_event(
+        self,
+        event: RequestEvent | None,
+        status: int | None,
+        bytes_in: int = 0,
+        error: Exception | None = None,
+    ) -> None:
+        """
+        Completes the event of a request and calls after_request of the hooks.
+
+        Args:
+            event (RequestEvent, optional): Event created by _start_event.
+            status (int, optional): HTTP status of the response.
+            bytes_in (int, optional): Size of the response body. Defaults to 0.
+            error (Exception, optional): Error the request failed with. Defaults to None.
+        """
+        if event is None:
+            return
+        event.status = status
+        event.bytes_in = bytes_in
+        event.error = error
+        fire_after(self.hooks, event)
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        url: str,
+        data: Dict[str, Any] | None = None,
+        params: Dict[str, Any] | None = None,
+        idempotent: bool = False,
+        stream: bool = False,
+        event: RequestEvent | None = None,
+    ) -> requests.Response:
+        """
+        Sends an authorized request, refreshing the token once if the server answers 401.
+
+        Args:
+            method (str): HTTP method (e.g., "GET", "POST").
+            path (str): API endpoint path.
+            url (str): Full request URL.
+            data (Dict[str, Any], optional): Request body data. Defaults to None.
+            params (Dict[str, Any], optional): Query parameters. Defaults to None.
+            idempotent (bool, optional): The request may be repeated regardless of its method. Defaults to False.
+            stream (bool, optional): Do not read the response body. Defaults to False.
+            event (RequestEvent, optional): Event of the request updated with retries and waits. Defaults to None.
+
+        Returns:
+            requests.Response: Successful response.
+
+        Raises:
+            MoyklassApiException: If the request failed.
+        """
+        token = self.token
         headers = None
-        if self.token is not None:
+        if token is not None:
             headers = dict()
-            headers["x-access-token"] = self.token
+            headers["x-access-token"] = token
 
-        logging.debug(
-            f"Sending {method} request to {url} with headers: {headers}; query params: {params}; data: {data}"
-        )
+        self.request_log.request(method, url, headers, params, data)
         try:
-            r = requests.request(method, url, headers=headers, json=data, params=params)
+            r = self._send_with_retries(
+                method,
+                path,
+                url,
+                headers=headers,
+                data=data,
+                params=params,
+                idempotent=idempotent,
+                stream=stream,
+                event=event,
+            )
+            if r.status_code == 401 and not path.startswith(AUTH_PATH_PREFIX):
+                r.close()
+                if event is not None:
+                    event.retries += 1
+                # Without a token, e.g. after another client revoked a shared one,
+                # a new one is requested instead of failing for good
+                headers = dict(headers or ())
+                headers["x-access-token"] = (
+                    self.token_manager.get(self._fetch_token)
+                    if token is None
+                    else self.token_manager.refresh(token, self._fetch_token)
+                )
+                r = self._send_with_retries(
+                    method,
+                    path,
+                    url,
+                    headers=headers,
+                    data=data,
+                    params=params,
+                    idempotent=idempotent,
+                    stream=stream,
+                    event=event,
+                )
             r.raise_for_status()
         except requests.TooManyRedirects as err:
             raise MoyklassApiException(f"Too many redirects: {err}")
         except requests.HTTPError as err:
-            raise MoyklassApiException(f"HTTPError occurred: {err}")
+            err.response.close()
+            raise MoyklassApiException(
+                f"HTTPError occurred: {err}", status_code=err.response.status_code
+            )
         except requests.Timeout as err:
             raise MoyklassApiException(f"Timeout error: {err}")
         except requests.ConnectionError as err:
@@ -89,14 +421,242 @@ class MoyklassApi:
         except requests.exceptions.RequestException as err:
             raise MoyklassApiException(f"Some error occurred: {err}")
 
-        logging.debug(f"Response: {r.status_code}, {r.content}")
+        return r
+
+    def _stream_request(
+        self,
+        method: str,
+        path: str,
+        items_key: str,
+        params: Dict[str, Any] | None = None,
+        transform: Callable[[Any], Any] | None = None,
+    ) -> ItemStream:
+        """
+        Makes a request to a list endpoint and parses the response while it is downloaded.
+
+        The request is sent when the iteration starts. Only the items
+        completed by the last received chunk are kept in memory.
+
+        Args:
+            method (str): HTTP method (e.g., "GET").
+            path (str): API endpoint path.
+            items_key (str): Key of the items list in the response (e.g. "lessons").
+            params (Dict[str, Any], optional): Query parameters. Defaults to None.
+            transform (Callable[[Any], Any], optional): Function applied to every item, e.g. models.Lesson.from_dict. Defaults to None.
+
+        Returns:
+            ItemStream: Iterator over the items, the other keys of the response are available in its meta after the iteration.
+        """
+        parser = ArrayItemParser(items_key)
+        items = self._iter_stream(method, path, parser, params, transform)
+        return ItemStream(items, parser)
+
+    def _iter_stream(
+        self,
+        method: str,
+        path: str,
+        parser: ArrayItemParser,
+        params: Dict[str, Any] | None,
+        transform: Callable[[Any], Any] | None,
+    ) -> Iterator[Any]:
+        """
+        Sends the request of _stream_request and yields the items while reading the body.
+        """
+        url = f"{self.base_url}/{path}"
+        started = time.perf_counter()
+        event = self._start_event(method, path)
+        try:
+            r = self._request(
+                method, path, url, params=params, stream=True, event=event
+            )
+        except MoyklassApiException as err:
+            self._finish_event(event, err.status_code, error=err)
+            raise
+        self.request_log.response(
+            method, url, r.status_code, None, time.perf_counter() - started
+        )
 
+        chunks = r.iter_content(self.stream_chunk_size)
+        bytes_in = 0
+        error = None
         try:
-            response_data = r.json()
-        except requests.JSONDecodeError:
-            response_data = r.text
+            while True:
+                try:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        items = parser.close()
+                    else:
+                        bytes_in += len(chunk)
+                        items = parser.feed(chunk)
+                except requests.exceptions.RequestException as err:
+                    error = MoyklassApiException(
+                        f"Connection is lost, try again later: {err}"
+                    )
+                    raise error
+                except ValueError as err:
+                    error = MoyklassApiException(f"Invalid JSON in response: {err}")
+                    raise error
 
-        return response_data
+                for item in items:
+                    yield transform(item) if transform is not None else item
+                del items
+                if chunk is None:
+                    return
+        finally:
+            r.close()
+            self._finish_event(event, r.status_code, bytes_in, error=error)
+
+    def _send_with_retries(
+        self,
+        method: str,
+        path: str,
+        url: str,
+        headers: Dict[str, str] | None = None,
+        data: Dict[str, Any] | None = None,
+        params: Dict[str, Any] | None = None,
+        idempotent: bool = False,
+        stream: bool = False,
+        event: RequestEvent | None = None,
+    ) -> requests.Response:
+        """
+        Sends the request repeating it after transient errors according to the retry policy.
+
+        Args:
+            method (str): HTTP method (e.g., "GET", "POST").
+            path (str): API endpoint path.
+            url (str): Full request URL.
+            headers (Dict[str, str], optional): Request headers. Defaults to None.
+            data (Dict[str, Any], optional): Request body data. Defaults to None.
+            params (Dict[str, Any], optional): Query parameters. Defaults to None.
+            idempotent (bool, optional): The request may be repeated regardless of its method. Defaults to False.
+            stream (bool, optional): Do not read the response body. Defaults to False.
+            event (RequestEvent, optional): Event of the request updated with retries and waits. Defaults to None.
+
+        Returns:
+            requests.Response: Last received response.
+        """
+        policy = self.retry_policy
+        retry_exceptions = policy.retry_exceptions or RETRY_EXCEPTIONS
+
+        body = None
+        if data is not None:
+            body = self.codec.dumps(data)
+            headers = dict(headers or {})
+            headers["Content-Type"] = "application/json"
+            if event is not None:
+                event.bytes_out = len(body)
+
+        attempt = 1
+        while True:
+            try:
+                r = self._send(
+                    method,
+                    url,
+                    headers=headers,
+                    body=body,
+                    params=params,
+                    stream=stream,
+                    event=event,
+                )
+            except retry_exceptions as err:
+                safe = idempotent or _is_not_sent(err)
+                if not policy.should_retry(attempt, method, path, data, safe):
+                    raise
+                reason = repr(err)
+            else:
+                if r.status_code not in policy.retry_statuses:
+                    return r
+                if (
+                    r.status_code in THROTTLE_STATUS_CODES
+                    and self._reports_throttling()
+                ):
+                    return r
+                if not policy.should_retry(attempt, method, path, data, idempotent):
+                    return r
+                reason = f"status {r.status_code}"
+                r.close()
+
+            delay = policy.backoff(attempt)
+            logger.debug(
+                "%s %s failed with %s, retrying in %.2fs (attempt %s)",
+                method,
+                url,
+                reason,
+                delay,
+                attempt,
+            )
+            policy.stats.record_retry(delay)
+            if event is not None:
+                event.retries += 1
+            time.sleep(delay)
+            attempt += 1
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] | None = None,
+        body: bytes | None = None,
+        params: Dict[str, Any] | None = None,
+        stream: bool = False,
+        event: RequestEvent | None = None,
+    ) -> requests.Response:
+        """
+        Sends the request respecting the rate limit and repeats it while the server answers 429.
+
+        The delay before a repeat is taken from the Retry-After header. If a
+        rate limiter is configured it slows down for every request of the
+        client, not only for the throttled one.
+
+        Args:
+            method (str): HTTP method (e.g., "GET", "POST").
+            url (str): Full request URL.
+            headers (Dict[str, str], optional): Request headers. Defaults to None.
+            body (bytes, optional): Encoded request body. Defaults to None.
+            params (Dict[str, Any], optional): Query parameters. Defaults to None.
+            stream (bool, optional): Do not read the response body. Defaults to False.
+            event (RequestEvent, optional): Event of the request updated with retries and waits. Defaults to None.
+
+        Returns:
+            requests.Response: Last received response.
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.acquire()
+                if event is not None:
+                    event.rate_limit_wait += wait
+
+            r = self.transport.send(
+                method, url, headers=headers, body=body, params=params, stream=stream
+            )
+            if r.status_code != 429 or self._reports_throttling():
+                break
+            if attempt >= self.max_throttle_retries:
+                break
+            r.close()
+
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            if retry_after is None:
+                retry_after = DEFAULT_THROTTLE_DELAY * 2**attempt
+            attempt += 1
+
+            logger.debug(
+                "Too many requests, retrying in %ss (attempt %s)", retry_after, attempt
+            )
+            if event is not None:
+                event.retries += 1
+            if self.rate_limiter is not None:
+                self.rate_limiter.throttle(retry_after)
+            else:
+                if event is not None:
+                    event.rate_limit_wait += retry_after
+                time.sleep(retry_after)
+
+        if self.rate_limiter is not None and r.status_code != 429:
+            self.rate_limiter.recover()
+
+        return r
 
     def __enter__(self) -> "MoyklassApi":
         """
@@ -110,6 +670,13 @@ class MoyklassApi:
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         """
-        Revokes the authentication token when exiting a context manager block.
+        Revokes the authentication token and closes pooled connections when exiting a context manager block.
+
+        A token shared through TokenManager.token_file or a TokenManager passed
+        to the constructor is kept for other processes and clients.
         """
-        self.revoke_token()
+        try:
+            if self.token_manager.revokes_on_exit(self._owns_token_manager):
+                self.revoke_token()
+        finally:
+            self.close()
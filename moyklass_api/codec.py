@@ -0,0 +1,123 @@
+"""
+JSON codecs used by the clients to decode responses and encode request bodies.
+
+The fastest installed backend is picked by default: orjson, then ujson, then
+the standard library. Any backend can be forced by passing a codec to the
+client, e.g. ``MoyklassApi(api_key, codec=get_codec("json"))``.
+"""
+import json
+from typing import Any, Callable, Dict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+class JsonCodec:
+    name = "json"
+
+    def loads(self, content: bytes | str) -> Any:
+        """
+        Decodes a JSON document.
+
+        Args:
+            content (bytes | str): JSON document.
+
+        Returns:
+            Any: Decoded value.
+
+        Raises:
+            ValueError: If the content is not valid JSON.
+        """
+        return json.loads(content)
+
+    def dumps(self, data: Any) -> bytes:
+        """
+        Encodes a value as a UTF-8 JSON document.
+
+        Args:
+            data (Any): Value to encode.
+
+        Returns:
+            bytes: JSON document.
+        """
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def decode(
+        self, content: bytes | str, transform: Callable[[Any], Any] | None = None
+    ) -> Any:
+        """
+        Decodes a response body and converts it to the structure expected by the endpoint.
+
+        Args:
+            content (bytes | str): Response body.
+            transform (Callable[[Any], Any], optional): Function building typed records from the decoded value,
+                e.g. models.page_parser(models.Lesson, "lessons"). Defaults to None.
+
+        Returns:
+            Any: Decoded and transformed value.
+
+        Raises:
+            ValueError: If the content is not valid JSON.
+        """
+        data = self.loads(content)
+        return transform(data) if transform is not None else data
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def loads(self, content: bytes | str) -> Any:
+        return orjson.loads(content)
+
+    def dumps(self, data: Any) -> bytes:
+        return orjson.dumps(data)
+
+
+class UjsonCodec(JsonCodec):
+    name = "ujson"
+
+    def loads(self, content: bytes | str) -> Any:
+        return ujson.loads(content)
+
+    def dumps(self, data: Any) -> bytes:
+        return ujson.dumps(data, ensure_ascii=False).encode()
+
+
+CODECS: Dict[str, type] = {
+    "orjson": OrjsonCodec,
+    "ujson": UjsonCodec,
+    "json": JsonCodec,
+}
+_BACKENDS = {"orjson": orjson, "ujson": ujson, "json": json}
+
+
+def get_codec(name: str | None = None) -> JsonCodec:
+    """
+    Returns a codec using the given JSON backend.
+
+    Args:
+        name (str, optional): "orjson", "ujson" or "json". Defaults to None (the fastest installed one).
+
+    Returns:
+        JsonCodec: Codec instance.
+
+    Raises:
+        ValueError: If the backend is unknown or not installed.
+    """
+    if name is None:
+        for backend, module in _BACKENDS.items():
+            if module is not None:
+                return CODECS[backend]()
+
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON backend: {name}")
+    if _BACKENDS[name] is None:
+        raise ValueError(f"JSON backend {name} is not installed")
+    return CODECS[name]()
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Iterator
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        """
+        Merges identical concurrent calls.
+
+        While a call with some key is running, other threads calling do()
+        with the same key wait for it and get its result instead of making
+        the same request again.
+        """
+        self.merged = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Runs fn unless a call with the same key is already running.
+
+        Args:
+            key (Hashable): Identity of the call (e.g. ("users", 42)).
+            fn (Callable[[], Any]): Function making the call.
+
+        Returns:
+            Any: Result of fn. An exception raised by fn is raised in every waiting thread.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.merged += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as err:
+                call.error = err
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class AsyncSingleFlight:
+    def __init__(self) -> None:
+        """
+        Merges identical concurrent coroutine calls, asynchronous version of SingleFlight.
+        """
+        self.merged = 0
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Awaits fn unless a call with the same key is already running.
+
+        Args:
+            key (Hashable): Identity of the call (e.g. ("users", 42)).
+            fn (Callable[[], Awaitable[Any]]): Coroutine function making the call.
+
+        Returns:
+            Any: Result of fn.
+        """
+        task = self._tasks.get(key)
+        if task is not None:
+            self.merged += 1
+        else:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+
+def map_bounded(
+    fn: Callable[[Any], Any], items: Iterable[Any], workers: int
+) -> Iterator[Any]:
+    """
+    Applies fn to items in a thread pool, yielding results as they complete.
+
+    Unlike ThreadPoolExecutor.map, items are consumed lazily: at most
+    2 * workers of them are taken from the iterable ahead of the results, so
+    memory stays flat for long generators.
+
+    Args:
+        fn (Callable[[Any], Any]): Function to apply.
+        items (Iterable[Any]): Items, may be a generator.
+        workers (int): Number of threads.
+
+    Yields:
+        Any: Results of fn in completion order.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for item in items:
+            in_flight.add(executor.submit(fn, item))
+            if len(in_flight) >= 2 * workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(in_flight):
+            yield future.result()
@@ -0,0 +1,168 @@
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+_NOT_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(phone: str | None) -> str | None:
+    """
+    Normalizes a phone number for comparison.
+
+    Non-digits are dropped, and Russian numbers written as 8XXXXXXXXXX or
+    XXXXXXXXXX are converted to 7XXXXXXXXXX.
+
+    Args:
+        phone (str, optional): Phone number in any format.
+
+    Returns:
+        str: Digits of the number or None if there are none.
+    """
+    if not phone:
+        return None
+    digits = _NOT_DIGITS.sub("", str(phone))
+    if len(digits) == 11 and digits.startswith("8"):
+        digits = "7" + digits[1:]
+    elif len(digits) == 10:
+        digits = "7" + digits
+    return digits or None
+
+
+def normalize_email(email: str | None) -> str | None:
+    """
+    Normalizes an email address for comparison.
+
+    Args:
+        email (str, optional): Email address.
+
+    Returns:
+        str: Lowercased address without surrounding spaces or None if it is empty.
+    """
+    if not email:
+        return None
+    return str(email).strip().lower() or None
+
+
+def contact_keys(phone: str | None = None, email: str | None = None) -> List[str]:
+    """
+    Builds index keys of a phone number and an email address.
+
+    Args:
+        phone (str, optional): Phone number. Defaults to None.
+        email (str, optional): Email address. Defaults to None.
+
+    Returns:
+        List[str]: Keys like "phone:79001234567" and "email:user@example.com".
+    """
+    keys = []
+    phone = normalize_phone(phone)
+    if phone is not None:
+        keys.append(f"phone:{phone}")
+    email = normalize_email(email)
+    if email is not None:
+        keys.append(f"email:{email}")
+    return keys
+
+
+class ContactIndex:
+    def __init__(self) -> None:
+        """
+        Thread-safe index of normalized phone numbers and email addresses to user IDs.
+
+        While a user for some contact is being created, claim() of the same
+        contact from another thread waits for it, so two leads with one phone
+        never create two users.
+        """
+        self._ids: Dict[str, int] = {}
+        self._pending: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, user: Dict[str, Any]) -> None:
+        """
+        Indexes a user returned by the API.
+
+        Args:
+            user (Dict[str, Any]): User with id, phone and email.
+        """
+        keys = contact_keys(user.get("phone"), user.get("email"))
+        with self._lock:
+            for key in keys:
+                self._ids.setdefault(key, user["id"])
+
+    def build(self, users: Iterable[Dict[str, Any]]) -> "ContactIndex":
+        """
+        Indexes users, e.g. the result of User.iter_users().
+
+        Args:
+            users (Iterable[Dict[str, Any]]): Users.
+
+        Returns:
+            ContactIndex: The current instance.
+        """
+        for user in users:
+            self.add(user)
+        return self
+
+    def lookup(self, phone: str | None = None, email: str | None = None) -> int | None:
+        """
+        Finds the user ID by phone number or email address.
+
+        Args:
+            phone (str, optional): Phone number. Defaults to None.
+            email (str, optional): Email address. Defaults to None.
+
+        Returns:
+            int: User ID or None.
+        """
+        with self._lock:
+            return self._find(contact_keys(phone, email))
+
+    def claim(self, keys: List[str]) -> Tuple[int | None, bool]:
+        """
+        Finds the user by contact keys or reserves the keys for a new user.
+
+        Args:
+            keys (List[str]): Keys built by contact_keys().
+
+        Returns:
+            Tuple[int | None, bool]: ID of the found user and whether the keys were reserved; release() must be called for reserved keys.
+        """
+        while True:
+            with self._lock:
+                user_id = self._find(keys)
+                if user_id is not None:
+                    return user_id, False
+                pending = [self._pending[k] for k in keys if k in self._pending]
+                if not pending:
+                    event = threading.Event()
+                    for key in keys:
+                        self._pending[key] = event
+                    return None, True
+            pending[0].wait()
+
+    def release(self, keys: List[str], user_id: int | None) -> None:
+        """
+        Completes a reservation made by claim().
+
+        Args:
+            keys (List[str]): Reserved keys.
+            user_id (int, optional): ID of the created user, None if creation failed.
+        """
+        with self._lock:
+            event = None
+            for key in keys:
+                if user_id is not None:
+                    self._ids.setdefault(key, user_id)
+                event = self._pending.pop(key, event)
+        if event is not None:
+            event.set()
+
+    def _find(self, keys: List[str]) -> int | None:
+        for key in keys:
+            user_id = self._ids.get(key)
+            if user_id is not None:
+                return user_id
+        return None
@@ -1,6 +1,16 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
+from moyklass_api import models
 from moyklass_api.client import MoyklassApi
+from moyklass_api.models import item_parser, page_parser
+from moyklass_api.pagination import MAX_PAGE_SIZE, paginate
+from moyklass_api.sharding import (
+    DEFAULT_SHARD_ITEMS,
+    ShardCheckpoint,
+    iter_sharded,
+    query_key,
+    sharded_filters,
+)
 
 
 class Lesson:
@@ -25,6 +35,9 @@ class Lesson:
         include_task_answers: bool = False,
         include_user_subscriptions: bool = False,
         include_params: bool = False,
+        as_model: bool = False,
+        stream: bool = False,
+        fields: List[str] | None = None,
     ) -> Dict[str, Any]:
         """
         Retrieves a list of lessons based on specified filters.
@@ -46,6 +59,10 @@ class Lesson:
             include_task_answers (bool, optional): Include task answers in the response. Defaults to False.
             include_user_subscriptions (bool, optional): Include user subscriptions in the response. Defaults to False.
             include_params (bool, optional): Include parameters in the response. Defaults to False.
+            as_model (bool, optional): Return lessons as models.Lesson instead of dictionaries. Defaults to False.
+            stream (bool, optional): Return an ItemStream yielding lessons while the response is downloaded instead of the whole page. Defaults to False.
+            fields (List[str], optional): Keys to keep in every record, nested ones as paths like "records.userId".
+                Without stream the page is still decoded whole before projection. Defaults to None (all keys).
 
         Returns:
             Dict[str, Any]: A dictionary containing the response from the Moyklass API.
@@ -87,4 +104,101 @@ class Lesson:
         params["include_user_subscriptions"] = str(include_user_subscriptions).lower()
         params["include_params"] = str(include_params).lower()
 
-        return self.client._make_request("GET", "v1/company/lessons", params=params)
+        model = models.Lesson if as_model else None
+        if stream:
+            return self.client._stream_request(
+                "GET",
+                "v1/company/lessons",
+                "lessons",
+                params=params,
+                transform=item_parser(model, fields),
+            )
+
+        return self.client._make_request(
+            "GET",
+            "v1/company/lessons",
+            params=params,
+            transform=page_parser(model, "lessons", fields),
+        )
+
+    def iter_lessons(
+        self,
+        limit: int = MAX_PAGE_SIZE,
+        workers: int = 1,
+        ordered: bool = True,
+        **filters: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterates over all lessons matching the filters, fetching them page by page.
+
+        Args:
+            limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+            workers (int, optional): Number of pages requested concurrently. Defaults to 1.
+            ordered (bool, optional): Keep the server order when workers is greater than 1, otherwise yield pages as they arrive. Defaults to True.
+            **filters: Any argument of get_lessons (e.g. date, class_id, include_records, as_model, stream, fields).
+
+        Yields:
+            Dict[str, Any] | models.Lesson: Lesson.
+        """
+        offset = filters.pop("offset", 0)
+
+        def fetch(offset: int, limit: int) -> Dict[str, Any]:
+            return self.get_lessons(offset=offset, limit=limit, **filters)
+
+        return paginate(
+            fetch,
+            "lessons",
+            offset=offset,
+            limit=limit,
+            workers=workers,
+            ordered=ordered,
+            client=self.client,
+        )
+
+    def iter_lessons_sharded(
+        self,
+        date: List[str],
+        workers: int = 4,
+        shard_items: int = DEFAULT_SHARD_ITEMS,
+        checkpoint: ShardCheckpoint | None = None,
+        limit: int = MAX_PAGE_SIZE,
+        **filters: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterates over all lessons of a long date range fetching its parts concurrently.
+
+        The range is split into days, weeks or months of about shard_items
+        lessons each, the parts are fetched concurrently and the lessons are
+        yielded in date order without duplicates (a fields projection always
+        keeps date and id for that). Parts whose lessons were all consumed are
+        recorded in the checkpoint, so a re-run with the same filters
+        continues with the remaining dates.
+
+        Args:
+            date (List[str]): First and last date in YYYY-MM-DD format.
+            workers (int, optional): Number of parts fetched concurrently. Defaults to 4.
+            shard_items (int, optional): Desired number of lessons per part. Defaults to 2000.
+            checkpoint (ShardCheckpoint, optional): Journal of finished parts, pass one with a file path to resume interrupted exports. Defaults to None.
+            limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+            **filters: Any other argument of get_lessons (e.g. include_records, as_model, fields).
+
+        Yields:
+            Dict[str, Any] | models.Lesson: Lesson.
+        """
+        filters.pop("offset", None)
+        filters.pop("stream", None)
+        filters = sharded_filters(filters)
+
+        def fetch(date: List[str], offset: int, limit: int) -> Dict[str, Any]:
+            return self.get_lessons(date=date, offset=offset, limit=limit, **filters)
+
+        return iter_sharded(
+            fetch,
+            "lessons",
+            date,
+            workers=workers,
+            limit=limit,
+            shard_items=shard_items,
+            checkpoint=checkpoint,
+            query=query_key("v1/company/lessons", filters),
+        )
@@ -0,0 +1,187 @@
+"""
+Debug logging of requests.
+
+Messages are built only if DEBUG is enabled for the "moyklass_api" logger,
+so logging costs one level check per call when it is off. Access tokens and
+API keys are redacted and bodies are truncated to ``max_body`` characters.
+Every record carries the request fields in ``record.moyklass`` for
+structured (e.g. JSON) formatters::
+
+    logging.getLogger("moyklass_api").setLevel(logging.DEBUG)
+    mc = MoyklassApi(api_key, request_log=RequestLog(max_body=200))
+"""
+import logging
+import re
+from typing import Any, Dict
+
+logger = logging.getLogger("moyklass_api")
+
+DEFAULT_MAX_BODY = 1024
+REDACTED = "***"
+SENSITIVE_KEYS = frozenset(("x-access-token", "apiKey", "accessToken"))
+
+# Longest redacted value with its key, kept past max_body while redacting
+SECRET_MARGIN = 512
+
+# A value without the closing quote (cut text) is matched up to the end
+_SENSITIVE_JSON = re.compile(
+    r'("(?:%s)"\s*:\s*)"[^"]*(?:"|$)'
+    % "|".join(re.escape(key) for key in SENSITIVE_KEYS)
+)
+
+
+def redact(values: Dict[str, Any] | None) -> Dict[str, Any] | None:
+    """
+    Hides the values of sensitive keys.
+
+    Args:
+        values (Dict[str, Any], optional): Headers or request body data.
+
+    Returns:
+        Dict[str, Any]: Copy with the sensitive values replaced, or the same object if there are none.
+    """
+    if not values or SENSITIVE_KEYS.isdisjoint(values):
+        return values
+    return {
+        key: REDACTED if key in SENSITIVE_KEYS else value
+        for key, value in values.items()
+    }
+
+
+def redact_text(text: str) -> str:
+    """
+    Hides the values of sensitive keys in JSON text.
+
+    Args:
+        text (str): Serialized JSON, possibly truncated.
+
+    Returns:
+        str: Text with the sensitive values replaced.
+    """
+    return _SENSITIVE_JSON.sub(r'\1"' + REDACTED + '"', text)
+
+
+class RequestLog:
+    def __init__(
+        self, max_body: int = DEFAULT_MAX_BODY, logger: logging.Logger = logger
+    ) -> None:
+        """
+        Writes debug records about requests sent by a client.
+
+        Args:
+            max_body (int, optional): Maximum number of characters of a body included in a record. Defaults to 1024.
+            logger (logging.Logger, optional): Logger to write to. Defaults to the "moyklass_api" logger.
+        """
+        self.max_body = max_body
+        self.logger = logger
+
+    def enabled(self) -> bool:
+        """
+        Checks whether debug records are written.
+
+        Returns:
+            bool: True if DEBUG is enabled for the logger.
+        """
+        return self.logger.isEnabledFor(logging.DEBUG)
+
+    def body(self, content: Any) -> str:
+        """
+        Formats a body for a record: tokens and keys redacted, then truncated.
+
+        Only the first ``max_body`` characters and a margin of
+        ``SECRET_MARGIN`` are decoded and redacted, so large bodies cost no
+        more than small ones.
+
+        Args:
+            content (Any): Request data or response body.
+
+        Returns:
+            str: Text of the body.
+        """
+        if content is None:
+            return ""
+        limit = self.max_body + SECRET_MARGIN
+        if isinstance(content, (bytes, bytearray)):
+            size = len(content)
+            # A character takes at most 4 bytes in UTF-8
+            text = bytes(content[: limit * 4]).decode("utf-8", errors="replace")
+            cut = size > limit * 4 or len(text) > limit
+        else:
+            text = str(redact(content) if isinstance(content, dict) else content)
+            size = len(text)
+            cut = size > limit
+        # Redacting before the cut, so a cut inside a token can not leave its start visible
+        text = redact_text(text[:limit])
+        if cut or len(text) > self.max_body:
+            text = text[: self.max_body] + f"... ({size} total)"
+        return text
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] | None,
+        params: Dict[str, Any] | None,
+        data: Dict[str, Any] | None,
+    ) -> None:
+        """
+        Writes a record about a request being sent.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Full request URL.
+            headers (Dict[str, str], optional): Request headers.
+            params (Dict[str, Any], optional): Query parameters.
+            data (Dict[str, Any], optional): Request body data.
+        """
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        fields = {
+            "method": method,
+            "url": url,
+            "headers": redact(headers),
+            "params": params,
+            "body": self.body(data),
+        }
+        self.logger.debug(
+            "Sending %s request to %s with headers: %s; query params: %s; data: %s",
+            method,
+            url,
+            fields["headers"],
+            params,
+            fields["body"],
+            extra={"moyklass": fields},
+        )
+
+    def response(
+        self, method: str, url: str, status: int, content: Any, elapsed: float
+    ) -> None:
+        """
+        Writes a record about a received response.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Full request URL.
+            status (int): HTTP status.
+            content (Any): Response body, None if it is streamed.
+            elapsed (float): Seconds since the request was started, including retries.
+        """
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        fields = {
+            "method": method,
+            "url": url,
+            "status": status,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "bytes_in": len(content) if content is not None else None,
+            "body": self.body(content) if content is not None else "<streamed>",
+        }
+        self.logger.debug(
+            "Response: %s %s -> %s in %.1f ms, %s",
+            method,
+            url,
+            status,
+            fields["elapsed_ms"],
+            fields["body"],
+            extra={"moyklass": fields},
+        )
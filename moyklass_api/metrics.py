@@ -0,0 +1,319 @@
+"""
+Request instrumentation.
+
+Hooks passed to ``MoyklassApi(hooks=[...])`` are called before and after
+every request sent to the API with a RequestEvent describing it.
+MetricsCollector is a hook aggregating the events per endpoint::
+
+    metrics = MetricsCollector()
+    mc = MoyklassApi(api_key, hooks=[metrics])
+    ...
+    print(metrics.snapshot())
+    print(metrics.export_prometheus())
+"""
+import math
+import threading
+import time
+from collections import Counter, deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Tuple
+
+from moyklass_api.log import logger
+
+DEFAULT_SAMPLE_SIZE = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Collection -> name of the identifier following it in a path
+ID_NAMES = {
+    "classes": "classId",
+    "userSubscriptions": "userSubscriptionId",
+}
+
+
+@lru_cache(maxsize=1024)
+def endpoint_template(path: str) -> str:
+    """
+    Replaces identifiers in a path with placeholders.
+
+    Args:
+        path (str): API endpoint path, e.g. "v1/company/users/42".
+
+    Returns:
+        str: Endpoint template, e.g. "v1/company/users/{userId}".
+    """
+    parts = path.split("/")
+    for i, part in enumerate(parts):
+        if part.isdigit():
+            collection = parts[i - 1] if i else ""
+            name = ID_NAMES.get(collection) or collection.removesuffix("s") + "Id"
+            parts[i] = "{" + name + "}"
+    return "/".join(parts)
+
+
+class RequestEvent:
+    def __init__(self, method: str, path: str) -> None:
+        """
+        Request to the API passed to hooks.
+
+        Attributes are filled while the request is processed and are final
+        when RequestHook.after_request is called.
+
+        Args:
+            method (str): HTTP method.
+            path (str): API endpoint path.
+        """
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint_template(path)
+        # HTTP status of the last response, None if no response was received
+        self.status: int | None = None
+        self.latency = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        # Number of times the request was sent again (errors, 429, expired token)
+        self.retries = 0
+        self.rate_limit_wait = 0.0
+        self.error: Exception | None = None
+        self.started_at = time.perf_counter()
+
+    def __repr__(self) -> str:
+        return (
+            f"RequestEvent({self.method} {self.endpoint}, status={self.status}, "
+            f"latency={self.latency:.3f}s, retries={self.retries})"
+        )
+
+
+class RequestHook:
+    """
+    Base class of request hooks, both methods do nothing by default.
+
+    Hooks are called in the thread (or event loop) sending the request, so
+    they must be fast and thread-safe. An exception raised by a hook is
+    logged as a warning and does not fail the request, which may already
+    have been sent.
+    """
+
+    def before_request(self, event: RequestEvent) -> None:
+        """
+        Called before the request is sent for the first time.
+
+        Args:
+            event (RequestEvent): Request.
+        """
+
+    def after_request(self, event: RequestEvent) -> None:
+        """
+        Called after the response is read or the request failed.
+
+        Args:
+            event (RequestEvent): Request.
+        """
+
+
+def fire_before(hooks: Iterable[RequestHook], event: RequestEvent) -> None:
+    """
+    Calls before_request of every hook, logging its errors instead of failing the request.
+    """
+    for hook in hooks:
+        try:
+            hook.before_request(event)
+        except Exception:
+            logger.warning("Hook %r failed before %r", hook, event, exc_info=True)
+
+
+def fire_after(hooks: Iterable[RequestHook], event: RequestEvent) -> None:
+    """
+    Sets the latency of the finished request and calls after_request of every hook, logging their errors.
+    """
+    event.latency = time.perf_counter() - event.started_at
+    for hook in hooks:
+        try:
+            hook.after_request(event)
+        except Exception:
+            logger.warning("Hook %r failed after %r", hook, event, exc_info=True)
+
+
+def _percentile(samples: List[float], quantile: float) -> float:
+    """
+    Nearest-rank percentile of sorted samples.
+    """
+    if not samples:
+        return 0.0
+    rank = max(1, math.ceil(quantile * len(samples)))
+    return samples[rank - 1]
+
+
+class EndpointStats:
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE) -> None:
+        """
+        Counters of one endpoint and method.
+
+        Args:
+            sample_size (int, optional): Number of latest latencies kept for percentiles. Defaults to 1024.
+        """
+        self.count = 0
+        self.errors = 0
+        self.statuses: Counter = Counter()
+        self.latency_sum = 0.0
+        self.latencies: deque = deque(maxlen=sample_size)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+        self.rate_limit_wait = 0.0
+
+    def add(self, event: RequestEvent) -> None:
+        """
+        Adds a finished request.
+
+        Args:
+            event (RequestEvent): Request.
+        """
+        self.count += 1
+        if event.error is not None:
+            self.errors += 1
+        self.statuses[event.status] += 1
+        self.latency_sum += event.latency
+        self.latencies.append(event.latency)
+        self.bytes_in += event.bytes_in
+        self.bytes_out += event.bytes_out
+        self.retries += event.retries
+        self.rate_limit_wait += event.rate_limit_wait
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Returns the counters as a dictionary, see MetricsCollector.snapshot.
+        """
+        latencies = sorted(self.latencies)
+        data = {
+            "count": self.count,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "latency_avg": self.latency_sum / self.count if self.count else 0.0,
+        }
+        for quantile in QUANTILES:
+            data[f"latency_p{round(quantile * 100)}"] = _percentile(latencies, quantile)
+        data.update(
+            bytes_in=self.bytes_in,
+            bytes_out=self.bytes_out,
+            retries=self.retries,
+            rate_limit_wait=self.rate_limit_wait,
+        )
+        return data
+
+
+class MetricsCollector(RequestHook):
+    def __init__(
+        self, sample_size: int = DEFAULT_SAMPLE_SIZE, prefix: str = "moyklass"
+    ) -> None:
+        """
+        Thread-safe in-memory aggregator of request metrics per endpoint template and method.
+
+        Percentiles are calculated over the latest sample_size requests of an endpoint.
+
+        Args:
+            sample_size (int, optional): Number of latest latencies kept per endpoint. Defaults to 1024.
+            prefix (str, optional): Prefix of the exported metric names. Defaults to "moyklass".
+        """
+        self.sample_size = sample_size
+        self.prefix = prefix
+        self._endpoints: Dict[Tuple[str, str], EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def after_request(self, event: RequestEvent) -> None:
+        key = (event.method, event.endpoint)
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = EndpointStats(self.sample_size)
+            stats.add(event)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the aggregated metrics.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: "METHOD endpoint" -> count, errors, statuses, latency_avg,
+                latency_p50/p95/p99 (seconds), bytes_in, bytes_out, retries and rate_limit_wait (seconds).
+        """
+        with self._lock:
+            return {
+                f"{method} {endpoint}": stats.as_dict()
+                for (method, endpoint), stats in self._endpoints.items()
+            }
+
+    def reset(self) -> None:
+        """
+        Forgets all collected metrics.
+        """
+        with self._lock:
+            self._endpoints.clear()
+
+    def export_prometheus(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text.
+        """
+        p = self.prefix
+        with self._lock:
+            items = [
+                (method, endpoint, stats.as_dict())
+                for (method, endpoint), stats in sorted(self._endpoints.items())
+            ]
+
+        lines = [
+            f"# HELP {p}_requests_total Requests sent to the Moyklass API.",
+            f"# TYPE {p}_requests_total counter",
+        ]
+        for method, endpoint, data in items:
+            for status, count in data["statuses"].items():
+                labels = _labels(method, endpoint, status=status or "error")
+                lines.append(f"{p}_requests_total{{{labels}}} {count}")
+
+        lines += [
+            f"# HELP {p}_request_duration_seconds Request latency including retries.",
+            f"# TYPE {p}_request_duration_seconds summary",
+        ]
+        for method, endpoint, data in items:
+            for quantile in QUANTILES:
+                labels = _labels(method, endpoint, quantile=quantile)
+                value = data[f"latency_p{round(quantile * 100)}"]
+                lines.append(f"{p}_request_duration_seconds{{{labels}}} {value}")
+            labels = _labels(method, endpoint)
+            total = data["latency_avg"] * data["count"]
+            lines.append(f"{p}_request_duration_seconds_sum{{{labels}}} {total}")
+            count = data["count"]
+            lines.append(f"{p}_request_duration_seconds_count{{{labels}}} {count}")
+
+        counters = (
+            ("request_bytes_out_total", "bytes_out", "Bytes of request bodies."),
+            ("response_bytes_in_total", "bytes_in", "Bytes of response bodies."),
+            ("request_retries_total", "retries", "Repeated requests."),
+            (
+                "rate_limit_wait_seconds_total",
+                "rate_limit_wait",
+                "Time spent waiting for the rate limit.",
+            ),
+        )
+        for name, field, description in counters:
+            lines += [
+                f"# HELP {p}_{name} {description}",
+                f"# TYPE {p}_{name} counter",
+            ]
+            for method, endpoint, data in items:
+                labels = _labels(method, endpoint)
+                lines.append(f"{p}_{name}{{{labels}}} {data[field]}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(method: str, endpoint: str, **extra: Any) -> str:
+    """
+    Formats Prometheus labels, escaping backslashes and quotes in values.
+    """
+    labels = {"method": method, "endpoint": endpoint, **extra}
+    return ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels.items()
+    )
@@ -0,0 +1,365 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from moyklass_api.client import MoyklassApi
+from moyklass_api.lesson import Lesson
+from moyklass_api.payment import Payment
+from moyklass_api.user import User
+
+BATCH_SIZE = 500
+DEFAULT_LESSON_LOOKBACK_DAYS = 7
+DEFAULT_LESSON_HORIZON_DAYS = 30
+DEFAULT_LESSON_HISTORY_DAYS = 365
+
+# entity -> indexed columns: column name -> record field
+ENTITY_COLUMNS = {
+    "users": {"updated_at": "updatedAt", "phone": "phone", "email": "email"},
+    "payments": {"user_id": "userId", "date": "date", "created_at": "createdAt"},
+    "lessons": {"date": "date", "class_id": "classId"},
+}
+
+
+def _day(value: str | None) -> str | None:
+    """
+    Returns the date part of an ISO 8601 date or datetime.
+
+    Args:
+        value (str, optional): Date, e.g. "2024-01-24T10:00:00.000Z".
+
+    Returns:
+        str: Date in YYYY-MM-DD format or None.
+    """
+    return value[:10] if value else None
+
+
+def _today() -> date:
+    """
+    Returns the current date in UTC, the time zone of the API dates.
+
+    Returns:
+        date: Current UTC date.
+    """
+    return datetime.now(timezone.utc).date()
+
+
+def _latest(*values: str | None) -> str | None:
+    """
+    Returns the latest of the dates ignoring missing ones.
+
+    Returns:
+        str: Latest date or None.
+    """
+    present = [value for value in values if value]
+    return max(present) if present else None
+
+
+class SqliteMirror:
+    def __init__(
+        self,
+        client: "MoyklassApi",
+        path: str,
+        workers: int = 1,
+        lesson_lookback_days: int = DEFAULT_LESSON_LOOKBACK_DAYS,
+        lesson_horizon_days: int = DEFAULT_LESSON_HORIZON_DAYS,
+        lesson_history_days: int | None = DEFAULT_LESSON_HISTORY_DAYS,
+    ) -> None:
+        """
+        Local SQLite copy of users, payments and lessons kept up to date incrementally.
+
+        The first sync of users and payments loads all records, the first
+        sync of lessons loads lesson_history_days back from today. Every next
+        sync only requests records changed since the stored high-water mark:
+        users by updatedAt, payments by createdAt, lessons by date starting
+        lesson_lookback_days before the latest stored past lesson to catch
+        changed attendance. Dates are compared in UTC like on the server.
+        Records are stored as JSON together with a few indexed columns, so
+        reports can query them locally.
+
+        Payments changed after their creation (amount, date, cancellation)
+        are not picked up by incremental syncs, since the API filters them by
+        createdAt only; run sync_payments(full=True) to refresh them.
+
+        Args:
+            client (MoyklassApi): API client.
+            path (str): Path of the SQLite database file.
+            workers (int, optional): Number of pages requested concurrently. Defaults to 1.
+            lesson_lookback_days (int, optional): How many days before the lesson checkpoint are synced again. Defaults to 7.
+            lesson_horizon_days (int, optional): How many days ahead of today scheduled lessons are synced. Defaults to 30.
+            lesson_history_days (int, optional): How many days before today the first or a full lessons sync starts,
+                None loads all lessons. Defaults to 365.
+        """
+        self.client = client
+        self.path = path
+        self.workers = workers
+        self.lesson_lookback_days = lesson_lookback_days
+        self.lesson_horizon_days = lesson_horizon_days
+        self.lesson_history_days = lesson_history_days
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self._db:
+            for entity, columns in ENTITY_COLUMNS.items():
+                extra = "".join(f", {column} TEXT" for column in columns)
+                self._db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {entity} "
+                    f"(id INTEGER PRIMARY KEY, data TEXT NOT NULL{extra})"
+                )
+                for column in columns:
+                    self._db.execute(
+                        f"CREATE INDEX IF NOT EXISTS {entity}_{column} "
+                        f"ON {entity} ({column})"
+                    )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints "
+                "(entity TEXT PRIMARY KEY, high_water TEXT, synced_at REAL)"
+            )
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        self._db.close()
+
+    def get_checkpoint(self, entity: str) -> str | None:
+        """
+        Returns the high-water mark of the entity.
+
+        Args:
+            entity (str): "users", "payments" or "lessons".
+
+        Returns:
+            str: Date in YYYY-MM-DD format or None if the entity was never synced.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT high_water FROM checkpoints WHERE entity = ?", (entity,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def reset(self, entity: str) -> None:
+        """
+        Removes the checkpoint of the entity, so the next sync is a full load.
+
+        Args:
+            entity (str): "users", "payments" or "lessons".
+        """
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM checkpoints WHERE entity = ?", (entity,))
+
+    def sync_users(self, full: bool = False) -> int:
+        """
+        Loads users created or updated since the last sync.
+
+        Args:
+            full (bool, optional): Ignore the checkpoint and load all users. Defaults to False.
+
+        Returns:
+            int: Number of stored records.
+        """
+        checkpoint = None if full else self.get_checkpoint("users")
+        filters = {}
+        if checkpoint is not None:
+            filters["updated_at"] = [checkpoint, _today().isoformat()]
+
+        records = User(self.client).iter_users(workers=self.workers, **filters)
+        count, high_water = self._store("users", records, "updatedAt")
+        self._set_checkpoint("users", _latest(checkpoint, high_water))
+        return count
+
+    def sync_payments(self, full: bool = False) -> int:
+        """
+        Loads payments created since the last sync.
+
+        Payments edited after the last sync are only updated by a full sync.
+
+        Args:
+            full (bool, optional): Ignore the checkpoint and load all payments. Defaults to False.
+
+        Returns:
+            int: Number of stored records.
+        """
+        checkpoint = None if full else self.get_checkpoint("payments")
+        filters = {}
+        if checkpoint is not None:
+            filters["created_at"] = [checkpoint, _today().isoformat()]
+
+        records = Payment(self.client).iter_payments(workers=self.workers, **filters)
+        count, high_water = self._store("payments", records, "createdAt")
+        self._set_checkpoint("payments", _latest(checkpoint, high_water))
+        return count
+
+    def sync_lessons(self, full: bool = False, **filters: Any) -> int:
+        """
+        Loads lessons from lesson_lookback_days before the last sync up to lesson_horizon_days ahead.
+
+        The checkpoint is the latest stored lesson date up to today, so
+        scheduled lessons do not move it into the future.
+
+        Args:
+            full (bool, optional): Ignore the checkpoint and load lessons from lesson_history_days back. Defaults to False.
+            **filters: Additional filters of get_lessons (e.g. include_records=True).
+
+        Returns:
+            int: Number of stored records.
+        """
+        checkpoint = None if full else self.get_checkpoint("lessons")
+        today = _today()
+        until = today + timedelta(days=self.lesson_horizon_days)
+        since = None
+        if checkpoint is not None:
+            since = date.fromisoformat(checkpoint) - timedelta(
+                days=self.lesson_lookback_days
+            )
+        elif self.lesson_history_days is not None:
+            since = today - timedelta(days=self.lesson_history_days)
+        if since is not None:
+            filters["date"] = [since.isoformat(), until.isoformat()]
+
+        records = Lesson(self.client).iter_lessons(workers=self.workers, **filters)
+        count, high_water = self._store("lessons", records, "date")
+        if high_water is not None:
+            high_water = min(high_water, today.isoformat())
+        self._set_checkpoint("lessons", _latest(checkpoint, high_water))
+        return count
+
+    def sync(self, full: bool = False) -> Dict[str, int]:
+        """
+        Syncs users, payments and lessons.
+
+        Args:
+            full (bool, optional): Ignore the checkpoints and load everything. Defaults to False.
+
+        Returns:
+            Dict[str, int]: Entity -> number of stored records.
+        """
+        return {
+            "users": self.sync_users(full=full),
+            "payments": self.sync_payments(full=full),
+            "lessons": self.sync_lessons(full=full),
+        }
+
+    def get(self, entity: str, record_id: int) -> Dict[str, Any] | None:
+        """
+        Returns a stored record by ID.
+
+        Args:
+            entity (str): "users", "payments" or "lessons".
+            record_id (int): Record ID.
+
+        Returns:
+            Dict[str, Any]: Record or None.
+        """
+        self._check_entity(entity)
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT data FROM {entity} WHERE id = ?", (record_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def select(
+        self, entity: str, where: str = "", params: Iterable[Any] = ()
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields stored records matching an SQL condition.
+
+        The condition may use the id column and the indexed columns of the
+        entity (users: updated_at, phone, email; payments: user_id, date,
+        created_at; lessons: date, class_id), e.g.
+        ``mirror.select("payments", "user_id = ? AND date >= ?", [42, "2024-01-01"])``.
+
+        Args:
+            entity (str): "users", "payments" or "lessons".
+            where (str, optional): SQL condition with ? placeholders. Defaults to "" (all records).
+            params (Iterable[Any], optional): Values of the placeholders. Defaults to ().
+
+        Yields:
+            Dict[str, Any]: Records ordered by ID.
+        """
+        self._check_entity(entity)
+        sql = f"SELECT data FROM {entity}"
+        if where:
+            sql += f" WHERE {where}"
+        sql += " ORDER BY id"
+
+        with self._lock:
+            rows = self._db.execute(sql, tuple(params)).fetchall()
+        for row in rows:
+            yield json.loads(row[0])
+
+    def count(self, entity: str) -> int:
+        """
+        Returns the number of stored records of the entity.
+
+        Args:
+            entity (str): "users", "payments" or "lessons".
+
+        Returns:
+            int: Number of records.
+        """
+        self._check_entity(entity)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM {entity}").fetchone()[0]
+
+    def _check_entity(self, entity: str) -> None:
+        if entity not in ENTITY_COLUMNS:
+            raise ValueError(f"Unknown entity: {entity}")
+
+    def _store(
+        self, entity: str, records: Iterable[Dict[str, Any]], cursor_field: str | None
+    ) -> Tuple[int, str | None]:
+        """
+        Upserts records in batches.
+
+        Args:
+            entity (str): "users", "payments" or "lessons".
+            records (Iterable[Dict[str, Any]]): Records returned by the API.
+            cursor_field (str, optional): Field whose maximum becomes the new high-water mark.
+
+        Returns:
+            Tuple[int, str | None]: Number of stored records and the maximum date of cursor_field.
+        """
+        columns = ENTITY_COLUMNS[entity]
+        names = ", ".join(["id", "data", *columns])
+        placeholders = ", ".join("?" * (len(columns) + 2))
+        sql = f"INSERT OR REPLACE INTO {entity} ({names}) VALUES ({placeholders})"
+
+        count = 0
+        high_water = None
+        batch: List[Tuple[Any, ...]] = []
+        for record in records:
+            batch.append(
+                (
+                    record["id"],
+                    json.dumps(record, ensure_ascii=False),
+                    *(record.get(field) for field in columns.values()),
+                )
+            )
+            if cursor_field is not None:
+                day = _day(record.get(cursor_field))
+                if day is not None and (high_water is None or day > high_water):
+                    high_water = day
+            if len(batch) >= BATCH_SIZE:
+                count += self._write(sql, batch)
+                batch = []
+
+        if batch:
+            count += self._write(sql, batch)
+        return count, high_water
+
+    def _write(self, sql: str, batch: List[Tuple[Any, ...]]) -> int:
+        with self._lock, self._db:
+            self._db.executemany(sql, batch)
+        return len(batch)
+
+    def _set_checkpoint(self, entity: str, high_water: str | None) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+                (entity, high_water, time.time()),
+            )
@@ -0,0 +1,399 @@
+"""
+Typed models of the records returned by the API.
+
+The models keep the fields in ``__slots__`` instead of a per-record ``dict``
+and share equal values of low-cardinality keys such as dates, which makes
+them noticeably smaller when many records are held in memory (see
+``python -m benchmarks.models``). Attribute names are the snake_case
+versions of the API keys (``userId`` -> ``user_id``), keys unknown to a
+model are kept in ``extra``. Nested lists, such as lesson records or payment
+invoices, stay raw until the attribute is read for the first time.
+"""
+import re
+import sys
+from typing import Any, Callable, Dict, Iterable, Tuple, Type, TypeVar
+
+from moyklass_api.projection import projector
+
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+M = TypeVar("M", bound="Model")
+
+# Keys whose values repeat across many records; equal strings are shared
+INTERNED_KEYS = frozenset(
+    (
+        "date",
+        "optype",
+        "beginTime",
+        "endTime",
+        "sellDate",
+        "beginDate",
+        "endDate",
+        "payUntil",
+        "period",
+    )
+)
+
+
+def snake_case(name: str) -> str:
+    """
+    Converts an API key to the attribute name of a model.
+
+    Args:
+        name (str): API key, e.g. "paymentTypeId".
+
+    Returns:
+        str: Attribute name, e.g. "payment_type_id".
+    """
+    return _CAMEL_BOUNDARY.sub("_", name).lower()
+
+
+def _slots(fields: Tuple[str, ...], nested: Tuple[str, ...] = ()) -> Tuple[str, ...]:
+    return tuple(snake_case(key) for key in fields) + tuple(
+        "_" + snake_case(key) for key in nested
+    )
+
+
+class Nested:
+    def __init__(self, model: Type["Model"]) -> None:
+        """
+        Attribute holding nested records that are converted to a model on first access.
+
+        Args:
+            model (Type[Model]): Model of the nested records.
+        """
+        self.model = model
+        self.slot = None
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.slot = "_" + name
+
+    def __get__(self, obj: Any, owner: type | None = None) -> Any:
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if isinstance(value, list):
+            value = tuple(
+                self.model.from_dict(item) if isinstance(item, dict) else item
+                for item in value
+            )
+        elif isinstance(value, dict):
+            value = self.model.from_dict(value)
+        else:
+            return value
+        setattr(obj, self.slot, value)
+        return value
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        setattr(obj, self.slot, value)
+
+
+class Model:
+    __slots__ = ("extra",)
+
+    # API keys of plain fields and of fields holding nested records
+    _fields: Tuple[str, ...] = ()
+    _nested: Tuple[str, ...] = ()
+    # API key -> slot name, filled for every subclass
+    _keys: Dict[str, str] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._keys = {key: snake_case(key) for key in cls._fields}
+        cls._keys.update({key: "_" + snake_case(key) for key in cls._nested})
+
+    @classmethod
+    def from_dict(cls: Type[M], data: Dict[str, Any]) -> M:
+        """
+        Creates a model from a record returned by the API.
+
+        Args:
+            data (Dict[str, Any]): Record.
+
+        Returns:
+            Model: Model instance.
+        """
+        obj = cls.__new__(cls)
+        for slot in cls._keys.values():
+            setattr(obj, slot, None)
+        extra = None
+        keys = cls._keys
+        for key, value in data.items():
+            slot = keys.get(key)
+            if slot is not None:
+                if key in INTERNED_KEYS and type(value) is str:
+                    value = sys.intern(value)
+                setattr(obj, slot, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        obj.extra = extra
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Converts the model back to the record format of the API.
+
+        Returns:
+            Dict[str, Any]: Record with the API keys, fields absent from the original record are None.
+        """
+        data = {}
+        for key, slot in self._keys.items():
+            value = getattr(self, slot)
+            if isinstance(value, Model):
+                value = value.to_dict()
+            elif isinstance(value, tuple):
+                value = [
+                    item.to_dict() if isinstance(item, Model) else item
+                    for item in value
+                ]
+            data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{snake_case(key)}={getattr(self, snake_case(key))!r}"
+            for key in self._fields[:4]
+        )
+        return f"{type(self).__name__}({fields}, ...)"
+
+
+class UserAttribute(Model):
+    _fields = ("attributeId", "attributeAlias", "value")
+    __slots__ = _slots(_fields)
+
+
+class User(Model):
+    _fields = (
+        "id",
+        "name",
+        "email",
+        "phone",
+        "createdAt",
+        "updatedAt",
+        "stateChangedAt",
+        "clientStateId",
+        "advSourceId",
+        "createSourceId",
+        "statusChangeReasonId",
+        "filials",
+        "responsibles",
+        "balans",
+    )
+    _nested = ("attributes",)
+    __slots__ = _slots(_fields, _nested)
+
+    attributes = Nested(UserAttribute)
+
+
+class Subscription(Model):
+    _fields = (
+        "id",
+        "name",
+        "price",
+        "visitCount",
+        "period",
+        "groupingId",
+        "courseIds",
+        "classIds",
+        "externalId",
+    )
+    __slots__ = _slots(_fields)
+
+
+class UserSubscription(Model):
+    _fields = (
+        "id",
+        "userId",
+        "subscriptionId",
+        "statusId",
+        "sellDate",
+        "beginDate",
+        "endDate",
+        "price",
+        "originalPrice",
+        "discount",
+        "period",
+        "visitCount",
+        "visitedCount",
+        "mainClassId",
+        "classIds",
+        "courseIds",
+        "externalId",
+        "managerId",
+        "payed",
+        "comment",
+        "createdAt",
+    )
+    __slots__ = _slots(_fields)
+
+
+class Invoice(Model):
+    _fields = (
+        "id",
+        "userId",
+        "userSubscriptionId",
+        "price",
+        "payed",
+        "payUntil",
+        "createdAt",
+    )
+    __slots__ = _slots(_fields)
+
+
+class Payment(Model):
+    _fields = (
+        "id",
+        "userId",
+        "date",
+        "summa",
+        "optype",
+        "paymentTypeId",
+        "filialId",
+        "invoiceId",
+        "comment",
+        "createdAt",
+    )
+    _nested = ("invoices", "userSubscriptions")
+    __slots__ = _slots(_fields, _nested)
+
+    invoices = Nested(Invoice)
+    user_subscriptions = Nested(UserSubscription)
+
+
+class LessonRecord(Model):
+    _fields = (
+        "id",
+        "userId",
+        "lessonId",
+        "userSubscriptionId",
+        "visit",
+        "goodReason",
+        "free",
+        "test",
+        "bill",
+        "createdAt",
+    )
+    __slots__ = _slots(_fields)
+
+
+class Lesson(Model):
+    _fields = (
+        "id",
+        "date",
+        "beginTime",
+        "endTime",
+        "createdAt",
+        "filialId",
+        "roomId",
+        "classId",
+        "status",
+        "comment",
+        "maxStudents",
+        "topic",
+        "description",
+        "teacherIds",
+    )
+    _nested = ("records", "userSubscriptions")
+    __slots__ = _slots(_fields, _nested)
+
+    records = Nested(LessonRecord)
+    user_subscriptions = Nested(UserSubscription)
+
+
+def item_parser(
+    model: Type[Model] | None, fields: Iterable[str] | None = None
+) -> Callable[[Any], Any] | None:
+    """
+    Builds a function converting a record of a list to the requested form.
+
+    Args:
+        model (Type[Model], optional): Model of the records, None keeps dictionaries.
+        fields (Iterable[str], optional): Paths of the keys to keep, e.g. ["id", "records.userId"]. Defaults to None (all keys).
+
+    Returns:
+        Callable[[Any], Any]: Function taking a decoded record, or None if the record is kept as is.
+    """
+    if fields is None:
+        return model.from_dict if model is not None else None
+
+    project = projector(fields)
+    if model is None:
+        return project
+    return lambda item: model.from_dict(project(item))
+
+
+def page_parser(
+    model: Type[Model] | None, items_key: str, fields: Iterable[str] | None = None
+) -> Callable[[Any], Any] | None:
+    """
+    Builds a function converting the records of a list page to models.
+
+    The page is decoded whole before its records are projected, so fields cuts
+    the memory kept after the call but not the peak while decoding; streamed
+    reads project every record as soon as it is decoded.
+
+    Args:
+        model (Type[Model], optional): Model of the records, None keeps dictionaries.
+        items_key (str): Key of the list in the response, e.g. "payments".
+        fields (Iterable[str], optional): Paths of the keys to keep, e.g. ["id", "records.userId"]. Defaults to None (all keys).
+
+    Returns:
+        Callable[[Any], Any]: Function taking the decoded page and returning it with the records converted,
+            or None if the page is kept as is.
+    """
+    parse_item = item_parser(model, fields)
+    if parse_item is None:
+        return None
+
+    def parse(page: Any) -> Any:
+        if isinstance(page, dict) and isinstance(page.get(items_key), list):
+            page[items_key] = [parse_item(item) for item in page[items_key]]
+        return page
+
+    return parse
+
+
+def chain(
+    first: Callable[[Any], Any] | None, second: Callable[[Any], Any] | None
+) -> Callable[[Any], Any] | None:
+    """
+    Builds a function applying two transforms one after the other.
+
+    Args:
+        first (Callable[[Any], Any], optional): Transform applied first, None to skip it.
+        second (Callable[[Any], Any], optional): Transform applied to the result of first, None to skip it.
+
+    Returns:
+        Callable[[Any], Any] | None: Combined transform, or None if both are None.
+    """
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return lambda data: second(first(data))
+
+
+def record_parser(model: Type[Model]) -> Callable[[Any], Any]:
+    """
+    Builds a function converting a single record response to a model.
+
+    Args:
+        model (Type[Model]): Model of the record.
+
+    Returns:
+        Callable[[Any], Any]: Function taking the decoded record and returning the model.
+    """
+
+    def parse(record: Any) -> Any:
+        return model.from_dict(record) if isinstance(record, dict) else record
+
+    return parse
@@ -0,0 +1,279 @@
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List
+
+from moyklass_api.client import THROTTLE_STATUS_CODES, MoyklassApi, MoyklassApiException
+from moyklass_api.streaming import ItemStream
+
+MAX_PAGE_SIZE = 500
+
+
+def _is_last_page(page: Dict[str, Any], count: int, offset: int, limit: int) -> bool:
+    """
+    Checks whether there are no more pages after the current one.
+
+    Args:
+        page (Dict[str, Any]): Response of a list endpoint.
+        count (int): Number of items in the page.
+        offset (int): Offset of the next page.
+        limit (int): Requested page size.
+
+    Returns:
+        bool: True if the page is the last one.
+    """
+    if count == 0 or count < limit:
+        return True
+
+    total = (page.get("stats") or {}).get("totalItems")
+    return total is not None and offset >= total
+
+
+def _fetch_page(
+    fetch: Callable[[int, int], Dict[str, Any] | ItemStream],
+    offset: int,
+    limit: int,
+    items_key: str,
+    client: MoyklassApi | None = None,
+) -> tuple:
+    """
+    Fetches a page and reads all its items, also if the response is streamed.
+
+    Args:
+        fetch (Callable[[int, int], Dict[str, Any] | ItemStream]): Function returning the page for the given offset and limit.
+        offset (int): Offset of the page.
+        limit (int): Page size.
+        items_key (str): Key of the items list in the response (e.g. "payments").
+        client (MoyklassApi, optional): Client of fetch, which then raises on 429 and 503 instead of repeating the request. Defaults to None.
+
+    Returns:
+        tuple: Items of the page and the response without them.
+    """
+    if client is not None:
+        with client.report_throttling():
+            return _fetch_page(fetch, offset, limit, items_key)
+
+    page = fetch(offset, limit)
+    if isinstance(page, ItemStream):
+        items = list(page)
+        return items, page.meta
+    return page.get(items_key) or [], page
+
+
+def iter_pages(
+    fetch: Callable[[int, int], Dict[str, Any]],
+    items_key: str,
+    offset: int = 0,
+    limit: int = MAX_PAGE_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields items of a paginated list endpoint page by page.
+
+    Only one page is kept in memory at a time. If fetch returns an
+    ItemStream (get_* called with stream=True), only one item is.
+
+    Args:
+        fetch (Callable[[int, int], Dict[str, Any]]): Function returning the page for the given offset and limit.
+        items_key (str): Key of the items list in the response (e.g. "payments").
+        offset (int, optional): Offset of the first item. Defaults to 0.
+        limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+
+    Yields:
+        Dict[str, Any]: Items of the list.
+    """
+    while True:
+        page = fetch(offset, limit)
+        if isinstance(page, ItemStream):
+            count = 0
+            for item in page:
+                count += 1
+                yield item
+            offset += count
+            if _is_last_page(page.meta, count, offset, limit):
+                return
+            continue
+
+        items = page.get(items_key) or []
+        offset += len(items)
+        last = _is_last_page(page, len(items), offset, limit)
+        del page
+
+        yield from items
+        if last:
+            return
+
+
+def iter_pages_parallel(
+    fetch: Callable[[int, int], Dict[str, Any]],
+    items_key: str,
+    offset: int = 0,
+    limit: int = MAX_PAGE_SIZE,
+    workers: int = 4,
+    ordered: bool = True,
+    throttle_delay: float = 1.0,
+    max_throttle_retries: int = 5,
+    client: MoyklassApi | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields items of a paginated list endpoint fetching pages concurrently.
+
+    The first page is fetched alone to learn the total number of items, the
+    remaining pages are requested by a thread pool. When the server answers
+    with 429 or 503 the number of concurrent requests is halved and the page
+    is requested again after a delay; successful pages grow it back one by one
+    up to workers. Streamed pages are read completely before they are yielded.
+    With client given, the client does not repeat throttled pages itself, so
+    the first 429 reaches the pool at once.
+
+    Args:
+        fetch (Callable[[int, int], Dict[str, Any]]): Thread-safe function returning the page for the given offset and limit.
+        items_key (str): Key of the items list in the response (e.g. "payments").
+        offset (int, optional): Offset of the first item. Defaults to 0.
+        limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+        workers (int, optional): Maximum number of concurrent requests. Defaults to 4.
+        ordered (bool, optional): Yield pages in offset order, otherwise as soon as they arrive. Defaults to True.
+        throttle_delay (float, optional): Initial delay in seconds before repeating a throttled request. Defaults to 1.0.
+        max_throttle_retries (int, optional): How many times a throttled page is requested again before giving up. Defaults to 5.
+        client (MoyklassApi, optional): Client of fetch. Defaults to None (the client repeats throttled requests on its own).
+
+    Yields:
+        Dict[str, Any]: Items of the list.
+    """
+    items, page = _fetch_page(fetch, offset, limit, items_key)
+    total = (page.get("stats") or {}).get("totalItems")
+    next_offset = offset + len(items)
+    del page
+
+    yield from items
+    if total is None and len(items) == limit:
+        yield from iter_pages(fetch, items_key, offset=next_offset, limit=limit)
+        return
+    if not items or len(items) < limit or next_offset >= total:
+        return
+
+    pending = deque(range(next_offset, total, limit))
+    throttled = {}
+    concurrency = workers
+    in_flight: Dict[Future, int] = {}
+    buffered: Dict[int, List[Dict[str, Any]]] = {}
+    next_to_yield = next_offset
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while pending or in_flight:
+                while (
+                    pending
+                    and len(in_flight) < concurrency
+                    and (not in_flight or len(in_flight) + len(buffered) < workers)
+                ):
+                    page_offset = pending.popleft()
+                    future = executor.submit(
+                        _fetch_page, fetch, page_offset, limit, items_key, client
+                    )
+                    in_flight[future] = page_offset
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                backoff = 0.0
+                for future in done:
+                    page_offset = in_flight.pop(future)
+                    try:
+                        page_items, page = future.result()
+                    except MoyklassApiException as err:
+                        if err.status_code not in THROTTLE_STATUS_CODES:
+                            raise
+                        attempt = throttled.get(page_offset, 0) + 1
+                        if attempt > max_throttle_retries:
+                            raise
+                        throttled[page_offset] = attempt
+                        pending.appendleft(page_offset)
+                        backoff = max(backoff, throttle_delay * 2 ** (attempt - 1))
+                        continue
+
+                    throttled.pop(page_offset, None)
+                    del page
+
+                    if not ordered:
+                        yield from page_items
+                        continue
+
+                    buffered[page_offset] = page_items
+                    while next_to_yield in buffered:
+                        yield from buffered.pop(next_to_yield)
+                        next_to_yield += limit
+
+                if backoff:
+                    concurrency = max(1, concurrency // 2)
+                    time.sleep(backoff)
+                else:
+                    concurrency = min(workers, concurrency + 1)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+def paginate(
+    fetch: Callable[[int, int], Dict[str, Any]],
+    items_key: str,
+    offset: int = 0,
+    limit: int = MAX_PAGE_SIZE,
+    workers: int = 1,
+    ordered: bool = True,
+    client: MoyklassApi | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterates over a paginated list endpoint sequentially or, if workers is greater than 1, concurrently.
+
+    Args:
+        fetch (Callable[[int, int], Dict[str, Any]]): Function returning the page for the given offset and limit.
+        items_key (str): Key of the items list in the response (e.g. "payments").
+        offset (int, optional): Offset of the first item. Defaults to 0.
+        limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+        workers (int, optional): Number of concurrent requests. Defaults to 1.
+        ordered (bool, optional): Keep offset order when fetching concurrently. Defaults to True.
+        client (MoyklassApi, optional): Client of fetch, lets concurrent fetching see throttling at once. Defaults to None.
+
+    Returns:
+        Iterator[Dict[str, Any]]: Items of the list.
+    """
+    if workers > 1:
+        return iter_pages_parallel(
+            fetch,
+            items_key,
+            offset=offset,
+            limit=limit,
+            workers=workers,
+            ordered=ordered,
+            client=client,
+        )
+    return iter_pages(fetch, items_key, offset=offset, limit=limit)
+
+
+async def aiter_pages(
+    fetch: Callable[[int, int], Awaitable[Dict[str, Any]]],
+    items_key: str,
+    offset: int = 0,
+    limit: int = MAX_PAGE_SIZE,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Asynchronous version of iter_pages.
+
+    Args:
+        fetch (Callable[[int, int], Awaitable[Dict[str, Any]]]): Coroutine function returning the page for the given offset and limit.
+        items_key (str): Key of the items list in the response (e.g. "payments").
+        offset (int, optional): Offset of the first item. Defaults to 0.
+        limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+
+    Yields:
+        Dict[str, Any]: Items of the list.
+    """
+    while True:
+        page = await fetch(offset, limit)
+        items = page.get(items_key) or []
+        offset += len(items)
+        last = _is_last_page(page, len(items), offset, limit)
+        del page
+
+        for item in items:
+            yield item
+        if last:
+            return
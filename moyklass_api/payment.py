@@ -1,7 +1,21 @@
+import inspect
+import threading
 from enum import Enum
-from typing import Any, Dict, List
-
-from moyklass_api.client import MoyklassApi
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set
+
+from moyklass_api import models
+from moyklass_api.bulk import BulkJournal, BulkReport, BulkRowResult, BulkStatus
+from moyklass_api.client import MoyklassApi, MoyklassApiException
+from moyklass_api.concurrency import map_bounded
+from moyklass_api.models import item_parser, page_parser
+from moyklass_api.pagination import MAX_PAGE_SIZE, paginate
+from moyklass_api.sharding import (
+    DEFAULT_SHARD_ITEMS,
+    ShardCheckpoint,
+    iter_sharded,
+    query_key,
+    sharded_filters,
+)
 
 
 class PaymentOptype(Enum):
@@ -28,6 +42,9 @@ class Payment:
         append_invoices: bool = False,
         offset: int = 0,
         limit: int = 100,
+        as_model: bool = False,
+        stream: bool = False,
+        fields: List[str] | None = None,
     ) -> Dict[str, Any]:
         """
         Retrieves payment information from the Moyklass API.
@@ -45,6 +62,10 @@ class Payment:
             append_invoices (bool): Append invoices to the response. Defaults to False.
             offset (int, optional): Offset for pagination. Defaults to 0.
             limit (int, optional): Limit for pagination. Defaults to 100.
+            as_model (bool, optional): Return payments as models.Payment instead of dictionaries. Defaults to False.
+            stream (bool, optional): Return an ItemStream yielding payments while the response is downloaded instead of the whole page. Defaults to False.
+            fields (List[str], optional): Keys to keep in every record, nested ones as paths like "records.userId".
+                Without stream the page is still decoded whole before projection. Defaults to None (all keys).
 
         Returns:
             Dict[str, Any]: Response data from the Moyklass API.
@@ -88,7 +109,104 @@ class Payment:
         params["offset"] = offset
         params["limit"] = limit
 
-        return self.client._make_request("GET", "v1/company/payments", params=params)
+        model = models.Payment if as_model else None
+        if stream:
+            return self.client._stream_request(
+                "GET",
+                "v1/company/payments",
+                "payments",
+                params=params,
+                transform=item_parser(model, fields),
+            )
+
+        return self.client._make_request(
+            "GET",
+            "v1/company/payments",
+            params=params,
+            transform=page_parser(model, "payments", fields),
+        )
+
+    def iter_payments(
+        self,
+        limit: int = MAX_PAGE_SIZE,
+        workers: int = 1,
+        ordered: bool = True,
+        **filters: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterates over all payments matching the filters, fetching them page by page.
+
+        Args:
+            limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+            workers (int, optional): Number of pages requested concurrently. Defaults to 1.
+            ordered (bool, optional): Keep the server order when workers is greater than 1, otherwise yield pages as they arrive. Defaults to True.
+            **filters: Any argument of get_payments (e.g. date, user_id, offset, as_model, stream, fields).
+
+        Yields:
+            Dict[str, Any] | models.Payment: Payment.
+        """
+        offset = filters.pop("offset", 0)
+
+        def fetch(offset: int, limit: int) -> Dict[str, Any]:
+            return self.get_payments(offset=offset, limit=limit, **filters)
+
+        return paginate(
+            fetch,
+            "payments",
+            offset=offset,
+            limit=limit,
+            workers=workers,
+            ordered=ordered,
+            client=self.client,
+        )
+
+    def iter_payments_sharded(
+        self,
+        date: List[str],
+        workers: int = 4,
+        shard_items: int = DEFAULT_SHARD_ITEMS,
+        checkpoint: ShardCheckpoint | None = None,
+        limit: int = MAX_PAGE_SIZE,
+        **filters: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterates over all payments of a long date range fetching its parts concurrently.
+
+        The range is split into days, weeks or months of about shard_items
+        payments each, the parts are fetched concurrently and the payments are
+        yielded in date order without duplicates (a fields projection always
+        keeps date and id for that). Parts whose payments were all consumed are
+        recorded in the checkpoint, so a re-run with the same filters
+        continues with the remaining dates.
+
+        Args:
+            date (List[str]): First and last date in YYYY-MM-DD format.
+            workers (int, optional): Number of parts fetched concurrently. Defaults to 4.
+            shard_items (int, optional): Desired number of payments per part. Defaults to 2000.
+            checkpoint (ShardCheckpoint, optional): Journal of finished parts, pass one with a file path to resume interrupted exports. Defaults to None.
+            limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+            **filters: Any other argument of get_payments (e.g. user_id, as_model, fields).
+
+        Yields:
+            Dict[str, Any] | models.Payment: Payment.
+        """
+        filters.pop("offset", None)
+        filters.pop("stream", None)
+        filters = sharded_filters(filters)
+
+        def fetch(date: List[str], offset: int, limit: int) -> Dict[str, Any]:
+            return self.get_payments(date=date, offset=offset, limit=limit, **filters)
+
+        return iter_sharded(
+            fetch,
+            "payments",
+            date,
+            workers=workers,
+            limit=limit,
+            shard_items=shard_items,
+            checkpoint=checkpoint,
+            query=query_key("v1/company/payments", filters),
+        )
 
     def get_payment_types(self) -> List[Dict[str, Any]]:
         """
@@ -161,3 +279,142 @@ class Payment:
             data["cashboxId"] = cashbox_id
 
         return self.client._make_request("POST", "v1/company/payments", data=data)
+
+    def create_payments_bulk(
+        self,
+        payments: Iterable[Dict[str, Any]],
+        workers: int = 4,
+        journal: BulkJournal | None = None,
+        key: Callable[[Dict[str, Any]], str] | None = None,
+        max_attempts: int = 2,
+    ) -> BulkReport:
+        """
+        Creates many payments concurrently and reports the result of every row.
+
+        Each row is a dictionary of create_payments arguments. Rows are taken
+        from the iterable lazily and sent by up to workers threads sharing the
+        client's rate limit.
+
+        Identical rows are normal (two equal payments of a user on one day in
+        a bank statement), so without key every row is created, and a row
+        whose request failed in a way that leaves its outcome unknown
+        (connection error, timeout, 5xx) is reported as failed instead of
+        being sent again. With key, e.g. the bank transaction ID, a row whose
+        key is in the journal or repeats an earlier row of the input is
+        skipped, and after an unknown outcome the payment is looked up by
+        user, date and amount before it is sent again. The lookup only takes
+        a match if it is the single one not recorded in the journal for
+        another key. A row with arguments create_payments does not accept or
+        whose key cannot be computed is reported as failed without a request.
+
+        Args:
+            payments (Iterable[Dict[str, Any]]): Rows with create_payments arguments.
+            workers (int, optional): Number of concurrent requests. Defaults to 4.
+            journal (BulkJournal, optional): Journal of written rows by key, pass one with a file path to make re-runs safe. Defaults to an in-memory journal.
+            key (Callable[[Dict[str, Any]], str], optional): Function returning the unique key of a row. Defaults to None (no deduplication).
+            max_attempts (int, optional): Number of attempts for a row with a key whose outcome is unknown. Defaults to 2.
+
+        Returns:
+            BulkReport: Result of every row ordered by input index.
+        """
+        journal = journal if journal is not None else BulkJournal()
+        seen = set()
+        seen_lock = threading.Lock()
+        signature = inspect.signature(self.create_payments)
+
+        def process(row: tuple) -> BulkRowResult:
+            index, spec = row
+            # Only the arguments are checked here, a TypeError raised while
+            # sending the row is a bug and is not reported as a bad row
+            try:
+                signature.bind(**spec)
+            except TypeError as err:
+                return BulkRowResult(
+                    index, None, BulkStatus.FAILED, error=f"Invalid row: {err}"
+                )
+            try:
+                row_key = key(spec) if key is not None else None
+            except Exception as err:
+                return BulkRowResult(
+                    index, None, BulkStatus.FAILED, error=f"Invalid key: {err!r}"
+                )
+            if row_key is not None:
+                if row_key in journal:
+                    return BulkRowResult(
+                        index, row_key, BulkStatus.SKIPPED, journal.get(row_key)
+                    )
+                with seen_lock:
+                    if row_key in seen:
+                        return BulkRowResult(
+                            index, row_key, BulkStatus.SKIPPED, error="Duplicate row"
+                        )
+                    seen.add(row_key)
+
+            error = None
+            attempts = max_attempts if row_key is not None else 1
+            for attempt in range(attempts):
+                try:
+                    if attempt > 0:
+                        matches = self._find_payment(spec, journal.record_ids())
+                        if len(matches) > 1:
+                            error = f"{error}; several matching payments"
+                            break
+                        if matches:
+                            record_id = matches[0]["id"]
+                            journal.record(row_key, record_id)
+                            return BulkRowResult(
+                                index, row_key, BulkStatus.CREATED, record_id
+                            )
+                    response = self.create_payments(**spec)
+                except MoyklassApiException as err:
+                    error = str(err)
+                    if err.status_code is not None and err.status_code < 500:
+                        break
+                    continue
+
+                record_id = response.get("id") if isinstance(response, dict) else None
+                if row_key is not None:
+                    journal.record(row_key, record_id)
+                return BulkRowResult(index, row_key, BulkStatus.CREATED, record_id)
+
+            return BulkRowResult(index, row_key, BulkStatus.FAILED, error=error)
+
+        results = map_bounded(process, enumerate(payments), workers)
+        return BulkReport(sorted(results, key=lambda row: row.index))
+
+    def _find_payment(
+        self, spec: Dict[str, Any], exclude: Set[int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Looks for existing payments matching a create_payments row.
+
+        Args:
+            spec (Dict[str, Any]): Row with create_payments arguments.
+            exclude (Set[int]): IDs of payments already written for other rows.
+
+        Returns:
+            List[Dict[str, Any]]: Matching payments not in exclude.
+        """
+        optype = spec.get("optype")
+        optype = optype.value if isinstance(optype, PaymentOptype) else optype
+        page = self.get_payments(
+            user_id=spec["user_id"],
+            date=[spec["date"], spec["date"]],
+            summa=[spec["summa"], spec["summa"]],
+        )
+        matches = []
+        for payment in page.get("payments") or []:
+            if (
+                payment.get("id") in exclude
+                or payment.get("userId") != spec["user_id"]
+                or payment.get("summa") != spec["summa"]
+                or not str(payment.get("date", "")).startswith(spec["date"])
+                or payment.get("paymentTypeId") != spec.get("payment_type_id")
+            ):
+                continue
+            if optype is not None and payment.get("optype") != optype:
+                continue
+            if "comment" in spec and payment.get("comment") != spec["comment"]:
+                continue
+            matches.append(payment)
+        return matches
@@ -0,0 +1,72 @@
+"""
+Field projection of API records.
+
+A projection is a list of dotted paths with API keys, e.g.
+``["id", "date", "records.userId"]``. Paths into lists of nested records
+apply to every element of the list.
+"""
+from typing import Any, Callable, Dict, Iterable
+
+# API key -> projection of the nested value, None keeps the whole value
+FieldTree = Dict[str, "FieldTree | None"]
+
+
+def compile_fields(fields: Iterable[str]) -> FieldTree:
+    """
+    Converts dotted paths to a tree of keys.
+
+    Args:
+        fields (Iterable[str]): Paths to keep, e.g. ["id", "records.userId"].
+
+    Returns:
+        FieldTree: Tree of keys.
+    """
+    tree: FieldTree = {}
+    for field in fields:
+        node = tree
+        *parents, leaf = field.split(".")
+        for key in parents:
+            child = node.get(key, {})
+            if child is None:
+                # The whole value is already kept
+                break
+            node = node.setdefault(key, child)
+        else:
+            node[leaf] = None
+    return tree
+
+
+def project(value: Any, tree: FieldTree) -> Any:
+    """
+    Keeps only the keys of the tree in a record or a list of records.
+
+    Args:
+        value (Any): Record, list of records or scalar value.
+        tree (FieldTree): Tree of keys built by compile_fields.
+
+    Returns:
+        Any: Projected value, scalars are returned unchanged.
+    """
+    if isinstance(value, dict):
+        return {
+            key: value[key] if subtree is None else project(value[key], subtree)
+            for key, subtree in tree.items()
+            if key in value
+        }
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    return value
+
+
+def projector(fields: Iterable[str]) -> Callable[[Any], Any]:
+    """
+    Builds a function projecting records to the given paths.
+
+    Args:
+        fields (Iterable[str]): Paths to keep, e.g. ["id", "records.userId"].
+
+    Returns:
+        Callable[[Any], Any]: Function taking a record and returning its projection.
+    """
+    tree = compile_fields(fields)
+    return lambda record: project(record, tree)
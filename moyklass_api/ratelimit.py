@@ -0,0 +1,128 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parses the Retry-After header.
+
+    Args:
+        value (str, optional): Header value, either seconds or an HTTP date.
+
+    Returns:
+        float: Number of seconds to wait or None if the header is absent or invalid.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        min_rate: float | None = None,
+        decrease_factor: float = 0.5,
+        recovery: float = 0.01,
+    ) -> None:
+        """
+        Thread-safe token bucket limiting the number of requests per second.
+
+        When the server answers 429 the rate is multiplied by decrease_factor
+        and every request waits until Retry-After passes. Each successful
+        request then raises the rate by recovery * max_rate until the
+        configured rate is reached again.
+
+        Args:
+            rate (float): Maximum number of requests per second.
+            burst (int, optional): Number of requests that may be sent at once after a pause. Defaults to 1.
+            min_rate (float, optional): Lowest rate the limiter may adapt to. Defaults to 5% of rate.
+            decrease_factor (float, optional): Rate multiplier applied on every 429 response. Defaults to 0.5.
+            recovery (float, optional): Share of the maximum rate restored after every successful request. Defaults to 0.01.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate * 0.05
+        self.decrease_factor = decrease_factor
+        self.recovery = recovery
+
+        self.throttled = 0
+        self.wait_time = 0.0
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Takes a token from the bucket without blocking.
+
+        Returns:
+            float: Number of seconds the caller must wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            wait = max(wait, self._blocked_until - now)
+            self.wait_time += wait
+            return wait
+
+    def acquire(self) -> float:
+        """
+        Blocks until a request may be sent.
+
+        Returns:
+            float: Number of seconds spent waiting.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def throttle(self, retry_after: float) -> None:
+        """
+        Reduces the rate and pauses all requests after a 429 response.
+
+        Args:
+            retry_after (float): Number of seconds the server asked to wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    def recover(self) -> None:
+        """
+        Raises the rate back towards the maximum after a successful request.
+        """
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(
+                    self.max_rate, self.rate + self.max_rate * self.recovery
+                )
@@ -0,0 +1,291 @@
+"""
+Loading of the users and user subscriptions referenced by lessons and payments.
+
+Instead of calling User.get_user for every record, RelationResolver collects
+the distinct userId and userSubscriptionId values of a batch of records and
+loads each of them once, choosing between one request per ID and a scan of
+the whole list endpoint by the number of requests each would take::
+
+    lessons = Lesson(mc).get_lessons(date=[...], include_records=True)["lessons"]
+    relations = RelationResolver(mc).resolve(lessons)
+    for lesson in lessons:
+        for record in lesson["records"]:
+            print(record["user"]["name"], record["userSubscription"])
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple, Type
+
+from moyklass_api import models
+from moyklass_api.client import MoyklassApi, MoyklassApiException
+from moyklass_api.models import Model, snake_case
+from moyklass_api.pagination import MAX_PAGE_SIZE
+from moyklass_api.user import FAN_OUT, SCAN, User
+
+# Keys of nested records that reference users and subscriptions themselves
+NESTED_KEYS = ("records", "invoices")
+
+
+@dataclass
+class Relations:
+    users: Dict[int, Any] = field(default_factory=dict)
+    user_subscriptions: Dict[int, Any] = field(default_factory=dict)
+    # ("users" | "user_subscriptions", ID) -> error raised while loading it
+    errors: Dict[Tuple[str, int], MoyklassApiException] = field(default_factory=dict)
+    # "users" | "user_subscriptions" -> FAN_OUT or SCAN
+    strategies: Dict[str, str] = field(default_factory=dict)
+
+
+def _get(record: Any, key: str) -> Any:
+    if isinstance(record, dict):
+        return record.get(key)
+    return getattr(record, snake_case(key), None)
+
+
+def _set(record: Any, key: str, value: Any) -> None:
+    if isinstance(record, dict):
+        record[key] = value
+    elif isinstance(record, Model):
+        record.extra = {**(record.extra or {}), key: value}
+
+
+def _referencing(records: Iterable[Any]) -> Iterable[Any]:
+    """
+    Yields the records and their nested records (lesson records, invoices).
+    """
+    for record in records:
+        yield record
+        for key in NESTED_KEYS:
+            yield from _get(record, key) or ()
+
+
+def collect_references(
+    records: Iterable[Any],
+) -> Tuple[Set[int], Dict[int, int | None], Dict[int, Any]]:
+    """
+    Collects the IDs referenced by records and their nested records.
+
+    Args:
+        records (Iterable[Any]): Lessons or payments, as dictionaries or models.
+
+    Returns:
+        Tuple[Set[int], Dict[int, int | None], Dict[int, Any]]: User IDs, user subscription ID -> ID of its user
+            (None if unknown), and the user subscriptions already embedded in the records (include_user_subscriptions=True).
+    """
+    user_ids = set()
+    subscription_owners: Dict[int, int | None] = {}
+    embedded = {}
+    for record in records:
+        for subscription in _get(record, "userSubscriptions") or ():
+            embedded[_get(subscription, "id")] = subscription
+        for item in _referencing((record,)):
+            user_id = _get(item, "userId")
+            if user_id is not None:
+                user_ids.add(user_id)
+            subscription_id = _get(item, "userSubscriptionId")
+            if subscription_id is not None:
+                owner = subscription_owners.get(subscription_id)
+                subscription_owners[subscription_id] = owner or user_id
+    return user_ids, subscription_owners, embedded
+
+
+class RelationResolver:
+    def __init__(
+        self,
+        client: "MoyklassApi",
+        workers: int = 8,
+        page_size: int = MAX_PAGE_SIZE,
+        as_model: bool = False,
+    ) -> None:
+        """
+        Batch loader of the users and user subscriptions referenced by lessons and payments.
+
+        Every distinct ID is loaded once. Records in the entity_cache of the
+        client are taken from it; the rest of the users are requested one by
+        one with up to workers concurrent requests, or the whole users list
+        is scanned if that takes fewer pages than there are IDs; user
+        subscriptions are loaded with User.get_user_subscriptions_for_users.
+
+        Args:
+            client (MoyklassApi): API client.
+            workers (int, optional): Maximum number of concurrent requests. Defaults to 8.
+            page_size (int, optional): Page size of scans. Defaults to MAX_PAGE_SIZE.
+            as_model (bool, optional): Load models.User and models.UserSubscription instead of dictionaries. Defaults to False.
+        """
+        self.client = client
+        self.user = User(client)
+        self.workers = workers
+        self.page_size = page_size
+        self.as_model = as_model
+
+    def resolve(self, records: List[Any], attach: bool = True) -> Relations:
+        """
+        Loads the users and user subscriptions referenced by records.
+
+        Args:
+            records (List[Any]): Lessons or payments, as dictionaries or models.
+            attach (bool, optional): Store the loaded objects in the records under "user" next to
+                userId and "userSubscription" next to userSubscriptionId (in extra for models). Defaults to True.
+
+        Returns:
+            Relations: Loaded users and user subscriptions by ID, errors and the chosen strategies.
+        """
+        user_ids, subscription_owners, embedded = collect_references(records)
+        relations = Relations()
+        relations.user_subscriptions.update(
+            (subscription_id, embedded[subscription_id])
+            for subscription_id in subscription_owners.keys() & embedded.keys()
+        )
+        self._load_users(user_ids, relations)
+        self._load_subscriptions(
+            {
+                subscription_id: owner
+                for subscription_id, owner in subscription_owners.items()
+                if subscription_id not in embedded
+            },
+            relations,
+        )
+        if attach:
+            self.attach(records, relations)
+        return relations
+
+    def attach(self, records: Iterable[Any], relations: Relations) -> None:
+        """
+        Stores loaded users and user subscriptions in the records referencing them.
+
+        Args:
+            records (Iterable[Any]): Lessons or payments, as dictionaries or models.
+            relations (Relations): Result of resolve.
+        """
+        for item in _referencing(records):
+            user_id = _get(item, "userId")
+            if user_id is not None:
+                _set(item, "user", relations.users.get(user_id))
+            subscription_id = _get(item, "userSubscriptionId")
+            if subscription_id is not None:
+                subscription = relations.user_subscriptions.get(subscription_id)
+                _set(item, "userSubscription", subscription)
+
+    def _take_cached(
+        self,
+        entity: str,
+        ids: Iterable[int],
+        model: Type[Model],
+        loaded: Dict[int, Any],
+    ) -> None:
+        """
+        Moves the records found in the entity cache of the client to loaded.
+        """
+        cache = self.client.entity_cache
+        if cache is None:
+            return
+        for entity_id in ids:
+            record = cache.get(entity, entity_id)
+            if record is not None:
+                loaded[entity_id] = model.from_dict(record) if self.as_model else record
+
+    def _scan_pages(self, fetch: Callable[..., Dict[str, Any]]) -> int:
+        """
+        Returns the number of pages a scan of a list endpoint takes, asking for one item.
+        """
+        page = fetch(offset=0, limit=1)
+        total = (page.get("stats") or {}).get("totalItems") or 0
+        return math.ceil(total / self.page_size)
+
+    def _load_users(self, user_ids: Set[int], relations: Relations) -> None:
+        """
+        Loads users one by one or by scanning the users list, whichever takes fewer requests.
+        """
+        self._take_cached("users", user_ids, models.User, relations.users)
+        missing = user_ids - relations.users.keys()
+        if not missing:
+            return
+        # The probe request only pays off if a scan can be shorter than the fan-out
+        scan = False
+        if len(missing) > 2:
+            scan = self._scan_pages(self.user.get_users) + 1 < len(missing)
+
+        if scan:
+            relations.strategies["users"] = SCAN
+            for user in self.user.iter_users(
+                limit=self.page_size, workers=self.workers, as_model=self.as_model
+            ):
+                user_id = _get(user, "id")
+                if user_id in missing:
+                    relations.users[user_id] = user
+                    missing.discard(user_id)
+        else:
+            relations.strategies["users"] = FAN_OUT
+
+        if not missing:
+            return
+        # IDs not found by the scan are requested one by one to report errors
+        loaded = self.user.get_users_by_ids(sorted(missing), workers=self.workers)
+        for user_id, user in loaded.items():
+            if isinstance(user, MoyklassApiException):
+                relations.errors[("users", user_id)] = user
+            elif self.as_model:
+                relations.users[user_id] = models.User.from_dict(user)
+            else:
+                relations.users[user_id] = user
+
+    def _load_subscriptions(
+        self, owners: Dict[int, int | None], relations: Relations
+    ) -> None:
+        """
+        Loads user subscriptions per user or by scanning the list, whichever takes fewer requests.
+        """
+        self._take_cached(
+            "userSubscriptions",
+            owners,
+            models.UserSubscription,
+            relations.user_subscriptions,
+        )
+        owners = {
+            subscription_id: owner
+            for subscription_id, owner in owners.items()
+            if subscription_id not in relations.user_subscriptions
+        }
+        if not owners:
+            return
+        needed = set(owners)
+        user_ids = set(owners.values())
+        failed: Dict[int, MoyklassApiException] = {}
+
+        def keep(subscriptions: Iterable[Any]) -> None:
+            for subscription in subscriptions:
+                subscription_id = _get(subscription, "id")
+                if subscription_id in needed:
+                    relations.user_subscriptions[subscription_id] = subscription
+
+        if None in user_ids:
+            # Owners of some subscriptions are unknown, only a scan finds them
+            relations.strategies["user_subscriptions"] = SCAN
+            keep(
+                self.user.iter_user_subscriptions(
+                    limit=self.page_size, workers=self.workers, as_model=self.as_model
+                )
+            )
+        else:
+            strategy = self.user.plan_user_subscriptions(user_ids, self.page_size)
+            relations.strategies["user_subscriptions"] = strategy
+            by_user = self.user.get_user_subscriptions_for_users(
+                user_ids,
+                workers=self.workers,
+                limit=self.page_size,
+                strategy=strategy,
+                as_model=self.as_model,
+            )
+            for user_id, result in by_user.items():
+                if isinstance(result, MoyklassApiException):
+                    failed[user_id] = result
+                else:
+                    keep(result)
+
+        for subscription_id, owner in owners.items():
+            if subscription_id in relations.user_subscriptions:
+                continue
+            error = failed.get(owner) or MoyklassApiException(
+                f"User subscription {subscription_id} not found", status_code=404
+            )
+            relations.errors[("user_subscriptions", subscription_id)] = error
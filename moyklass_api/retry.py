@@ -0,0 +1,173 @@
+import random
+import threading
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+DEFAULT_RETRY_STATUSES = (500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+IdempotencyGuard = Callable[[str, str, Dict[str, Any] | None], bool]
+
+
+def allow_retry_for(*paths: str) -> IdempotencyGuard:
+    """
+    Creates an idempotency guard allowing to repeat non-idempotent requests to the given paths.
+
+    Args:
+        *paths (str): API endpoint paths (e.g. "v1/company/payments").
+
+    Returns:
+        IdempotencyGuard: Guard for RetryPolicy.
+    """
+    allowed = frozenset(paths)
+
+    def guard(method: str, path: str, data: Dict[str, Any] | None) -> bool:
+        return path in allowed
+
+    return guard
+
+
+class RetryStats:
+    def __init__(self) -> None:
+        """
+        Thread-safe counters of a retry policy.
+        """
+        self.retries = 0
+        self.retry_time = 0.0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def record_retry(self, delay: float) -> None:
+        """
+        Records a repeated request.
+
+        Args:
+            delay (float): Number of seconds waited before the repeat.
+        """
+        with self._lock:
+            self.retries += 1
+            self.retry_time += delay
+
+    def record_exhausted(self) -> None:
+        """
+        Records a request that failed after all attempts.
+        """
+        with self._lock:
+            self.exhausted += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Returns the counters as a dictionary.
+
+        Returns:
+            Dict[str, Any]: Number of retries, total time spent waiting before them and number of requests that ran out of attempts.
+        """
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "retry_time": self.retry_time,
+                "exhausted": self.exhausted,
+            }
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        jitter: bool = True,
+        retry_statuses: Iterable[int] = DEFAULT_RETRY_STATUSES,
+        retry_exceptions: Tuple[type, ...] | None = None,
+        idempotent_methods: Iterable[str] = IDEMPOTENT_METHODS,
+        idempotency_guard: IdempotencyGuard | None = None,
+    ) -> None:
+        """
+        Describes when and how failed requests are repeated.
+
+        Idempotent methods are repeated automatically. Other methods (POST)
+        are repeated only if idempotency_guard returns True for the request,
+        or if the connection could not be established at all, so the server
+        has not seen the request.
+
+        Args:
+            max_attempts (int, optional): Total number of attempts including the first one. Defaults to 3.
+            backoff_factor (float, optional): Base delay in seconds, doubled on every attempt. Defaults to 0.5.
+            max_backoff (float, optional): Maximum delay in seconds. Defaults to 30.0.
+            jitter (bool, optional): Randomize delays between 0 and the exponential value ("full jitter"). Defaults to True.
+            retry_statuses (Iterable[int], optional): Response status codes considered transient. Defaults to 500, 502, 503, 504.
+            retry_exceptions (Tuple[type, ...], optional): Transport exceptions considered transient. Defaults to connection errors and timeouts of the client's HTTP library.
+            idempotent_methods (Iterable[str], optional): Methods repeated without asking the guard. Defaults to GET, HEAD, OPTIONS, PUT, DELETE.
+            idempotency_guard (IdempotencyGuard, optional): Function (method, path, data) -> bool allowing to repeat other requests. Defaults to None.
+        """
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = retry_exceptions
+        self.idempotent_methods = frozenset(m.upper() for m in idempotent_methods)
+        self.idempotency_guard = idempotency_guard
+        self.stats = RetryStats()
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Calculates the delay before the next attempt.
+
+        Args:
+            attempt (int): Number of the failed attempt, starting from 1.
+
+        Returns:
+            float: Delay in seconds.
+        """
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def can_repeat(
+        self, method: str, path: str, data: Dict[str, Any] | None = None
+    ) -> bool:
+        """
+        Checks whether the request may be sent again without side effects.
+
+        Args:
+            method (str): HTTP method.
+            path (str): API endpoint path.
+            data (Dict[str, Any], optional): Request body data. Defaults to None.
+
+        Returns:
+            bool: True if the request may be repeated.
+        """
+        if method.upper() in self.idempotent_methods:
+            return True
+        if self.idempotency_guard is not None:
+            return bool(self.idempotency_guard(method, path, data))
+        return False
+
+    def should_retry(
+        self,
+        attempt: int,
+        method: str,
+        path: str,
+        data: Dict[str, Any] | None = None,
+        safe: bool = False,
+    ) -> bool:
+        """
+        Decides whether a failed attempt is repeated.
+
+        Args:
+            attempt (int): Number of the failed attempt, starting from 1.
+            method (str): HTTP method.
+            path (str): API endpoint path.
+            data (Dict[str, Any], optional): Request body data. Defaults to None.
+            safe (bool, optional): The request is known to be safe to repeat, e.g. it never reached the server. Defaults to False.
+
+        Returns:
+            bool: True if the request should be sent again.
+        """
+        if not (safe or self.can_repeat(method, path, data)):
+            return False
+        if attempt >= self.max_attempts:
+            self.stats.record_exhausted()
+            return False
+        return True
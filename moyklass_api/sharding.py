@@ -0,0 +1,379 @@
+"""
+Date-range sharding of list endpoints.
+
+A long date range is split into shards of a day, a week or a calendar month,
+sized by the density of records measured with a one-item probe request.
+Shards are fetched concurrently, each one page by page, and yielded in date
+order. A shard whose first page shows it is much denser than expected is
+split again by its observed size before the rest of its pages are fetched.
+Finished shards can be recorded in a ShardCheckpoint, so an interrupted
+export continues with the remaining dates instead of starting over.
+"""
+import json
+import math
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from moyklass_api.bulk import fingerprint
+from moyklass_api.pagination import MAX_PAGE_SIZE, _fetch_page, _is_last_page
+
+DEFAULT_SHARD_ITEMS = 2000
+# A shard is split again if it has more than this many times shard_items
+SPLIT_FACTOR = 2
+
+DateRange = Tuple[date, date]
+
+# Keys of the records iter_sharded orders and deduplicates by
+SHARD_FIELDS = ("date", "id")
+
+
+class ShardCheckpoint:
+    def __init__(self, path: str | None = None) -> None:
+        """
+        Journal of finished shards of sharded exports.
+
+        Every shard is appended to the file as a JSON line once all its
+        records were consumed, together with the key of the query it belongs
+        to. Without a path the checkpoint only lives in memory.
+
+        Args:
+            path (str, optional): Path of the JSON lines file. Defaults to None.
+        """
+        self.path = path
+        self._done: Dict[str, List[DateRange]] = {}
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        shard = (
+                            date.fromisoformat(entry["start"]),
+                            date.fromisoformat(entry["end"]),
+                        )
+                        self._done.setdefault(entry["query"], []).append(shard)
+
+    def done(self, query: str) -> List[DateRange]:
+        """
+        Returns the finished shards of a query.
+
+        Args:
+            query (str): Query key, see query_key.
+
+        Returns:
+            List[DateRange]: First and last dates of the finished shards.
+        """
+        with self._lock:
+            return list(self._done.get(query, ()))
+
+    def record(self, query: str, shard: DateRange, count: int) -> None:
+        """
+        Remembers a finished shard.
+
+        Args:
+            query (str): Query key, see query_key.
+            shard (DateRange): First and last date of the shard.
+            count (int): Number of records of the shard.
+        """
+        with self._lock:
+            self._done.setdefault(query, []).append(shard)
+            if self.path is not None:
+                entry = {
+                    "query": query,
+                    "start": shard[0].isoformat(),
+                    "end": shard[1].isoformat(),
+                    "count": count,
+                }
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+
+
+def query_key(path: str, filters: Dict[str, Any]) -> str:
+    """
+    Builds a stable key of a sharded query from its endpoint and filters except the date range.
+
+    Args:
+        path (str): API endpoint path.
+        filters (Dict[str, Any]): Filters of the query.
+
+    Returns:
+        str: Query key.
+    """
+    return fingerprint({"path": path, **filters})
+
+
+def sharded_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Adds the keys iter_sharded relies on to the fields projection of list filters.
+
+    Args:
+        filters (Dict[str, Any]): Filters of a list method, possibly with fields.
+
+    Returns:
+        Dict[str, Any]: Filters whose fields, if given, include date and id.
+    """
+    fields = filters.get("fields")
+    if fields is None:
+        return filters
+    missing = [name for name in SHARD_FIELDS if name not in fields]
+    if not missing:
+        return filters
+    return {**filters, "fields": [*fields, *missing]}
+
+
+def subtract_ranges(whole: DateRange, done: List[DateRange]) -> List[DateRange]:
+    """
+    Returns the parts of a date range not covered by finished shards.
+
+    Args:
+        whole (DateRange): First and last date of the range.
+        done (List[DateRange]): Finished shards.
+
+    Returns:
+        List[DateRange]: Remaining ranges in date order.
+    """
+    remaining = []
+    start, end = whole
+    for done_start, done_end in sorted(done):
+        if done_end < start or done_start > end:
+            continue
+        if done_start > start:
+            remaining.append((start, done_start - timedelta(days=1)))
+        start = max(start, done_end + timedelta(days=1))
+    if start <= end:
+        remaining.append((start, end))
+    return remaining
+
+
+def _next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def split_range(whole: DateRange, shard_days: float) -> List[DateRange]:
+    """
+    Splits a date range into days, weeks or calendar months.
+
+    Args:
+        whole (DateRange): First and last date of the range.
+        shard_days (float): Desired number of days per shard: 28 and more splits by months, 7 and more by weeks, otherwise by days.
+
+    Returns:
+        List[DateRange]: Shards in date order.
+    """
+    start, end = whole
+    shards = []
+    while start <= end:
+        if shard_days >= 28:
+            next_start = _next_month(start)
+        elif shard_days >= 7:
+            next_start = start + timedelta(days=7)
+        else:
+            next_start = start + timedelta(days=1)
+        shard_end = min(end, next_start - timedelta(days=1))
+        shards.append((start, shard_end))
+        start = next_start
+    return shards
+
+
+def _divide(shard: DateRange, parts: int) -> List[DateRange]:
+    """
+    Splits a shard into at most parts ranges of the same number of days.
+    """
+    start, end = shard
+    days = (end - start).days + 1
+    parts = max(2, min(parts, days))
+    bounds = [start + timedelta(days=days * i // parts) for i in range(parts + 1)]
+    return [
+        (bounds[i], bounds[i + 1] - timedelta(days=1))
+        for i in range(parts)
+        if bounds[i] < bounds[i + 1]
+    ]
+
+
+def _item_date(item: Any) -> str:
+    """
+    Returns the date of a record as a dictionary or model, empty if it has none.
+    """
+    value = item.get("date") if isinstance(item, dict) else getattr(item, "date", None)
+    return value or ""
+
+
+def _item_id(item: Any) -> Any:
+    return item.get("id") if isinstance(item, dict) else getattr(item, "id", None)
+
+
+def _date_filter(shard: DateRange) -> List[str]:
+    return [shard[0].isoformat(), shard[1].isoformat()]
+
+
+def _fetch_shard(
+    fetch: Callable[[List[str], int, int], Dict[str, Any]],
+    items_key: str,
+    shard: DateRange,
+    limit: int,
+    max_items: int | None,
+) -> Tuple[List[Any] | None, int | None]:
+    """
+    Fetches all pages of a shard.
+
+    Returns:
+        Tuple[List[Any] | None, int | None]: Records sorted by date, None if the shard has more
+            than max_items records and must be split, and the number of records reported by the server.
+    """
+
+    def fetch_page(offset: int, limit: int) -> Dict[str, Any]:
+        return fetch(_date_filter(shard), offset, limit)
+
+    items, page = _fetch_page(fetch_page, 0, limit, items_key)
+    total = (page.get("stats") or {}).get("totalItems")
+    if max_items is not None and total is not None and total > max_items:
+        return None, total
+
+    count = offset = len(items)
+    while not _is_last_page(page, count, offset, limit):
+        page_items, page = _fetch_page(fetch_page, offset, limit, items_key)
+        count = len(page_items)
+        items.extend(page_items)
+        offset += count
+    items.sort(key=_item_date)
+    return items, total
+
+
+def plan_shards(
+    fetch: Callable[[List[str], int, int], Dict[str, Any]],
+    items_key: str,
+    ranges: List[DateRange],
+    shard_items: int = DEFAULT_SHARD_ITEMS,
+) -> List[DateRange]:
+    """
+    Splits date ranges into shards of about shard_items records.
+
+    The number of records of every range is requested with a one-item
+    page; ranges without records are dropped.
+
+    Args:
+        fetch (Callable[[List[str], int, int], Dict[str, Any]]): Function returning the page for the given date range, offset and limit.
+        items_key (str): Key of the items list in the response (e.g. "lessons").
+        ranges (List[DateRange]): Date ranges to split.
+        shard_items (int, optional): Desired number of records per shard. Defaults to 2000.
+
+    Returns:
+        List[DateRange]: Shards in date order.
+    """
+    shards = []
+    for whole in ranges:
+        _, page = _fetch_page(
+            lambda offset, limit: fetch(_date_filter(whole), offset, limit),
+            0,
+            1,
+            items_key,
+        )
+        total = (page.get("stats") or {}).get("totalItems")
+        if total == 0:
+            continue
+        if total is not None and total <= shard_items:
+            shards.append(whole)
+            continue
+        days = (whole[1] - whole[0]).days + 1
+        shard_days = days * shard_items / total if total is not None else 7
+        shards.extend(split_range(whole, shard_days))
+    return shards
+
+
+def iter_sharded(
+    fetch: Callable[[List[str], int, int], Dict[str, Any]],
+    items_key: str,
+    date_range: List[str],
+    workers: int = 4,
+    limit: int = MAX_PAGE_SIZE,
+    shard_items: int = DEFAULT_SHARD_ITEMS,
+    checkpoint: ShardCheckpoint | None = None,
+    query: str = "",
+) -> Iterator[Any]:
+    """
+    Yields the records of a date range fetching its shards concurrently.
+
+    Records are yielded in date order, a record returned twice (e.g. moved
+    between pages or to the next shard while the export runs) is yielded
+    once. Up to workers shards are kept in memory.
+
+    Args:
+        fetch (Callable[[List[str], int, int], Dict[str, Any]]): Thread-safe function returning the page for the given date range, offset and limit.
+        items_key (str): Key of the items list in the response (e.g. "lessons").
+        date_range (List[str]): First and last date in YYYY-MM-DD format.
+        workers (int, optional): Number of shards fetched concurrently. Defaults to 4.
+        limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+        shard_items (int, optional): Desired number of records per shard. Defaults to 2000.
+        checkpoint (ShardCheckpoint, optional): Journal of finished shards, shards recorded in it are skipped. Defaults to None.
+        query (str, optional): Key of the query in the checkpoint, see query_key. Defaults to "".
+
+    Yields:
+        Any: Records.
+
+    Raises:
+        ValueError: If date_range is not a pair of dates.
+    """
+    if len(date_range) != 2:
+        raise ValueError("date must be a list of the first and the last date")
+    whole = (date.fromisoformat(date_range[0]), date.fromisoformat(date_range[1]))
+    done = checkpoint.done(query) if checkpoint is not None else []
+    order = plan_shards(fetch, items_key, subtract_ranges(whole, done), shard_items)
+
+    pending = list(order)
+    in_flight: Dict[Future, DateRange] = {}
+    buffered: Dict[DateRange, List[Any]] = {}
+    # Shards do not overlap in dates, so a record can only repeat within a
+    # shard or move to the next one; IDs of older shards are dropped
+    previous_ids = set()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while order:
+                while pending and (
+                    not in_flight or len(in_flight) + len(buffered) < workers
+                ):
+                    shard = pending.pop(0)
+                    future = executor.submit(
+                        _fetch_shard,
+                        fetch,
+                        items_key,
+                        shard,
+                        limit,
+                        shard_items * SPLIT_FACTOR if shard[0] < shard[1] else None,
+                    )
+                    in_flight[future] = shard
+
+                done_futures, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done_futures:
+                    shard = in_flight.pop(future)
+                    items, total = future.result()
+                    if items is None:
+                        parts = _divide(shard, math.ceil(total / shard_items))
+                        index = order.index(shard)
+                        order[index : index + 1] = parts
+                        pending = sorted(pending + parts)
+                        continue
+                    buffered[shard] = items
+
+                while order and order[0] in buffered:
+                    shard = order.pop(0)
+                    items = buffered.pop(shard)
+                    shard_ids = set()
+                    for item in items:
+                        item_id = _item_id(item)
+                        if item_id is not None:
+                            if item_id in shard_ids or item_id in previous_ids:
+                                continue
+                            shard_ids.add(item_id)
+                        yield item
+                    previous_ids = shard_ids
+                    if checkpoint is not None:
+                        checkpoint.record(query, shard, len(items))
+                    del items
+        finally:
+            for future in in_flight:
+                future.cancel()
@@ -0,0 +1,265 @@
+"""
+Incremental parsing of list responses.
+
+A list endpoint answers with an object like
+``{"stats": {...}, "lessons": [{...}, {...}]}``. ArrayItemParser is fed the
+body chunk by chunk and returns the items of the list array as soon as each
+of them is complete, so a page never has to be held in memory as a whole.
+The other top-level keys (e.g. stats) are collected in ``meta``.
+"""
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterator, List, Tuple
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+# Parser states
+_START = 0
+_KEY = 1
+_COLON = 2
+_VALUE = 3
+_AFTER_VALUE = 4
+_ITEM = 5
+_AFTER_ITEM = 6
+_END = 7
+
+# Need more data to decode the value
+_INCOMPLETE = object()
+
+# Text without brackets outside of complete strings
+_FLAT = re.compile(r'(?:[^"{}\[\]]++|"(?:[^"\\]++|\\.)*+")*+', re.DOTALL)
+# Characters of a string up to its closing quote or an escape the buffer ends in
+_STRING_REST = re.compile(r'(?:[^"\\]++|\\.)*+', re.DOTALL)
+
+
+class ArrayItemParser:
+    def __init__(self, items_key: str) -> None:
+        """
+        Push parser returning the items of one array of a JSON object.
+
+        Args:
+            items_key (str): Key of the items list in the response (e.g. "payments").
+        """
+        self.items_key = items_key
+        self.meta: Dict[str, Any] = {}
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._state = _START
+        self._key = None
+        self._final = False
+        # Scan of an unfinished container or string: offset from _pos, depth, in string
+        self._scan: Tuple[int, int, bool] | None = None
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        Adds a chunk of the body.
+
+        Args:
+            chunk (bytes): Next chunk of the response body.
+
+        Returns:
+            List[Any]: Items completed by the chunk.
+
+        Raises:
+            ValueError: If the body is not a valid JSON object.
+        """
+        self._buf = self._buf[self._pos :] + self._text.decode(chunk)
+        self._pos = 0
+        return self._parse()
+
+    def close(self) -> List[Any]:
+        """
+        Marks the end of the body.
+
+        Returns:
+            List[Any]: Remaining items.
+
+        Raises:
+            ValueError: If the body is not a complete JSON object.
+        """
+        self._buf = self._buf[self._pos :] + self._text.decode(b"", final=True)
+        self._pos = 0
+        self._final = True
+        items = self._parse()
+        if self._state != _END:
+            raise ValueError("Unexpected end of JSON document")
+        return items
+
+    def _value_end(self) -> int | None:
+        """
+        Finds the end of the container or string starting at the current position.
+
+        The scan continues where the previous call stopped, so a value larger
+        than a chunk is scanned once instead of being decoded again from its
+        start for every chunk.
+
+        Returns:
+            int: Position after the value or None if the buffer ends inside it.
+        """
+        buf = self._buf
+        offset, depth, in_string = self._scan or (0, 0, False)
+        pos = self._pos + offset
+        while True:
+            if in_string:
+                pos = _STRING_REST.match(buf, pos).end()
+                if pos == len(buf) or buf[pos] != '"':
+                    break
+                pos += 1
+                in_string = False
+                if depth == 0:
+                    return pos
+                continue
+            if depth == 0 and buf[pos] == '"':
+                # A top-level string: its quote starts the scan
+                pos += 1
+                in_string = True
+                continue
+            pos = _FLAT.match(buf, pos).end()
+            if pos == len(buf):
+                break
+            char = buf[pos]
+            pos += 1
+            if char == '"':
+                # The buffer ends inside this string
+                in_string = True
+            elif char in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return pos
+        self._scan = (pos - self._pos, depth, in_string)
+        return None
+
+    def _decode(self) -> Any:
+        """
+        Decodes the value starting at the current position.
+
+        Returns:
+            Any: Decoded value or _INCOMPLETE if the buffer ends inside it.
+        """
+        if self._buf[self._pos] in '{["':
+            if self._value_end() is None:
+                if self._final:
+                    raise ValueError("Unexpected end of JSON document")
+                return _INCOMPLETE
+            self._scan = None
+            value, self._pos = self._decoder.raw_decode(self._buf, self._pos)
+            return value
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._final:
+                raise
+            return _INCOMPLETE
+        # A number at the end of the buffer may continue in the next chunk
+        if (
+            not self._final
+            and isinstance(value, (int, float))
+            and not self._buf[end:].lstrip(_NUMBER_CHARS)
+        ):
+            return _INCOMPLETE
+        self._pos = end
+        return value
+
+    def _parse(self) -> List[Any]:
+        items = []
+        buf = self._buf
+        size = len(buf)
+        while True:
+            while self._pos < size and buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos == size:
+                return items
+            char = buf[self._pos]
+            state = self._state
+
+            if state == _START:
+                self._expect(char, "{")
+                self._state = _KEY
+            elif state == _KEY:
+                if char == "}":
+                    self._pos += 1
+                    self._state = _END
+                    continue
+                self._expect(char, '"', advance=False)
+                key = self._decode()
+                if key is _INCOMPLETE:
+                    return items
+                self._key = key
+                self._state = _COLON
+            elif state == _COLON:
+                self._expect(char, ":")
+                self._state = _VALUE
+            elif state == _VALUE:
+                if self._key == self.items_key and char == "[":
+                    self._pos += 1
+                    self._state = _ITEM
+                    continue
+                value = self._decode()
+                if value is _INCOMPLETE:
+                    return items
+                self.meta[self._key] = value
+                self._state = _AFTER_VALUE
+            elif state == _AFTER_VALUE:
+                self._expect(char, ",}")
+                self._state = _KEY if char == "," else _END
+            elif state == _ITEM:
+                if char == "]":
+                    self._pos += 1
+                    self._state = _AFTER_VALUE
+                    continue
+                item = self._decode()
+                if item is _INCOMPLETE:
+                    return items
+                items.append(item)
+                self._state = _AFTER_ITEM
+            elif state == _AFTER_ITEM:
+                self._expect(char, ",]")
+                self._state = _ITEM if char == "," else _AFTER_VALUE
+            else:
+                raise ValueError(f"Extra data at position {self._pos}")
+
+    def _expect(self, char: str, allowed: str, advance: bool = True) -> None:
+        if char not in allowed:
+            raise ValueError(f"Expected {allowed!r} at position {self._pos}")
+        if advance:
+            self._pos += 1
+
+
+class ItemStream:
+    def __init__(self, items: Iterator[Any], parser: ArrayItemParser) -> None:
+        """
+        Iterator over the items of a streamed list response.
+
+        Args:
+            items (Iterator[Any]): Items produced while the body is read.
+            parser (ArrayItemParser): Parser of the body.
+        """
+        self._items = items
+        self._parser = parser
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        """
+        Top-level keys of the response other than the items list, complete after the iteration.
+        """
+        return self._parser.meta
+
+    def __iter__(self) -> "ItemStream":
+        return self
+
+    def __next__(self) -> Any:
+        return next(self._items)
+
+    def close(self) -> None:
+        """
+        Stops reading the response and releases the connection.
+        """
+        self._items.close()
@@ -1,18 +1,23 @@
 from typing import Any, Dict
 
+from moyklass_api import models
 from moyklass_api.client import MoyklassApi
+from moyklass_api.models import record_parser
 
 
 class Subscription:
     def __init__(self, client: "MoyklassApi") -> None:
         self.client = client
 
-    def get_subscription(self, subscription_id: int) -> Dict[str, Any]:
+    def get_subscription(
+        self, subscription_id: int, as_model: bool = False
+    ) -> Dict[str, Any]:
         """
         Retrieves information about a specific subscription.
 
         Args:
             subscription_id (int): The ID of the subscription.
+            as_model (bool, optional): Return models.Subscription instead of dictionaries. Defaults to False.
 
         Returns:
             Dict[str, Any]: A dictionary containing subscription information.
@@ -21,7 +26,11 @@ class Subscription:
             https://api.moyklass.com/#tag/subscriptions/paths/~1v1~1company~1subscriptions~1%7BsubscriptionId%7D/get
         """
         path = f"v1/company/subscriptions/{subscription_id}"
-        return self.client._make_request("GET", path)
+        return self.client._make_request(
+            "GET",
+            path,
+            transform=record_parser(models.Subscription) if as_model else None,
+        )
 
     def get_groupings(self, include_subscriptions: bool = False) -> Dict[str, Any]:
         """
@@ -0,0 +1,532 @@
+"""
+HTTP transports used by MoyklassApi to send requests.
+
+A transport sends one request and returns a requests.Response; retries,
+rate limiting, authorization and decoding stay in the client. Available
+transports:
+
+* RequestsTransport - requests.Session with a connection pool (default);
+* Urllib3Transport - urllib3 connection pool without the per-request
+  overhead of requests sessions (cookies, proxies from the environment,
+  redirects);
+* CassetteTransport - records exchanges to a JSON file and serves them back
+  without network access, with configurable latency::
+
+    # Record once against the API
+    cassette = CassetteTransport("payments.json", mode="record")
+    with MoyklassApi(api_key, transport=cassette) as mc:
+        Payment(mc).get_payments(limit=10)
+
+    # Replay offline, every response after 50 ms
+    cassette = CassetteTransport("payments.json", latency=0.05)
+    with MoyklassApi(api_key, transport=cassette) as mc:
+        Payment(mc).get_payments(limit=10)
+"""
+import abc
+import base64
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+from http import HTTPStatus
+from typing import Any, Deque, Dict, List, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError, ReadTimeoutError
+
+from moyklass_api.log import redact, redact_text
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_HEADERS = {
+    "User-Agent": "moyklass-api",
+    "Accept": "*/*",
+    "Accept-Encoding": "gzip, deflate",
+}
+CASSETTE_MODES = ("replay", "record", "auto")
+AUTH_PATH = "/v1/company/auth/"
+# Response headers that are not stored in cassettes, bodies are stored decoded
+SKIPPED_HEADERS = frozenset(
+    (
+        "set-cookie",
+        "date",
+        "connection",
+        "keep-alive",
+        "content-encoding",
+        "content-length",
+        "transfer-encoding",
+    )
+)
+
+
+class Transport(abc.ABC):
+    """
+    Base class of transports.
+
+    Implementations must override send, be thread-safe and raise requests exceptions
+    (requests.ConnectionError, requests.Timeout, ...) on network errors so
+    the retry policy of the client applies to them.
+    """
+
+    @abc.abstractmethod
+    def send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] | None = None,
+        body: bytes | None = None,
+        params: Dict[str, Any] | None = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        """
+        Sends a request.
+
+        Args:
+            method (str): HTTP method (e.g., "GET", "POST").
+            url (str): Full request URL without the query string.
+            headers (Dict[str, str], optional): Request headers. Defaults to None.
+            body (bytes, optional): Encoded request body. Defaults to None.
+            params (Dict[str, Any], optional): Query parameters, lists are sent as repeated keys. Defaults to None.
+            stream (bool, optional): Do not read the response body. Defaults to False.
+
+        Returns:
+            requests.Response: Received response.
+        """
+
+    def close(self) -> None:
+        """
+        Releases the connections held by the transport.
+        """
+
+
+def encode_params(params: Dict[str, Any] | None) -> List[Tuple[str, Any]]:
+    """
+    Converts query parameters to pairs the same way requests does.
+
+    None values are skipped, lists and tuples become repeated keys.
+
+    Args:
+        params (Dict[str, Any], optional): Query parameters.
+
+    Returns:
+        List[Tuple[str, Any]]: Parameter pairs.
+    """
+    pairs = []
+    for key, value in (params or {}).items():
+        values = value if isinstance(value, (list, tuple)) else (value,)
+        pairs.extend((key, item) for item in values if item is not None)
+    return pairs
+
+
+def build_response(
+    status: int,
+    headers: Dict[str, str],
+    raw: Any,
+    url: str,
+    reason: str | None = None,
+) -> requests.Response:
+    """
+    Creates a requests.Response reading its body from a file-like object.
+
+    Args:
+        status (int): HTTP status.
+        headers (Dict[str, str]): Response headers.
+        raw (Any): urllib3 response or file-like object with the body.
+        url (str): Request URL.
+        reason (str, optional): Reason phrase. Defaults to the standard phrase of the status.
+
+    Returns:
+        requests.Response: Response with an unread body.
+    """
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.raw = raw
+    response.url = url
+    if reason is None:
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+    response.reason = reason
+    return response
+
+
+class RequestsTransport(Transport):
+    def __init__(
+        self,
+        session: requests.Session | None = None,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+    ) -> None:
+        """
+        Transport sending requests through a requests.Session.
+
+        Args:
+            session (requests.Session, optional): Preconfigured session to use instead of creating a new one,
+                left open by close(). Defaults to None.
+            pool_connections (int, optional): Number of per-host connection pools to keep. Defaults to 10.
+            pool_maxsize (int, optional): Maximum number of connections kept open per host. Defaults to 10.
+            pool_block (bool, optional): Block when all connections of the pool are busy instead of opening extra ones. Defaults to False.
+            keep_alive (bool, optional): Keep connections open between requests. Defaults to True.
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        # Only a session created here is closed by close(), the caller owns theirs
+        self._owns_session = session is None
+        self.session = session if session is not None else self._create_session()
+
+    def _create_session(self) -> requests.Session:
+        """
+        Creates an HTTP session with a connection pool mounted for http and https.
+
+        Returns:
+            requests.Session: Configured session.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+
+        return session
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] | None = None,
+        body: bytes | None = None,
+        params: Dict[str, Any] | None = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        return self.session.request(
+            method, url, headers=headers, data=body, params=params, stream=stream
+        )
+
+    def close(self) -> None:
+        if self._owns_session:
+            self.session.close()
+
+
+class Urllib3Transport(Transport):
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        timeout: float | None = None,
+    ) -> None:
+        """
+        Transport sending requests directly through a urllib3 connection pool.
+
+        Skips the work requests does for every call (merging session
+        settings, reading proxies from the environment, cookies, redirects),
+        which is noticeable when many small requests are sent.
+
+        Args:
+            pool_connections (int, optional): Number of per-host connection pools to keep. Defaults to 10.
+            pool_maxsize (int, optional): Maximum number of connections kept open per host. Defaults to 10.
+            pool_block (bool, optional): Block when all connections of the pool are busy instead of opening extra ones. Defaults to False.
+            keep_alive (bool, optional): Keep connections open between requests. Defaults to True.
+            timeout (float, optional): Connect and read timeout in seconds. Defaults to None (no timeout).
+        """
+        headers = dict(DEFAULT_HEADERS)
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        self.pool = urllib3.PoolManager(
+            num_pools=pool_connections,
+            maxsize=pool_maxsize,
+            block=pool_block,
+            headers=headers,
+            retries=False,
+            timeout=timeout,
+        )
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] | None = None,
+        body: bytes | None = None,
+        params: Dict[str, Any] | None = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        pairs = encode_params(params)
+        if pairs:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(pairs)}"
+
+        if headers is not None:
+            headers = {**self.pool.headers, **headers}
+        try:
+            r = self.pool.request(
+                method,
+                url,
+                body=body,
+                headers=headers,
+                preload_content=False,
+                redirect=False,
+            )
+        except NewConnectionError as err:
+            raise requests.ConnectionError(err)
+        except ConnectTimeoutError as err:
+            raise requests.ConnectTimeout(err)
+        except ReadTimeoutError as err:
+            raise requests.ReadTimeout(err)
+        except urllib3.exceptions.HTTPError as err:
+            raise requests.ConnectionError(err)
+
+        response = build_response(r.status, r.headers, r, url, r.reason)
+        if not stream:
+            response.content
+        return response
+
+    def close(self) -> None:
+        self.pool.clear()
+
+
+class CassetteMiss(requests.RequestException):
+    """
+    No recorded response matches a request replayed from a cassette.
+    """
+
+
+def _canonical_body(body: bytes | None) -> str:
+    """
+    Converts a request body to the text requests are matched by, with keys sorted and secrets redacted.
+    """
+    if not body:
+        return ""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body.decode("utf-8", errors="replace")
+    if isinstance(data, dict):
+        data = redact(data)
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+class CassetteTransport(Transport):
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        transport: Transport | None = None,
+        latency: float | None = 0.0,
+    ) -> None:
+        """
+        Transport recording exchanges to a JSON file and serving them back.
+
+        Requests are matched by method, URL path, query parameters and body,
+        so a cassette recorded against the API may be replayed with any
+        base_url. Identical requests get the recorded responses in the
+        recording order, the last one is repeated when they run out. API
+        keys and access tokens are redacted in the file.
+
+        Args:
+            path (str): Path of the cassette file.
+            mode (str, optional): "replay" serves only recorded responses, "record" sends every request
+                through the transport and records it, "auto" replays known requests and records the others. Defaults to "replay".
+            transport (Transport, optional): Transport sending the recorded requests. Defaults to RequestsTransport().
+            latency (float, optional): Seconds every replayed response is delayed by, None to repeat the recorded latency. Defaults to 0.
+
+        Raises:
+            ValueError: If the mode is unknown.
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(
+                f"Unknown cassette mode {mode!r}, expected one of {CASSETTE_MODES}"
+            )
+        self.path = path
+        self.mode = mode
+        self.transport = transport
+        if transport is None and mode != "replay":
+            self.transport = RequestsTransport()
+        self.latency = latency
+
+        self.interactions: List[Dict[str, Any]] = []
+        self.replayed = 0
+        self.recorded = 0
+        self._queues: Dict[Tuple[str, str, str, str], Deque[Dict[str, Any]]] = {}
+        self._last: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        if mode == "replay" or (mode == "auto" and os.path.exists(path)):
+            self.load()
+
+    def load(self) -> None:
+        """
+        Reads the interactions of the cassette file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        with open(self.path, encoding="utf-8") as f:
+            interactions = json.load(f)["interactions"]
+        with self._lock:
+            self.interactions = interactions
+            self._queues.clear()
+            self._last.clear()
+            for interaction in interactions:
+                key = self._key_of(interaction["request"])
+                self._queues.setdefault(key, deque()).append(interaction)
+
+    def save(self) -> None:
+        """
+        Writes the recorded interactions to the cassette file.
+        """
+        with self._lock:
+            data = {"interactions": list(self.interactions)}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+            f.write("\n")
+
+    @staticmethod
+    def _key_of(request: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        return request["method"], request["path"], request["query"], request["body"]
+
+    @staticmethod
+    def _request_of(
+        method: str, url: str, params: Dict[str, Any] | None, body: bytes | None
+    ) -> Dict[str, Any]:
+        return {
+            "method": method.upper(),
+            "path": urlsplit(url).path,
+            "query": urlencode(sorted(encode_params(params), key=str)),
+            "body": _canonical_body(body),
+        }
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] | None = None,
+        body: bytes | None = None,
+        params: Dict[str, Any] | None = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        request = self._request_of(method, url, params, body)
+        key = self._key_of(request)
+        # Recorded tokens are redacted, so the requests sent to the API in
+        # auto mode must be authorized with a token obtained from it
+        live_auth = self.mode == "auto" and request["path"].startswith(AUTH_PATH)
+        if self.mode != "record" and not live_auth:
+            interaction = self._next(key)
+            if interaction is not None:
+                return self._replay(interaction, url, stream)
+            if self.mode == "replay":
+                raise CassetteMiss(
+                    f"No recorded response for {request['method']} {request['path']}"
+                    f"?{request['query']} in {self.path}"
+                )
+        return self._record(request, method, url, headers, body, params)
+
+    def _next(self, key: Tuple[str, str, str, str]) -> Dict[str, Any] | None:
+        """
+        Takes the next recorded interaction of a request.
+        """
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                self._last[key] = queue.popleft()
+            interaction = self._last.get(key)
+            if interaction is not None:
+                self.replayed += 1
+            return interaction
+
+    def _replay(
+        self, interaction: Dict[str, Any], url: str, stream: bool
+    ) -> requests.Response:
+        """
+        Builds the recorded response after the configured latency.
+        """
+        delay = self.latency if self.latency is not None else interaction["elapsed"]
+        if delay:
+            time.sleep(delay)
+
+        recorded = interaction["response"]
+        if "body_base64" in recorded:
+            content = base64.b64decode(recorded["body_base64"])
+        else:
+            content = recorded["body"].encode()
+        response = build_response(
+            recorded["status"], recorded["headers"], io.BytesIO(content), url
+        )
+        if not stream:
+            response.content
+        return response
+
+    def _record(
+        self,
+        request: Dict[str, Any],
+        method: str,
+        url: str,
+        headers: Dict[str, str] | None,
+        body: bytes | None,
+        params: Dict[str, Any] | None,
+    ) -> requests.Response:
+        """
+        Sends the request through the transport and records the exchange.
+
+        The response body is read at once, so streamed requests are not
+        streamed while recording.
+        """
+        started = time.perf_counter()
+        r = self.transport.send(method, url, headers, body, params)
+        elapsed = time.perf_counter() - started
+
+        recorded = {
+            "status": r.status_code,
+            "headers": {
+                name: value
+                for name, value in r.headers.items()
+                if name.lower() not in SKIPPED_HEADERS
+            },
+        }
+        try:
+            recorded["body"] = redact_text(r.content.decode("utf-8"))
+        except UnicodeDecodeError:
+            recorded["body_base64"] = base64.b64encode(r.content).decode()
+
+        interaction = {
+            "request": request,
+            "response": recorded,
+            "elapsed": round(elapsed, 4),
+        }
+        key = self._key_of(request)
+        with self._lock:
+            if key in self._last or self._queues.get(key):
+                # Live authorization in auto mode, the request is already recorded
+                return r
+            self.interactions.append(interaction)
+            self.recorded += 1
+            if self.mode == "auto":
+                self._last[key] = interaction
+        return r
+
+    def close(self) -> None:
+        """
+        Saves the cassette if anything was recorded and closes the underlying transport.
+        """
+        if self.recorded:
+            self.save()
+        if self.transport is not None:
+            self.transport.close()
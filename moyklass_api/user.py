@@ -1,7 +1,21 @@
+import inspect
+import math
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List
 
-from moyklass_api.client import MoyklassApi
+from moyklass_api import models
+from moyklass_api.bulk import BulkReport, BulkRowResult, BulkStatus, fingerprint
+from moyklass_api.changes import ChangeTracker
+from moyklass_api.client import MoyklassApi, MoyklassApiException
+from moyklass_api.concurrency import map_bounded
+from moyklass_api.contacts import ContactIndex, contact_keys
+from moyklass_api.models import chain, item_parser, page_parser, record_parser
+from moyklass_api.pagination import MAX_PAGE_SIZE, paginate
+
+# Strategies of get_user_subscriptions_for_users
+FAN_OUT = "fan-out"
+SCAN = "scan"
 
 
 class UserSort(Enum):
@@ -23,16 +37,172 @@ class UserSubscriptionId(Enum):
     FINISHED = 4
 
 
+def subscription_probe_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds the filters of a one-item request for the number of matching user subscriptions.
+
+    Args:
+        filters (Dict[str, Any]): Filters of get_user_subscriptions_for_users.
+
+    Returns:
+        Dict[str, Any]: Arguments of get_user_subscriptions.
+    """
+    probe = {
+        key: value
+        for key, value in filters.items()
+        if key not in ("as_model", "fields")
+    }
+    return {**probe, "offset": 0, "limit": 1}
+
+
+def cheaper_strategy(page: Dict[str, Any], count: int, limit: int) -> str:
+    """
+    Compares the requests of a fan-out over count users with the pages of a scan.
+
+    Args:
+        page (Dict[str, Any]): Response of the one-item probe request.
+        count (int): Number of users.
+        limit (int): Page size of the scan.
+
+    Returns:
+        str: FAN_OUT or SCAN, FAN_OUT if the response has no number of items.
+    """
+    total = (page.get("stats") or {}).get("totalItems")
+    if total is None:
+        return FAN_OUT
+    # The probe request is already spent for either strategy
+    return SCAN if math.ceil(total / limit) < count else FAN_OUT
+
+
+def subscription_scan_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Adds userId to the projected fields of a scan so user subscriptions can be split by user.
+
+    Args:
+        filters (Dict[str, Any]): Filters of get_user_subscriptions_for_users.
+
+    Returns:
+        Dict[str, Any]: Filters whose fields, if given, include userId.
+    """
+    fields = filters.get("fields")
+    if fields is not None and "userId" not in fields:
+        return {**filters, "fields": [*fields, "userId"]}
+    return filters
+
+
+def subscription_owner(subscription: Any) -> int | None:
+    """
+    Returns the user ID of a user subscription.
+
+    Args:
+        subscription (Any): User subscription as a dictionary or models.UserSubscription.
+
+    Returns:
+        int: User ID or None.
+    """
+    if isinstance(subscription, dict):
+        return subscription.get("userId")
+    return subscription.user_id
+
+
 class User:
     def __init__(self, client: "MoyklassApi") -> None:
         self.client = client
 
-    def get_user(self, user_id: int) -> Dict[str, Any]:
+    def _observe(
+        self,
+        entity: str,
+        transform: Callable[[Any], Any] | None = None,
+        entity_id: int | None = None,
+        fields: Iterable[str] | None = None,
+    ) -> Callable[[Any], Any] | None:
+        """
+        Wraps the transform of a single-record response to store the record in the entity cache of the client.
+
+        Args:
+            entity (str): Entity type, "users" or "userSubscriptions".
+            transform (Callable[[Any], Any], optional): Transform of the response. Defaults to None.
+            entity_id (int, optional): ID of the written record, removed from the cache if the response has no record. Defaults to None.
+            fields (Iterable[str], optional): Paths of the keys to keep. The record is projected before transform
+                and not cached, since a partial record cannot answer later reads. Defaults to None (all keys).
+
+        Returns:
+            Callable[[Any], Any] | None: Transform for _make_request, transform itself if the client has no entity cache.
+        """
+        if fields is not None:
+            return chain(item_parser(None, fields), transform)
+        cache = self.client.entity_cache
+        if cache is None:
+            return transform
+        return cache.record_observer(entity, transform, entity_id)
+
+    def _observe_page(
+        self,
+        entity: str,
+        items_key: str,
+        transform: Callable[[Any], Any] | None,
+        fields: Iterable[str] | None = None,
+    ) -> Callable[[Any], Any] | None:
+        """
+        Wraps the transform of a list response to store its records in the entity cache of the client.
+
+        With fields the records are projected before transform and not cached, like in _observe.
+        """
+        if fields is not None:
+            return chain(page_parser(None, items_key, fields), transform)
+        cache = self.client.entity_cache
+        if cache is None:
+            return transform
+        return cache.page_observer(entity, items_key, transform)
+
+    def _track(
+        self, transform: Callable[[Any], Any] | None
+    ) -> Callable[[Any], Any] | None:
+        """
+        Wraps the transform of a read user to pass it to the change tracker of the client.
+        """
+        tracker = self.client.change_tracker
+        if tracker is None:
+            return transform
+        return tracker.record_observer(transform)
+
+    def _track_page(
+        self, transform: Callable[[Any], Any] | None
+    ) -> Callable[[Any], Any] | None:
+        """
+        Wraps the transform of a users page to pass its users to the change tracker of the client.
+        """
+        tracker = self.client.change_tracker
+        if tracker is None:
+            return transform
+        return tracker.page_observer("users", transform)
+
+    def _cached_user(self, user_id: int, as_model: bool) -> Any:
+        """
+        Returns the user from the entity cache of the client, None if it is not cached.
+        """
+        cache = self.client.entity_cache
+        user = cache.get("users", user_id) if cache is not None else None
+        if user is not None and as_model:
+            return models.User.from_dict(user)
+        return user
+
+    def _request_user(self, user_id: int, as_model: bool) -> Any:
+        path = f"v1/company/users/{user_id}"
+        transform = self._track(record_parser(models.User) if as_model else None)
+        return self.client._make_request(
+            "GET", path, transform=self._observe("users", transform)
+        )
+
+    def get_user(self, user_id: int, as_model: bool = False) -> Dict[str, Any]:
         """
         Retrieves user information from the Moyklass API.
 
+        If the client has an entity_cache, a cached user is returned without a request.
+
         Args
             user_id (int): The unique identifier for the user whose information is to be retrieved.
+            as_model (bool, optional): Return models.User instead of dictionaries. Defaults to False.
 
         Returns:
             Dict[str, Any]: A dictionary containing user information retrieved from the Moyklass API.
@@ -40,8 +210,44 @@ class User:
         Note:
             https://api.moyklass.com/#tag/users/paths/~1v1~1company~1users~1%7BuserId%7D/get
         """
-        path = f"v1/company/users/{user_id}"
-        return self.client._make_request("GET", path)
+        user = self._cached_user(user_id, as_model)
+        if user is not None:
+            return user
+        return self._request_user(user_id, as_model)
+
+    def get_users_by_ids(
+        self, user_ids: Iterable[int], workers: int = 8
+    ) -> Dict[int, Dict[str, Any] | MoyklassApiException]:
+        """
+        Retrieves several users by their IDs.
+
+        Duplicate IDs are requested once, up to workers requests run at the
+        same time, and a request for an ID that another thread of the same
+        client is already loading waits for that request instead of sending
+        its own. A failed ID does not fail the whole batch.
+
+        Args:
+            user_ids (Iterable[int]): IDs of the users.
+            workers (int, optional): Maximum number of concurrent requests. Defaults to 8.
+
+        Returns:
+            Dict[int, Dict[str, Any] | MoyklassApiException]: User ID -> user information, or the exception raised while loading it.
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+
+        def load(user_id: int) -> Dict[str, Any] | MoyklassApiException:
+            try:
+                return self.client.single_flight.do(
+                    ("users", user_id), lambda: self.get_user(user_id)
+                )
+            except MoyklassApiException as err:
+                return err
+
+        if len(unique_ids) <= 1 or workers <= 1:
+            return {user_id: load(user_id) for user_id in unique_ids}
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(unique_ids))) as executor:
+            return dict(zip(unique_ids, executor.map(load, unique_ids)))
 
     def create_user(
         self,
@@ -107,7 +313,9 @@ class User:
         if attributes is not None:
             data["attributes"] = attributes
 
-        return self.client._make_request("POST", "v1/company/users", data=data)
+        return self.client._make_request(
+            "POST", "v1/company/users", data=data, transform=self._observe("users")
+        )
 
     def update_user(
         self,
@@ -122,7 +330,7 @@ class User:
         filials: List[int] | None = None,
         responsibles: List[int] | None = None,
         attributes: List[Dict[str, Any]] | None = None,
-    ) -> Dict[str, Any]:
+    ) -> Dict[str, Any] | None:
         """
         Updates the information of an existing user.
 
@@ -140,7 +348,7 @@ class User:
             attributes (List[Dict[str, Any]], optional): Updated list of attribute dictionaries. Defaults to None.
 
         Returns:
-            Dict[str, Any]: A dictionary containing the response from the Moyklass API.
+            Dict[str, Any]: A dictionary containing the response from the Moyklass API, or None if the client has a change_tracker and nothing changed.
         Note:
             https://api.moyklass.com/#tag/users/paths/~1v1~1company~1users~1%7BuserId%7D/post
         """
@@ -174,10 +382,71 @@ class User:
         if attributes is not None:
             data["attributes"] = attributes
 
+        tracker = self.client.change_tracker
+        if tracker is not None:
+            return self._update_tracked(user_id, data, tracker)
+
         return self.client._make_request(
-            "POST", f"v1/company/users/{user_id}", data=data
+            "POST",
+            f"v1/company/users/{user_id}",
+            data=data,
+            transform=self._observe("users", entity_id=user_id),
         )
 
+    def _update_tracked(
+        self, user_id: int, data: Dict[str, Any], tracker: ChangeTracker
+    ) -> Dict[str, Any] | None:
+        """
+        Sends only the fields of an update that differ from the known server state.
+
+        Args:
+            user_id (int): The ID of the user to update.
+            data (Dict[str, Any]): Request body built by update_user.
+            tracker (ChangeTracker): Known server state of users.
+
+        Returns:
+            Dict[str, Any]: Response of the Moyklass API or None if nothing changed and no request was sent.
+        """
+        changed = tracker.changes(user_id, data)
+        if changed is None:
+            return None
+        response = self.client._make_request(
+            "POST",
+            f"v1/company/users/{user_id}",
+            data=changed,
+            transform=self._observe("users", entity_id=user_id),
+        )
+        tracker.record(user_id, changed)
+        return response
+
+    def delete_user(self, user_id: int) -> Any:
+        """
+        Deletes a user.
+
+        The user is removed from the entity cache and the change tracker of the client.
+
+        Args:
+            user_id (int): The ID of the user to delete.
+
+        Returns:
+            Any: Response of the Moyklass API.
+
+        Note:
+            https://api.moyklass.com/#tag/users/paths/~1v1~1company~1users~1%7BuserId%7D/delete
+        """
+        response = self.client._make_request("DELETE", f"v1/company/users/{user_id}")
+        self._forget_user(user_id)
+        return response
+
+    def _forget_user(self, user_id: int) -> None:
+        """
+        Removes a deleted user from the entity cache and the change tracker of the client.
+        """
+        if self.client.entity_cache is not None:
+            self.client.entity_cache.invalidate("users", user_id)
+        if self.client.change_tracker is not None:
+            self.client.change_tracker.forget(user_id)
+
     def get_users(
         self,
         created_at: List[str] | None = None,
@@ -193,6 +462,9 @@ class User:
         amoCRM_contact_id: int | None = None,
         bitrix24_contact_id: int | None = None,
         include_pay_link: bool = False,
+        as_model: bool = False,
+        stream: bool = False,
+        fields: List[str] | None = None,
     ) -> Dict[str, Any]:
         """
         Retrieves a list of users based on specified filters.
@@ -211,6 +483,10 @@ class User:
             amoCRM_contact_id (int, optional): amoCRM contact ID filter. Defaults to None.
             bitrix24_contact_id (int, optional): Bitrix24 contact ID filter. Defaults to None.
             include_pay_link (bool, optional): Whether to include pay link. Defaults to False.
+            as_model (bool, optional): Return users as models.User instead of dictionaries. Defaults to False.
+            stream (bool, optional): Return an ItemStream yielding users while the response is downloaded instead of the whole page. Defaults to False.
+            fields (List[str], optional): Keys to keep in every record, nested ones as paths like "records.userId".
+                Without stream the page is still decoded whole before projection. Projected records are not stored in the entity cache. Defaults to None (all keys).
 
         Returns:
             Dict[str, Any]: A dictionary containing the response from the Moyklass API.
@@ -254,7 +530,146 @@ class User:
 
         params["includePayLink"] = str(include_pay_link).lower()
 
-        return self.client._make_request("GET", "v1/company/users", params=params)
+        model = models.User if as_model else None
+        if stream:
+            return self.client._stream_request(
+                "GET",
+                "v1/company/users",
+                "users",
+                params=params,
+                transform=self._observe(
+                    "users", self._track(item_parser(model)), fields=fields
+                ),
+            )
+
+        return self.client._make_request(
+            "GET",
+            "v1/company/users",
+            params=params,
+            transform=self._observe_page(
+                "users",
+                "users",
+                self._track_page(page_parser(model, "users")),
+                fields=fields,
+            ),
+        )
+
+    def iter_users(
+        self,
+        limit: int = MAX_PAGE_SIZE,
+        workers: int = 1,
+        ordered: bool = True,
+        **filters: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterates over all users matching the filters, fetching them page by page.
+
+        Args:
+            limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+            workers (int, optional): Number of pages requested concurrently. Defaults to 1.
+            ordered (bool, optional): Keep the server order when workers is greater than 1, otherwise yield pages as they arrive. Defaults to True.
+            **filters: Any argument of get_users (e.g. created_at, phone, sort, as_model, stream, fields).
+
+        Yields:
+            Dict[str, Any] | models.User: User.
+        """
+        offset = filters.pop("offset", 0)
+
+        def fetch(offset: int, limit: int) -> Dict[str, Any]:
+            return self.get_users(offset=offset, limit=limit, **filters)
+
+        return paginate(
+            fetch,
+            "users",
+            offset=offset,
+            limit=limit,
+            workers=workers,
+            ordered=ordered,
+            client=self.client,
+        )
+
+    def build_contact_index(self, workers: int = 1) -> ContactIndex:
+        """
+        Builds an index of phone numbers and email addresses of all users.
+
+        Args:
+            workers (int, optional): Number of pages requested concurrently. Defaults to 1.
+
+        Returns:
+            ContactIndex: Normalized phone/email -> user ID index.
+
+        Note:
+            If the client has a change_tracker, the scanned users are also passed to it by iter_users.
+        """
+        index = ContactIndex()
+        for user in self.iter_users(workers=workers, ordered=False):
+            index.add(user)
+        return index
+
+    def upsert_users(
+        self,
+        users: Iterable[Dict[str, Any]],
+        workers: int = 4,
+        index: ContactIndex | None = None,
+    ) -> BulkReport:
+        """
+        Creates or updates many users, matching them by phone number or email.
+
+        Each row is a dictionary of create_user arguments. Existing users are
+        found in a local index built from one scan of all users instead of a
+        get_users request per row, so every row costs a single request. Users
+        created along the way are added to the index, so two rows with the
+        same phone or email create one user and update it. With a client
+        change_tracker, rows that match the scanned users are not sent at all
+        and are reported as unchanged. A row with arguments create_user does
+        not accept is reported as failed without a request.
+
+        Args:
+            users (Iterable[Dict[str, Any]]): Rows with create_user arguments.
+            workers (int, optional): Number of concurrent requests. Defaults to 4.
+            index (ContactIndex, optional): Index to reuse between calls. Defaults to a new index built by build_contact_index().
+
+        Returns:
+            BulkReport: Result of every row ordered by input index, record_id is the user ID.
+        """
+        index = index if index is not None else self.build_contact_index()
+        create_signature = inspect.signature(self.create_user)
+        update_signature = inspect.signature(self.update_user)
+
+        def process(row: tuple) -> BulkRowResult:
+            row_index, spec = row
+            # Only the arguments are checked here, a TypeError raised while
+            # sending the row is a bug and is not reported as a bad row
+            try:
+                create_signature.bind(**spec)
+                update_signature.bind(0, **spec)
+            except TypeError as err:
+                return BulkRowResult(
+                    row_index, None, BulkStatus.FAILED, error=f"Invalid row: {err}"
+                )
+            row_key = fingerprint(spec)
+            keys = contact_keys(spec.get("phone"), spec.get("email"))
+            user_id, reserved = index.claim(keys)
+            try:
+                if user_id is not None:
+                    response = self.update_user(user_id=user_id, **spec)
+                    status = (
+                        BulkStatus.UNCHANGED if response is None else BulkStatus.UPDATED
+                    )
+                    return BulkRowResult(row_index, row_key, status, user_id)
+                response = self.create_user(**spec)
+                if isinstance(response, dict):
+                    user_id = response.get("id")
+                return BulkRowResult(row_index, row_key, BulkStatus.CREATED, user_id)
+            except MoyklassApiException as err:
+                error = str(err)
+            finally:
+                if reserved:
+                    index.release(keys, user_id)
+            return BulkRowResult(row_index, row_key, BulkStatus.FAILED, error=error)
+
+        results = map_bounded(process, enumerate(users), workers)
+        return BulkReport(sorted(results, key=lambda row: row.index))
 
     def get_user_attributes(self) -> Dict[str, Any]:
         """
@@ -282,6 +697,9 @@ class User:
         status_id: List[UserSubscriptionId] | None = None,
         offset: int = 0,
         limit: int = 100,
+        as_model: bool = False,
+        stream: bool = False,
+        fields: List[str] | None = None,
     ) -> Dict[str, Any]:
         """
         Retrieves a list of user subscriptions based on specified filters.
@@ -299,6 +717,10 @@ class User:
             status_id (List[UserSubscriptionId], optional): The status ID(s) associated with the subscriptions. Defaults to None.
             offset (int, optional): Result offset for pagination. Defaults to 0.
             limit (int, optional): Maximum number of results to return. Defaults to 100.
+            as_model (bool, optional): Return subscriptions as models.UserSubscription instead of dictionaries. Defaults to False.
+            stream (bool, optional): Return an ItemStream yielding subscriptions while the response is downloaded instead of the whole page. Defaults to False.
+            fields (List[str], optional): Keys to keep in every record, nested ones as paths like "records.userId".
+                Without stream the page is still decoded whole before projection. Projected records are not stored in the entity cache. Defaults to None (all keys).
 
         Returns:
             Dict[str, Any]: A dictionary containing the response from the Moyklass API.
@@ -345,10 +767,152 @@ class User:
         params["offset"] = offset
         params["limit"] = limit
 
+        model = models.UserSubscription if as_model else None
+        if stream:
+            return self.client._stream_request(
+                "GET",
+                "v1/company/userSubscriptions",
+                "subscriptions",
+                params=params,
+                transform=self._observe(
+                    "userSubscriptions", item_parser(model), fields=fields
+                ),
+            )
+
         return self.client._make_request(
-            "GET", "v1/company/userSubscriptions", params=params
+            "GET",
+            "v1/company/userSubscriptions",
+            params=params,
+            transform=self._observe_page(
+                "userSubscriptions",
+                "subscriptions",
+                page_parser(model, "subscriptions"),
+                fields=fields,
+            ),
         )
 
+    def iter_user_subscriptions(
+        self,
+        limit: int = MAX_PAGE_SIZE,
+        workers: int = 1,
+        ordered: bool = True,
+        **filters: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterates over all user subscriptions matching the filters, fetching them page by page.
+
+        Args:
+            limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+            workers (int, optional): Number of pages requested concurrently. Defaults to 1.
+            ordered (bool, optional): Keep the server order when workers is greater than 1, otherwise yield pages as they arrive. Defaults to True.
+            **filters: Any argument of get_user_subscriptions (e.g. user_id, status_id, as_model, stream, fields).
+
+        Yields:
+            Dict[str, Any] | models.UserSubscription: User subscription.
+        """
+        offset = filters.pop("offset", 0)
+
+        def fetch(offset: int, limit: int) -> Dict[str, Any]:
+            return self.get_user_subscriptions(offset=offset, limit=limit, **filters)
+
+        return paginate(
+            fetch,
+            "subscriptions",
+            offset=offset,
+            limit=limit,
+            workers=workers,
+            ordered=ordered,
+            client=self.client,
+        )
+
+    def plan_user_subscriptions(
+        self, user_ids: Iterable[int], limit: int = MAX_PAGE_SIZE, **filters: Any
+    ) -> str:
+        """
+        Chooses how get_user_subscriptions_for_users loads the subscriptions of several users.
+
+        Fan-out takes a request per user, a scan takes a request per page of
+        the list filtered by filters. The number of pages is requested with a
+        one-item page, which is only sent for more than two users.
+
+        Args:
+            user_ids (Iterable[int]): IDs of the users.
+            limit (int, optional): Page size of the scan. Defaults to MAX_PAGE_SIZE.
+            **filters: Filters of get_user_subscriptions except user_id, offset, limit and stream (e.g. status_id, class_id, course_id).
+
+        Returns:
+            str: FAN_OUT or SCAN, whichever takes fewer requests.
+        """
+        count = len(set(user_ids))
+        if count <= 2:
+            return FAN_OUT
+        page = self.get_user_subscriptions(**subscription_probe_filters(filters))
+        return cheaper_strategy(page, count, limit)
+
+    def get_user_subscriptions_for_users(
+        self,
+        user_ids: Iterable[int],
+        workers: int = 8,
+        limit: int = MAX_PAGE_SIZE,
+        strategy: str | None = None,
+        **filters: Any,
+    ) -> Dict[int, List[Any] | MoyklassApiException]:
+        """
+        Retrieves the subscriptions of several users.
+
+        The subscriptions are requested per user with up to workers concurrent
+        requests, or the list filtered by filters is scanned once and split by
+        userId, whichever plan_user_subscriptions finds cheaper. With fan-out a
+        failed user does not fail the whole batch.
+
+        Args:
+            user_ids (Iterable[int]): IDs of the users.
+            workers (int, optional): Maximum number of concurrent requests. Defaults to 8.
+            limit (int, optional): Page size. Defaults to MAX_PAGE_SIZE.
+            strategy (str, optional): FAN_OUT or SCAN to skip the estimate. Defaults to None.
+            **filters: Filters of get_user_subscriptions except user_id, offset, limit and stream (e.g. status_id, class_id, as_model).
+                With fields, "userId" is added to them for the scan.
+
+        Returns:
+            Dict[int, List[Any] | MoyklassApiException]: User ID -> subscriptions of the user, or the exception raised while loading them.
+
+        Raises:
+            ValueError: If strategy is unknown.
+            MoyklassApiException: If the scan fails.
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+        if not unique_ids:
+            return {}
+        if strategy is None:
+            strategy = self.plan_user_subscriptions(unique_ids, limit, **filters)
+        if strategy not in (FAN_OUT, SCAN):
+            raise ValueError(f"Unknown strategy {strategy!r}")
+
+        result: Dict[int, List[Any] | MoyklassApiException] = {}
+        if strategy == SCAN:
+            result.update((user_id, []) for user_id in unique_ids)
+            subscriptions = self.iter_user_subscriptions(
+                limit=limit, workers=workers, **subscription_scan_filters(filters)
+            )
+            for subscription in subscriptions:
+                owner = subscription_owner(subscription)
+                if owner in result:
+                    result[owner].append(subscription)
+            return result
+
+        def load(user_id: int) -> tuple:
+            try:
+                subscriptions = self.iter_user_subscriptions(
+                    user_id=user_id, limit=limit, **filters
+                )
+                return user_id, list(subscriptions)
+            except MoyklassApiException as err:
+                return user_id, err
+
+        result.update((user_id, None) for user_id in unique_ids)
+        result.update(map_bounded(load, unique_ids, workers))
+        return result
+
     def create_user_subscription(
         self,
         user_id: int,
@@ -442,7 +1006,10 @@ class User:
         data["useLeftovers"] = use_leftovers
 
         return self.client._make_request(
-            "POST", "v1/company/userSubscriptions", data=data
+            "POST",
+            "v1/company/userSubscriptions",
+            data=data,
+            transform=self._observe("userSubscriptions"),
         )
 
     def set_user_subscription_status(
@@ -466,4 +1033,11 @@ class User:
             data["statusId"] = status_id.value
 
         url = f"v1/company/userSubscriptions/{user_subscription_id}/status"
-        return self.client._make_request("POST", url, data=data)
\ No newline at end of file
+        return self.client._make_request(
+            "POST",
+            url,
+            data=data,
+            transform=self._observe(
+                "userSubscriptions", entity_id=user_subscription_id
+            ),
+        )
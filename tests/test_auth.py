@@ -0,0 +1,77 @@
+import pytest
+import requests
+
+from benchmarks.stand_in import StandInServer
+from moyklass_api.auth import TokenManager
+from moyklass_api.client import MoyklassApi
+from moyklass_api.payment import Payment
+
+
+@pytest.fixture
+def server():
+    with StandInServer(total_items=10) as server:
+        yield server
+
+
+def test_expired_token_is_refreshed_once(server):
+    with MoyklassApi("key", base_url=server.url) as mc:
+        server.expire_tokens()
+
+        assert Payment(mc).get_payments(limit=1)["payments"]
+        assert Payment(mc).get_payments(limit=1)["payments"]
+        assert mc.token_manager.refreshes == 1
+        assert server.tokens_issued == 2
+
+
+def test_own_manager_revokes_the_token_on_exit(server):
+    with MoyklassApi("key", base_url=server.url) as mc:
+        token = mc.token
+
+    response = requests.get(
+        f"{server.url}/v1/company/payments", headers={"x-access-token": token}
+    )
+
+    assert mc.token is None
+    assert response.status_code == 401
+
+
+def test_shared_manager_is_not_revoked_by_the_first_client(server):
+    manager = TokenManager()
+    first = MoyklassApi("key", base_url=server.url, token_manager=manager)
+    second = MoyklassApi("key", base_url=server.url, token_manager=manager)
+
+    with first:
+        with second:
+            Payment(second).get_payments(limit=1)
+        assert manager.token is not None
+        assert Payment(first).get_payments(limit=1)["payments"]
+
+    assert server.tokens_issued == 1
+
+
+def test_client_without_a_token_requests_one_after_401(server):
+    manager = TokenManager(revoke_on_exit=True)
+    other = MoyklassApi("key", base_url=server.url, token_manager=manager)
+
+    with MoyklassApi("key", base_url=server.url, token_manager=manager):
+        pass
+
+    assert manager.token is None
+    assert Payment(other).get_payments(limit=1)["payments"]
+    assert server.tokens_issued == 2
+
+
+@pytest.mark.parametrize(
+    "revoke_on_exit, token_file, owner, expected",
+    [
+        (None, None, True, True),
+        (None, None, False, False),
+        (None, "token.json", True, False),
+        (True, None, False, True),
+        (False, None, True, False),
+    ],
+)
+def test_revokes_on_exit(revoke_on_exit, token_file, owner, expected):
+    manager = TokenManager(token_file=token_file, revoke_on_exit=revoke_on_exit)
+
+    assert manager.revokes_on_exit(owner) is expected
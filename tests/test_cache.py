@@ -0,0 +1,170 @@
+import pytest
+
+from moyklass_api import cache as cache_module
+from moyklass_api.cache import DiskCache, EntityCache, MemoryCache, ResponseCache
+
+
+class Clock:
+    now = 1000.0
+
+    @classmethod
+    def time(cls):
+        return cls.now
+
+    monotonic = time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(Clock, "now", 1000.0)
+    monkeypatch.setattr(cache_module, "time", Clock)
+    return Clock
+
+
+@pytest.fixture(params=["memory", "disk"])
+def make_backend(request, tmp_path):
+    backends = []
+
+    def make(**limits):
+        if request.param == "memory":
+            backend = MemoryCache(**limits)
+        else:
+            backend = DiskCache(str(tmp_path / "cache.sqlite3"), **limits)
+        backends.append(backend)
+        return backend
+
+    yield make
+    for backend in backends:
+        if isinstance(backend, DiskCache):
+            backend.close()
+
+
+def test_entries_expire_after_the_ttl(make_backend, clock):
+    backend = make_backend()
+    backend.set("a", b"1", ttl=10)
+
+    clock.now += 9
+    assert backend.get("a") == b"1"
+    clock.now += 1
+    assert backend.get("a") is None
+    assert len(backend) == 0
+
+
+def test_least_recently_used_entries_are_evicted(make_backend, clock):
+    backend = make_backend(max_entries=2)
+    backend.set("a", b"1", ttl=60)
+    clock.now += 1
+    backend.set("b", b"2", ttl=60)
+    clock.now += 1
+    backend.get("a")
+    clock.now += 1
+
+    backend.set("c", b"3", ttl=60)
+
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == (b"1", None, b"3")
+
+
+def test_entries_are_evicted_by_total_size(make_backend, clock):
+    backend = make_backend(max_bytes=10)
+    backend.set("a", b"x" * 6, ttl=60)
+    clock.now += 1
+
+    backend.set("b", b"y" * 6, ttl=60)
+    backend.set("c", b"z" * 11, ttl=60)
+
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == (
+        None,
+        b"y" * 6,
+        None,
+    )
+    assert backend.size == 6
+
+
+def test_disk_cache_survives_reopening(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    backend = DiskCache(path)
+    backend.set("a", b"1", ttl=60)
+    backend.close()
+
+    backend = DiskCache(path)
+    try:
+        assert backend.get("a") == b"1"
+        backend.delete("a")
+        assert len(backend) == 0
+    finally:
+        backend.close()
+
+
+def test_response_cache_keeps_only_listed_get_endpoints():
+    cache = ResponseCache(ttls={"v1/company/courses": 60})
+
+    assert cache.ttl_for("GET", "v1/company/courses") == 60
+    assert cache.ttl_for("POST", "v1/company/courses") is None
+    assert cache.ttl_for("GET", "v1/company/users") is None
+    assert cache.key("p", {"b": 1, "a": 2}) == cache.key("p", {"a": 2, "b": 1})
+
+
+def test_api_keys_sharing_a_backend_do_not_mix(make_backend, clock):
+    backend = make_backend()
+    first, second = ResponseCache(backend), ResponseCache(backend)
+    first.bind("key-1")
+    second.bind("key-2")
+
+    first.set("v1/company/courses", None, b"first", ttl=60)
+    first.set("v1/company/classes", None, b"classes", ttl=60)
+    second.set("v1/company/courses", None, b"second", ttl=60)
+    first.invalidate()
+
+    assert first.get("v1/company/courses") is None
+    assert second.get("v1/company/courses") == b"second"
+    assert first.stats()["misses"] == 1
+    assert second.stats()["hits"] == 1
+    assert len(backend) == 1
+
+
+def test_invalidate_removes_one_endpoint(make_backend, clock):
+    cache = ResponseCache(make_backend())
+    cache.bind("key")
+    cache.set("v1/company/courses", {"id": 1}, b"1", ttl=60)
+    cache.set("v1/company/courses", {"id": 2}, b"2", ttl=60)
+    cache.set("v1/company/classes", None, b"3", ttl=60)
+
+    cache.invalidate("v1/company/courses")
+
+    assert cache.get("v1/company/courses", {"id": 1}) is None
+    assert cache.get("v1/company/classes") == b"3"
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_entity_cache_expires_and_evicts_records(clock):
+    cache = EntityCache(max_entries=2, ttl=10)
+    cache.set("users", 1, {"id": 1})
+    cache.set_many("users", [(2, {"id": 2}), (3, {"id": 3})])
+
+    assert cache.get("users", 1) is None
+    clock.now += 10
+    assert cache.get("users", 2) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entity_cache_invalidation():
+    cache = EntityCache()
+    cache.set_many("users", [(1, {"id": 1}), (2, {"id": 2})])
+    cache.set("userSubscriptions", 1, {"id": 1})
+
+    cache.invalidate("users", 1)
+    assert (cache.get("users", 1), cache.get("users", 2)) == (None, {"id": 2})
+    cache.invalidate("users")
+    assert len(cache) == 1
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_record_observer_replaces_or_removes_the_written_record():
+    cache = EntityCache()
+    cache.set("users", 1, {"id": 1, "name": "A"})
+
+    cache.record_observer("users", entity_id=1)({"id": 1, "name": "B"})
+    assert cache.get("users", 1) == {"id": 1, "name": "B"}
+    cache.record_observer("users", entity_id=1)({"code": "ok"})
+    assert cache.get("users", 1) is None
@@ -0,0 +1,79 @@
+from moyklass_api.changes import ChangeTracker
+
+USER = {
+    "id": 1,
+    "name": "Иван",
+    "phone": "79001234567",
+    "email": "ivan@example.com",
+    "filials": [2, 1],
+    "attributes": [{"attributeId": 5, "value": "x", "attributeAlias": "a"}],
+}
+
+
+def test_unknown_user_is_sent_in_full():
+    tracker = ChangeTracker()
+    data = {"name": "Иван", "phone": "79001234567"}
+
+    assert tracker.changes(1, data) is data
+    assert tracker.stats()["sent"] == 1
+
+
+def test_equivalent_values_are_not_changes():
+    tracker = ChangeTracker()
+    tracker.observe(USER)
+    data = {
+        "name": "Иван",
+        "phone": "8 (900) 123-45-67",
+        "email": "IVAN@example.com ",
+        "filials": [1, 2],
+        "attributes": [{"attributeId": 5, "value": "x"}],
+    }
+
+    assert tracker.changes(1, data) is None
+    assert tracker.stats()["skipped"] == 1
+
+
+def test_only_changed_fields_and_name_are_sent():
+    tracker = ChangeTracker()
+    tracker.observe(USER)
+
+    data = {"name": "Иван", "phone": "79990000000", "email": "ivan@example.com"}
+    changed = tracker.changes(1, data)
+
+    assert changed == {"phone": "79990000000", "name": "Иван"}
+    assert tracker.stats()["fields_skipped"] == 1
+
+
+def test_record_and_projected_observe_keep_the_known_state():
+    tracker = ChangeTracker()
+    tracker.observe(USER)
+    tracker.record(1, {"name": "Пётр"})
+    tracker.observe({"id": 1, "email": "ivan@example.com"})
+
+    assert tracker.changes(1, {"name": "Пётр", "phone": "79001234567"}) is None
+
+
+def test_observers_see_raw_users_before_the_transform():
+    tracker = ChangeTracker()
+    page = {"users": [USER, {"id": 2, "name": "Анна"}]}
+
+    ids = tracker.page_observer("users", lambda page: len(page["users"]))(page)
+    name = tracker.record_observer(lambda user: user["name"])({"id": 3, "name": "Олег"})
+
+    assert (ids, name) == (2, "Олег")
+    assert len(tracker) == 3
+    assert tracker.changes(2, {"name": "Анна"}) is None
+
+
+def test_attributes_with_values_of_different_types():
+    tracker = ChangeTracker()
+    attributes = [
+        {"attributeId": 5, "value": "x"},
+        {"attributeId": 5, "value": 3},
+        {"attributeId": 7, "value": ["a", "b"]},
+        {"attributeId": 7, "value": None},
+    ]
+    tracker.observe({"id": 1, "attributes": attributes})
+
+    assert tracker.changes(1, {"attributes": attributes[::-1]}) is None
+    assert tracker.changes(1, {"attributes": attributes[:3]}) is not None
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from moyklass_api import codec as codec_module
+from moyklass_api.codec import CODECS, get_codec
+
+AVAILABLE = [name for name, module in codec_module._BACKENDS.items() if module]
+
+
+@pytest.fixture(params=AVAILABLE)
+def codec(request):
+    return get_codec(request.param)
+
+
+def test_codec_uses_the_requested_backend(codec):
+    assert isinstance(codec, CODECS[codec.name])
+
+
+def test_bytes_and_text_are_decoded(codec):
+    document = '{"name": "Иван", "ids": [1, 2], "paid": 1.5, "comment": null}'
+    expected = {"name": "Иван", "ids": [1, 2], "paid": 1.5, "comment": None}
+
+    assert codec.loads(document) == expected
+    assert codec.loads(document.encode()) == expected
+    assert codec.decode(document.encode(), lambda data: data["ids"]) == [1, 2]
+
+
+def test_request_bodies_are_utf8_without_escapes(codec):
+    body = codec.dumps({"name": "Пётр", "filials": [1]})
+
+    assert isinstance(body, bytes)
+    assert "Пётр".encode() in body
+    assert b"\\u" not in body
+    assert json.loads(body) == {"name": "Пётр", "filials": [1]}
+
+
+def test_invalid_documents_raise_value_error(codec):
+    with pytest.raises(ValueError):
+        codec.loads(b"<html>")
+
+
+def test_fastest_installed_backend_is_the_default(monkeypatch):
+    assert get_codec().name == AVAILABLE[0]
+
+    monkeypatch.setitem(codec_module._BACKENDS, "orjson", None)
+    monkeypatch.setitem(codec_module._BACKENDS, "ujson", None)
+
+    assert get_codec().name == "json"
+    with pytest.raises(ValueError, match="not installed"):
+        get_codec("orjson")
+    with pytest.raises(ValueError, match="Unknown"):
+        get_codec("simplejson")
@@ -0,0 +1,59 @@
+import threading
+import time
+
+from moyklass_api.contacts import ContactIndex, contact_keys, normalize_phone
+
+
+def test_phone_and_email_normalization():
+    assert normalize_phone("8 (900) 123-45-67") == "79001234567"
+    assert normalize_phone("900 123 45 67") == "79001234567"
+    assert normalize_phone("+7 900 123-45-67") == "79001234567"
+    assert normalize_phone("") is None
+    assert contact_keys("8 900 123 45 67", " User@Example.com ") == [
+        "phone:79001234567",
+        "email:user@example.com",
+    ]
+
+
+def test_claim_finds_an_indexed_user():
+    index = ContactIndex().build([{"id": 7, "phone": "79001234567", "email": None}])
+
+    assert index.claim(contact_keys(phone="8 900 123-45-67")) == (7, False)
+    assert index.lookup(email="nobody@example.com") is None
+
+
+def test_claim_reserves_keys_and_release_indexes_the_new_user():
+    index = ContactIndex()
+    keys = contact_keys("79001234567", "a@example.com")
+
+    assert index.claim(keys) == (None, True)
+    index.release(keys, 42)
+
+    assert index.claim(contact_keys(email="A@example.com")) == (42, False)
+    assert len(index) == 2
+
+
+def test_concurrent_claim_waits_for_the_pending_user():
+    index = ContactIndex()
+    keys = contact_keys(phone="79001234567")
+    assert index.claim(keys) == (None, True)
+    results = []
+
+    waiter = threading.Thread(target=lambda: results.append(index.claim(keys)))
+    waiter.start()
+    time.sleep(0.05)
+    assert results == []
+
+    index.release(keys, 42)
+    waiter.join(timeout=1)
+    assert results == [(42, False)]
+
+
+def test_failed_creation_lets_the_next_claim_reserve_again():
+    index = ContactIndex()
+    keys = contact_keys(phone="79001234567")
+    index.claim(keys)
+
+    index.release(keys, None)
+
+    assert index.claim(keys) == (None, True)
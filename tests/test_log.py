@@ -0,0 +1,31 @@
+import json
+
+from moyklass_api.log import SECRET_MARGIN, RequestLog
+
+
+def test_body_is_redacted_before_the_cut():
+    log = RequestLog(max_body=30)
+    body = json.dumps({"accessToken": "t" * 40, "name": "x" * 100})
+
+    text = log.body(body.encode())
+
+    assert "t" * 5 not in text
+    assert text.startswith('{"accessToken": "***", "name"')
+    assert text.endswith(f"... ({len(body)} total)")
+
+
+def test_small_bodies_are_kept_whole():
+    log = RequestLog(max_body=100)
+
+    assert log.body({"apiKey": "secret", "id": 1}) == "{'apiKey': '***', 'id': 1}"
+    assert log.body(b'{"id": 1}') == '{"id": 1}'
+    assert log.body(None) == ""
+
+
+def test_large_bodies_are_cut_before_decoding():
+    log = RequestLog(max_body=10)
+    body = "я" * (10 * (10 + SECRET_MARGIN))
+
+    text = log.body(body.encode())
+
+    assert text == "я" * 10 + f"... ({len(body.encode())} total)"
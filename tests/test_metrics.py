@@ -0,0 +1,90 @@
+import logging
+
+import pytest
+
+from benchmarks.stand_in import StandInServer
+from moyklass_api.client import MoyklassApi
+from moyklass_api.metrics import (
+    MetricsCollector,
+    RequestEvent,
+    RequestHook,
+    endpoint_template,
+)
+
+
+def event(path, latency, status=200, method="GET"):
+    request = RequestEvent(method, path)
+    request.latency = latency
+    request.status = status
+    return request
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("v1/company/users/42", "v1/company/users/{userId}"),
+        ("v1/company/classes/7", "v1/company/classes/{classId}"),
+        (
+            "v1/company/userSubscriptions/5/status",
+            "v1/company/userSubscriptions/{userSubscriptionId}/status",
+        ),
+        ("v1/company/payments", "v1/company/payments"),
+    ],
+)
+def test_endpoint_template(path, expected):
+    assert endpoint_template(path) == expected
+
+
+def test_percentiles_of_the_latest_samples():
+    metrics = MetricsCollector(sample_size=100)
+    for i in range(1, 201):
+        metrics.after_request(event(f"v1/company/users/{i}", i / 1000))
+
+    stats = metrics.snapshot()["GET v1/company/users/{userId}"]
+
+    assert stats["count"] == 200
+    assert stats["latency_avg"] == pytest.approx(0.1005)
+    assert (stats["latency_p50"], stats["latency_p95"], stats["latency_p99"]) == (
+        0.15,
+        0.195,
+        0.199,
+    )
+
+
+def test_prometheus_export():
+    metrics = MetricsCollector(prefix="mk")
+    metrics.after_request(event("v1/company/payments", 0.5))
+    failed = event("v1/company/payments", 0.25, status=None)
+    failed.error = ValueError("timeout")
+    metrics.after_request(failed)
+
+    lines = metrics.export_prometheus().splitlines()
+    labels = 'method="GET",endpoint="v1/company/payments"'
+
+    assert "# TYPE mk_requests_total counter" in lines
+    assert f'mk_requests_total{{{labels},status="200"}} 1' in lines
+    assert f'mk_requests_total{{{labels},status="error"}} 1' in lines
+    assert f'mk_request_duration_seconds{{{labels},quantile="0.5"}} 0.25' in lines
+    assert f"mk_request_duration_seconds_sum{{{labels}}} 0.75" in lines
+    assert f"mk_request_duration_seconds_count{{{labels}}} 2" in lines
+
+
+def test_failing_hooks_do_not_fail_requests(caplog):
+    class Broken(RequestHook):
+        def before_request(self, event):
+            raise RuntimeError("before")
+
+        def after_request(self, event):
+            raise RuntimeError("after")
+
+    metrics = MetricsCollector()
+    with StandInServer(total_items=5) as server:
+        mc = MoyklassApi("key", base_url=server.url, hooks=[Broken(), metrics])
+        mc.token_manager.set(server.issue_token())
+        with caplog.at_level(logging.WARNING, logger="moyklass_api"):
+            user = mc._make_request("GET", "v1/company/users/3")
+        mc.close()
+
+    assert user["id"] == 3
+    assert metrics.snapshot()["GET v1/company/users/{userId}"]["count"] == 1
+    assert len(caplog.records) == 2
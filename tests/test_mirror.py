@@ -0,0 +1,57 @@
+from datetime import date
+
+import pytest
+
+from moyklass_api import mirror as mirror_module
+from moyklass_api.client import MoyklassApi
+from moyklass_api.lesson import Lesson
+from moyklass_api.mirror import SqliteMirror
+
+
+@pytest.fixture
+def lessons(monkeypatch):
+    calls = []
+    stored = []
+
+    def iter_lessons(self, **filters):
+        calls.append(filters)
+        return iter(stored)
+
+    monkeypatch.setattr(Lesson, "iter_lessons", iter_lessons)
+    monkeypatch.setattr(mirror_module, "_today", lambda: date(2024, 5, 10))
+    return calls, stored
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = SqliteMirror(
+        MoyklassApi("key"),
+        str(tmp_path / "mirror.sqlite3"),
+        lesson_lookback_days=7,
+        lesson_horizon_days=30,
+        lesson_history_days=365,
+    )
+    yield mirror
+    mirror.close()
+
+
+def test_first_lessons_sync_is_bounded(mirror, lessons):
+    calls, _ = lessons
+
+    mirror.sync_lessons()
+
+    assert calls[0]["date"] == ["2023-05-11", "2024-06-09"]
+    assert mirror.get_checkpoint("lessons") is None
+
+
+def test_lessons_checkpoint_is_the_latest_stored_past_date(mirror, lessons):
+    calls, stored = lessons
+    stored.append({"id": 1, "date": "2024-05-07"})
+
+    mirror.sync_lessons()
+    assert mirror.get_checkpoint("lessons") == "2024-05-07"
+
+    stored.append({"id": 2, "date": "2024-05-13"})
+    mirror.sync_lessons()
+    assert calls[1]["date"] == ["2024-04-30", "2024-06-09"]
+    assert mirror.get_checkpoint("lessons") == "2024-05-10"
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from benchmarks.stand_in import StandInServer
+from moyklass_api import pagination
+from moyklass_api.client import MoyklassApi, MoyklassApiException
+from moyklass_api.payment import Payment
+
+
+def test_fan_out_shrinks_on_the_first_throttled_page(monkeypatch):
+    lock = threading.Lock()
+    running = []
+    throttled = []
+    # Number of running fetches seen by every fetch and the backoffs before it
+    entries = []
+    backoffs = []
+
+    class Clock:
+        @staticmethod
+        def sleep(seconds):
+            # Fetches submitted before the backoff may not have started yet
+            time.sleep(0.05)
+            backoffs.append(seconds)
+
+    monkeypatch.setattr(pagination, "time", Clock)
+
+    with StandInServer(
+        total_items=1000, latency=0.2, max_concurrent_requests=1, retry_after=30
+    ) as server:
+        mc = MoyklassApi("key", base_url=server.url)
+        mc.token_manager.set(server.issue_token())
+        payment = Payment(mc)
+
+        def fetch(offset, limit):
+            with lock:
+                running.append(offset)
+                entries.append((len(backoffs), len(running)))
+            try:
+                return payment.get_payments(offset=offset, limit=limit)
+            except MoyklassApiException as err:
+                throttled.append(err.status_code)
+                raise
+            finally:
+                with lock:
+                    running.remove(offset)
+
+        started = time.monotonic()
+        items = list(
+            pagination.iter_pages_parallel(
+                fetch,
+                "payments",
+                limit=100,
+                workers=4,
+                # Backoffs take no time, so a page may be throttled many times
+                max_throttle_retries=100,
+                client=mc,
+            )
+        )
+        elapsed = time.monotonic() - started
+        mc.close()
+
+    assert [item["id"] for item in items] == list(range(1, 1001))
+    # The client returned the 429 at once instead of waiting Retry-After itself
+    assert elapsed < 10
+    assert throttled and set(throttled) == {429}
+    # Four pages were requested at once, the first one after a backoff at most two
+    assert max(count for seen, count in entries if not seen) > 2
+    assert next(count for seen, count in entries if seen) <= 2
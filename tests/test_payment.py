@@ -0,0 +1,55 @@
+import pytest
+
+from benchmarks.stand_in import StandInServer
+from moyklass_api.bulk import BulkStatus
+from moyklass_api.client import MoyklassApi
+from moyklass_api.payment import Payment, PaymentOptype
+
+ROW = {
+    "user_id": 1,
+    "date": "2024-01-24",
+    "summa": 1000,
+    "optype": PaymentOptype.INCOME,
+    "payment_type_id": 1,
+}
+
+
+@pytest.fixture
+def payment():
+    with StandInServer(total_items=10) as server:
+        mc = MoyklassApi("key", base_url=server.url)
+        mc.token_manager.set(server.issue_token())
+        yield Payment(mc)
+        mc.close()
+
+
+def test_identical_rows_without_key_are_all_created(payment):
+    report = payment.create_payments_bulk([ROW, dict(ROW)], workers=2)
+
+    assert [row.status for row in report.rows] == [BulkStatus.CREATED] * 2
+
+
+def test_bad_rows_and_keys_fail_alone(payment):
+    rows = [ROW, {**ROW, "amount": 1}, {**ROW, "comment": "x"}]
+
+    report = payment.create_payments_bulk(
+        rows, key=lambda row: row["comment"], workers=2
+    )
+
+    assert [row.status for row in report.rows] == [
+        BulkStatus.FAILED,
+        BulkStatus.FAILED,
+        BulkStatus.CREATED,
+    ]
+    assert report.rows[0].error == "Invalid key: KeyError('comment')"
+    assert report.rows[1].error.startswith("Invalid row:")
+
+
+def test_type_errors_of_the_request_are_raised(payment, monkeypatch):
+    def broken(*args, **kwargs):
+        raise TypeError("bug")
+
+    monkeypatch.setattr(payment.client, "_make_request", broken)
+
+    with pytest.raises(TypeError, match="bug"):
+        payment.create_payments_bulk([ROW])
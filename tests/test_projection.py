@@ -0,0 +1,45 @@
+from moyklass_api.projection import compile_fields, project, projector
+
+
+def test_compile_fields_builds_a_tree():
+    tree = compile_fields(["id", "records.userId", "records.visit", "stats"])
+
+    assert tree == {
+        "id": None,
+        "records": {"userId": None, "visit": None},
+        "stats": None,
+    }
+
+
+def test_whole_value_wins_over_nested_paths_in_any_order():
+    assert compile_fields(["records", "records.userId"]) == {"records": None}
+    assert compile_fields(["records.userId", "records"]) == {"records": None}
+
+
+def test_project_keeps_paths_in_records_and_lists():
+    lesson = {
+        "id": 1,
+        "date": "2024-01-01",
+        "records": [{"userId": 5, "visit": True}, {"userId": 6, "visit": False}],
+    }
+
+    projected = project(lesson, compile_fields(["id", "records.userId"]))
+
+    assert projected == {"id": 1, "records": [{"userId": 5}, {"userId": 6}]}
+
+
+def test_project_skips_missing_keys_and_keeps_scalars():
+    tree = compile_fields(["id", "user.name"])
+
+    assert project({"user": None}, tree) == {"user": None}
+    assert project({"name": "x"}, tree) == {}
+    assert project(42, tree) == 42
+
+
+def test_projector():
+    project_record = projector(["id"])
+
+    assert [project_record(item) for item in ({"id": 1, "x": 2}, {"x": 3})] == [
+        {"id": 1},
+        {},
+    ]
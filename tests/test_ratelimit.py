@@ -0,0 +1,44 @@
+import pytest
+
+from moyklass_api.ratelimit import RateLimiter, parse_retry_after
+
+
+def test_burst_is_free_then_requests_are_spaced():
+    limiter = RateLimiter(rate=10, burst=2)
+
+    waits = [limiter.reserve() for _ in range(4)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.01)
+    assert waits[3] == pytest.approx(0.2, abs=0.01)
+
+
+def test_throttle_reduces_the_rate_and_blocks():
+    limiter = RateLimiter(rate=10, burst=5, min_rate=2)
+
+    limiter.throttle(retry_after=1.0)
+
+    assert limiter.rate == 5
+    assert limiter.reserve() == pytest.approx(1.0, abs=0.05)
+    for _ in range(5):
+        limiter.throttle(retry_after=0)
+    assert limiter.rate == 2
+    assert limiter.throttled == 6
+
+
+def test_recover_returns_to_the_maximum_rate():
+    limiter = RateLimiter(rate=10, recovery=0.25)
+    limiter.throttle(retry_after=0)
+
+    limiter.recover()
+    assert limiter.rate == 7.5
+    limiter.recover()
+    limiter.recover()
+    assert limiter.rate == 10
+
+
+@pytest.mark.parametrize(
+    "value, expected", [(None, None), ("", None), ("3", 3.0), ("soon", None)]
+)
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
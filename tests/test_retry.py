@@ -0,0 +1,36 @@
+from moyklass_api.retry import RetryPolicy, allow_retry_for
+
+
+def test_idempotent_methods_are_retried_until_max_attempts():
+    policy = RetryPolicy(max_attempts=3)
+
+    assert policy.should_retry(1, "GET", "v1/company/users")
+    assert policy.should_retry(2, "get", "v1/company/users")
+    assert not policy.should_retry(3, "GET", "v1/company/users")
+    assert policy.stats.as_dict()["exhausted"] == 1
+
+
+def test_post_is_retried_only_if_safe_or_allowed_by_the_guard():
+    policy = RetryPolicy(idempotency_guard=allow_retry_for("v1/company/auth/getToken"))
+
+    assert not policy.should_retry(1, "POST", "v1/company/payments", {"summa": 1})
+    assert policy.should_retry(1, "POST", "v1/company/payments", safe=True)
+    assert policy.should_retry(1, "POST", "v1/company/auth/getToken")
+
+
+def test_backoff_grows_exponentially_up_to_the_maximum():
+    policy = RetryPolicy(backoff_factor=0.5, max_backoff=3, jitter=False)
+
+    assert [policy.backoff(attempt) for attempt in range(1, 6)] == [
+        0.5,
+        1.0,
+        2.0,
+        3,
+        3,
+    ]
+
+
+def test_jitter_stays_below_the_exponential_delay():
+    policy = RetryPolicy(backoff_factor=1, jitter=True)
+
+    assert all(0 <= policy.backoff(3) <= 4 for _ in range(100))
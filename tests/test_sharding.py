@@ -0,0 +1,86 @@
+from datetime import date
+
+from moyklass_api.sharding import (
+    iter_sharded,
+    sharded_filters,
+    split_range,
+    subtract_ranges,
+)
+
+
+def d(day: str) -> date:
+    return date.fromisoformat(day)
+
+
+def test_split_range_by_days_weeks_and_months():
+    whole = (d("2024-01-30"), d("2024-03-02"))
+
+    days = split_range(whole, 1)
+    weeks = split_range(whole, 7)
+    months = split_range(whole, 30)
+
+    assert len(days) == 33
+    assert weeks[0] == (d("2024-01-30"), d("2024-02-05"))
+    assert weeks[-1] == (d("2024-02-27"), d("2024-03-02"))
+    assert months == [
+        (d("2024-01-30"), d("2024-01-31")),
+        (d("2024-02-01"), d("2024-02-29")),
+        (d("2024-03-01"), d("2024-03-02")),
+    ]
+
+
+def test_split_range_covers_the_range_without_gaps():
+    whole = (d("2023-12-15"), d("2024-02-10"))
+
+    for shard_days in (1, 7, 28):
+        shards = split_range(whole, shard_days)
+        assert shards[0][0] == whole[0] and shards[-1][1] == whole[1]
+        for (_, end), (start, _) in zip(shards, shards[1:]):
+            assert (start - end).days == 1
+
+
+def test_split_range_crosses_the_year():
+    assert split_range((d("2024-12-20"), d("2025-01-05")), 28) == [
+        (d("2024-12-20"), d("2024-12-31")),
+        (d("2025-01-01"), d("2025-01-05")),
+    ]
+
+
+def test_subtract_ranges():
+    whole = (d("2024-01-01"), d("2024-01-31"))
+    done = [(d("2024-01-10"), d("2024-01-12")), (d("2024-01-01"), d("2024-01-03"))]
+
+    assert subtract_ranges(whole, done) == [
+        (d("2024-01-04"), d("2024-01-09")),
+        (d("2024-01-13"), d("2024-01-31")),
+    ]
+    assert subtract_ranges(whole, [whole]) == []
+
+
+def test_sharded_filters_keep_date_and_id():
+    assert sharded_filters({"user_id": 1}) == {"user_id": 1}
+    assert sharded_filters({"fields": ["summa"]})["fields"] == ["summa", "date", "id"]
+    assert sharded_filters({"fields": ["id", "date"]})["fields"] == ["id", "date"]
+
+
+def test_iter_sharded_skips_records_repeated_across_the_shard_boundary():
+    records = [
+        {"id": day * 2 + n, "date": f"2024-01-{day:02d}"}
+        for day in range(1, 11)
+        for n in range(2)
+    ]
+    # Record 5 moved from the 2nd to the 3rd while the export ran, 14 is doubled
+    records.append({"id": 5, "date": "2024-01-03"})
+    records.append({"id": 14, "date": "2024-01-07"})
+
+    def fetch(date_range, offset, limit):
+        found = [r for r in records if date_range[0] <= r["date"] <= date_range[1]]
+        return {"stats": {"totalItems": len(found)}, "lessons": found[offset:][:limit]}
+
+    items = list(
+        iter_sharded(
+            fetch, "lessons", ["2024-01-01", "2024-01-10"], limit=3, shard_items=4
+        )
+    )
+
+    assert [item["id"] for item in items] == list(range(2, 22))
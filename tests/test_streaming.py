@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from moyklass_api.streaming import ArrayItemParser
+
+PAGE = {
+    "stats": {"totalItems": 3},
+    "payments": [
+        {"id": 1, "summa": 1500.5, "comment": "оплата"},
+        {"id": 2, "summa": -7, "comment": 'a "quoted" [text] {}'},
+        {"id": 3, "summa": 100, "comment": None},
+    ],
+    "extra": [1, 2],
+}
+
+
+def parse(body: bytes, chunk_size: int, items_key: str = "payments"):
+    parser = ArrayItemParser(items_key)
+    items = []
+    for start in range(0, len(body), chunk_size):
+        items.extend(parser.feed(body[start : start + chunk_size]))
+    items.extend(parser.close())
+    return items, parser.meta
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 10000])
+def test_items_and_meta_for_any_chunk_size(chunk_size):
+    body = json.dumps(PAGE, ensure_ascii=False).encode()
+
+    items, meta = parse(body, chunk_size)
+
+    assert items == PAGE["payments"]
+    assert meta == {"stats": {"totalItems": 3}, "extra": [1, 2]}
+
+
+def test_number_split_between_chunks_is_not_cut():
+    parser = ArrayItemParser("items")
+
+    assert parser.feed(b'{"items": [12') == []
+    assert parser.feed(b"34, 5") == [1234]
+    assert parser.feed(b"6]}") == [56]
+    assert parser.close() == []
+
+
+def test_items_are_returned_as_soon_as_complete():
+    parser = ArrayItemParser("items")
+
+    assert parser.feed(b'{"items": [{"id": 1}, {"id"') == [{"id": 1}]
+    assert parser.feed(b": 2}]}") == [{"id": 2}]
+
+
+def test_empty_list_and_missing_key():
+    assert parse(b'{"items": [], "stats": {}}', 4, "items") == ([], {"stats": {}})
+    assert parse(b'{"stats": {"totalItems": 0}}', 4, "items") == (
+        [],
+        {"stats": {"totalItems": 0}},
+    )
+
+
+@pytest.mark.parametrize(
+    "body", [b'{"items": [1, 2', b'["items"]', b'{"items": [1 2]}', b"{} {}"]
+)
+def test_invalid_body_raises_value_error(body):
+    with pytest.raises(ValueError):
+        parse(body, 3, "items")
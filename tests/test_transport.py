@@ -0,0 +1,41 @@
+import pytest
+import requests
+
+from moyklass_api.client import MoyklassApi
+from moyklass_api.transport import Transport
+
+
+class Session(requests.Session):
+    closed = False
+
+    def close(self) -> None:
+        self.closed = True
+        super().close()
+
+
+def test_close_keeps_a_session_of_the_caller_open():
+    session = Session()
+
+    mc = MoyklassApi("key", session=session)
+    mc.close()
+
+    assert mc.session is session
+    assert not session.closed
+
+
+def test_close_closes_an_own_session(monkeypatch):
+    mc = MoyklassApi("key")
+    closed = []
+    monkeypatch.setattr(mc.session, "close", lambda: closed.append(True))
+
+    mc.close()
+
+    assert closed == [True]
+
+
+def test_transport_without_send_can_not_be_created():
+    class Incomplete(Transport):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
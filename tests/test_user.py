@@ -0,0 +1,160 @@
+import pytest
+
+from benchmarks.stand_in import StandInServer
+from moyklass_api import models
+from moyklass_api.bulk import BulkStatus
+from moyklass_api.cache import EntityCache
+from moyklass_api.changes import ChangeTracker
+from moyklass_api.client import MoyklassApi
+from moyklass_api.models import page_parser
+from moyklass_api.user import (
+    FAN_OUT,
+    SCAN,
+    User,
+    UserSubscriptionId,
+    cheaper_strategy,
+    subscription_owner,
+    subscription_probe_filters,
+    subscription_scan_filters,
+)
+
+
+@pytest.mark.parametrize(
+    "total, count, limit, expected",
+    [
+        (1000, 10, 500, SCAN),
+        (1000, 2, 500, FAN_OUT),
+        (5000, 10, 500, FAN_OUT),
+        (4500, 10, 500, SCAN),
+        (0, 3, 500, SCAN),
+    ],
+)
+def test_cheaper_strategy_compares_pages_with_users(total, count, limit, expected):
+    page = {"stats": {"totalItems": total}, "subscriptions": []}
+
+    assert cheaper_strategy(page, count, limit) == expected
+
+
+def test_cheaper_strategy_without_stats_fans_out():
+    assert cheaper_strategy({"subscriptions": []}, 100, 500) == FAN_OUT
+
+
+def test_probe_filters_ask_for_one_item_without_conversion():
+    filters = {
+        "status_id": [UserSubscriptionId.ACTIVE],
+        "as_model": True,
+        "fields": ["id"],
+    }
+
+    assert subscription_probe_filters(filters) == {
+        "status_id": [UserSubscriptionId.ACTIVE],
+        "offset": 0,
+        "limit": 1,
+    }
+
+
+def test_scan_filters_keep_user_id_in_projections():
+    assert subscription_scan_filters({"class_id": [1]}) == {"class_id": [1]}
+    assert subscription_scan_filters({"fields": ["id"]}) == {"fields": ["id", "userId"]}
+    assert subscription_scan_filters({"fields": ["userId"]}) == {"fields": ["userId"]}
+
+
+def test_subscription_owner_of_dictionaries_and_models():
+    record = {"id": 1, "userId": 7}
+
+    assert subscription_owner(record) == 7
+    assert subscription_owner(models.UserSubscription.from_dict(record)) == 7
+
+
+def test_projected_pages_are_tracked_but_not_cached():
+    cache, tracker = EntityCache(), ChangeTracker()
+    client = MoyklassApi("key", entity_cache=cache, change_tracker=tracker)
+    user = User(client)
+    page = {"users": [{"id": 1, "name": "A", "email": "a@example.com"}]}
+
+    transform = user._observe_page(
+        "users", "users", user._track_page(page_parser(None, "users")), ["id", "name"]
+    )
+
+    assert transform(page) == {"users": [{"id": 1, "name": "A"}]}
+    assert len(cache) == 0
+    assert tracker.changes(1, {"name": "A"}) is None
+
+
+@pytest.fixture
+def stand_in_user():
+    with StandInServer(total_items=5) as server:
+        mc = MoyklassApi("key", base_url=server.url)
+        mc.token_manager.set(server.issue_token())
+        yield User(mc)
+        mc.close()
+
+
+def test_upsert_reports_rows_with_unknown_arguments(stand_in_user):
+    rows = [{"name": "A", "phone": "79991112233"}, {"name": "B", "mobile": "1"}]
+
+    report = stand_in_user.upsert_users(rows, workers=2)
+
+    assert [row.status for row in report.rows] == [
+        BulkStatus.CREATED,
+        BulkStatus.FAILED,
+    ]
+    assert report.rows[1].error.startswith("Invalid row:")
+
+
+def test_upsert_raises_type_errors_of_the_request(stand_in_user, monkeypatch):
+    index = stand_in_user.build_contact_index()
+
+    def broken(*args, **kwargs):
+        raise TypeError("bug")
+
+    monkeypatch.setattr(stand_in_user.client, "_make_request", broken)
+
+    with pytest.raises(TypeError, match="bug"):
+        stand_in_user.upsert_users([{"name": "A"}], index=index)
+
+
+@pytest.fixture
+def cached_user():
+    with StandInServer(total_items=5) as server:
+        mc = MoyklassApi("key", base_url=server.url, entity_cache=EntityCache())
+        mc.token_manager.set(server.issue_token())
+        yield User(mc), server
+        mc.close()
+
+
+def test_cached_users_are_returned_without_requests(cached_user):
+    user, server = cached_user
+    user.get_users(limit=5)
+    served = server.requests_served
+
+    first, again = user.get_user(3), user.get_user(3)
+
+    assert first is again and first["id"] == 3
+    assert server.requests_served == served
+    assert user.client.entity_cache.stats()["hits"] == 2
+
+
+def test_writes_replace_the_cached_user(cached_user):
+    user, server = cached_user
+    user.get_user(3)
+
+    user.update_user(3, name="Пётр")
+    created = user.create_user(name="Анна")
+    served = server.requests_served
+
+    assert user.get_user(3)["name"] == "Пётр"
+    assert user.get_user(created["id"]) == created
+    assert server.requests_served == served
+
+
+def test_deleted_user_is_requested_again(cached_user):
+    user, server = cached_user
+    user.get_user(3)
+
+    user.delete_user(3)
+    served = server.requests_served
+
+    assert user.client.entity_cache.get("users", 3) is None
+    assert user.get_user(3)["id"] == 3
+    assert server.requests_served == served + 1